@@ -1,11 +1,155 @@
+import os
 import streamlit as st
 import pandas as pd
+import polars as pl
+import plotly.express as px
 import matplotlib.pyplot as plt
+import openassetpricing as oap
 from sklearn.metrics import mean_squared_error
 
+# Artifact store filled by openassetpricing.build_artifacts, one folder per
+# data release. Tables missing from the store fall back to dashboard_ref.
+STORE = oap.ArtifactStore(os.environ.get("OAP_ARTIFACT_DIR", "artifacts"))
+
+
+def release_version():
+    # Latest release of the store and its version, which key the caches
+    release = STORE.latest()
+    return release, STORE.version(release)
+
+
+@st.cache_data(show_spinner=False)
+def _load_table(name, release, version, fallback):
+    # version only keys the cache: a rebuild invalidates it
+    if STORE.path(name, release) is None:
+        return pd.read_csv(fallback)
+    return STORE.read(name, release, df_backend="pandas")
+
+
+def load_table(name, fallback):
+    return _load_table(name, *release_version(), fallback)
+
+
+# Live charts: results are memoized per parameter tuple (plus release and
+# version), keeping only the most recent MAX_ENTRIES, and long series are
+# thinned to MAX_POINTS before they are sent to the browser
+MAX_ENTRIES = 32
+MAX_POINTS = 600
+
+
+def artifact_path(name):
+    return STORE.path(name)
+
+
+def downsample(df, max_points=MAX_POINTS):
+    # Every k-th row, always keeping the last one
+    step = -(-len(df) // max_points)
+    if step <= 1:
+        return df
+    keep = list(range(0, len(df), step))
+    if keep[-1] != len(df) - 1:
+        keep.append(len(df) - 1)
+    return df.iloc[keep]
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def cumulative_returns(model, start, end, release, version):
+    # Equal-weighted monthly average of predicted and actual returns
+    res = (
+        pl.scan_parquet(artifact_path("predictions"))
+        .filter(pl.col("date").is_between(start, end))
+        .group_by("date")
+        .agg(pl.col(model).mean().alias("Predicted"),
+             pl.col("ret").mean().alias("Actual"))
+        .sort("date")
+        .with_columns(pl.col("Predicted", "Actual").cum_sum())
+        .collect()
+        .to_pandas()
+        .set_index("date")
+    )
+    return downsample(res)
+
+
+def cumulative_chart(model, png, caption):
+    path = artifact_path("predictions")
+    if path is None or model not in pl.read_parquet_schema(path):
+        st.image(png, caption=caption, use_container_width=True)
+        return
+    dates = (
+        pl.scan_parquet(path).select(pl.col("date").unique().sort())
+        .collect().to_series().to_list())
+    start, end = st.select_slider(
+        "Date range", options=dates, value=(dates[0], dates[-1]),
+        key=f"range_{model}")
+    st.line_chart(cumulative_returns(model, start, end, *release_version()))
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def decay_table(signals, horizons, start, end, release, version):
+    panel = (
+        pl.scan_parquet(artifact_path("panel"))
+        .filter(pl.col("yyyymm").is_between(start, end))
+        .select("permno", "yyyymm", "ret", *signals)
+    )
+    return oap.signal_decay(panel, list(signals), horizons, n_jobs=4,
+                            df_backend="pandas")
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def regime_views(top_k, release, version):
+    # Relative importance of the top-k features and the Spearman
+    # correlation of their rankings across regimes
+    importance = pl.read_parquet(artifact_path("regime_importance"))
+    regimes = [i for i in importance.columns if i != "Feature"]
+    top = (
+        importance
+        .sort(pl.mean_horizontal(regimes), descending=True)
+        .head(top_k)
+    )
+    ranks = top.select(pl.col(regimes).rank(descending=True)).to_pandas()
+    return top.to_pandas().set_index("Feature"), ranks.corr()
+
+
+def dataset_sources():
+    # Parquet cache of OpenAP downloads (release, name), plus the panel of
+    # the artifact store (path)
+    sources = {
+        f"{name} ({release})": (release, name)
+        for release, name in oap.list_cache(oap.DEFAULT_CACHE_DIR)}
+    if artifact_path("panel") is not None:
+        sources[f"panel ({STORE.latest()})"] = (
+            artifact_path("panel"))
+    return sources
+
+
+def scan_source(source):
+    if isinstance(source, tuple):
+        return oap.scan_cache(oap.DEFAULT_CACHE_DIR, *source)
+    return pl.scan_parquet(source)
+
+
+def source_mtime(source):
+    if isinstance(source, tuple):
+        return os.path.getmtime(
+            os.path.join(oap.DEFAULT_CACHE_DIR, source[0]))
+    return os.path.getmtime(source)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def browse_page(source, mtime, columns, signal, permno, start, end, page,
+                page_size, date):
+    # Filters and projection are pushed into the Parquet scan; only the
+    # requested page is read
+    return oap.browse(
+        scan_source(source), list(columns), list(signal), list(permno),
+        start, end, page, page_size, date, df_backend="pandas")
+
+
 # Set up the page layout
 st.set_page_config(page_title="Stock Return Prediction Dashboard", layout="wide")
 st.title("📊 Stock Return Prediction Dashboard")
+if STORE.latest():
+    st.caption(f"Data release: {STORE.latest()}")
 
 # Top-level tabs
 main_tabs = st.tabs(["📘 Introduction", "📊 Dataset", "📈 Analysis"])
@@ -70,7 +214,7 @@ with main_tabs[1]:
     merged_path = "dashboard_ref/merged_df_head10.csv"  # Adjust path if needed
 
     # Load the first dataset - signaldoc_head10.csv
-    signaldoc_df = pd.read_csv(signaldoc_path)
+    signaldoc_df = load_table("signaldoc", signaldoc_path).head(10)
     st.subheader("📑 Signal Documentation")
     st.markdown("""
     **`signaldoc_head10.csv`**: This dataset contains a list of **financial signals** with their respective **signal names**, **quality ratings**, and **t-statistics**. It is used to identify the most statistically significant signals based on quality and reliability for stock prediction.
@@ -78,13 +222,76 @@ with main_tabs[1]:
     st.dataframe(signaldoc_df)
 
     # Load the second dataset - merged_df_head10.csv
-    merged_df = pd.read_csv(merged_path)
+    merged_df = load_table("merged_head", merged_path)
     st.subheader("📈 Merged Data (Filtered by Top Features)")
     st.markdown("""
     **`merged_df_head10.csv`**: This dataset is the **final merged dataset**, filtered based on the **top 20 features** selected from the signal quality and t-statistics. It contains **monthly returns** and **lagged explanatory variables**, making it ready for modeling and analysis of stock predictions.
     """)
     st.dataframe(merged_df)
 
+    # Browse the full datasets of the Parquet cache
+    st.subheader("🔎 Dataset Browser")
+    sources = dataset_sources()
+    if not sources:
+        st.markdown("No cached datasets yet. Download with `OpenAP(cache_dir=...)` or run `build_artifacts`.")
+    else:
+        source = st.selectbox("Dataset", list(sources))
+        source = sources[source]
+        schema = scan_source(source).collect_schema()
+        date_col = "yyyymm" if "yyyymm" in schema else "date"
+        long_format = "signalname" in schema
+        if long_format:
+            signal_options = (
+                scan_source(source).select(pl.col("signalname").unique().sort())
+                .collect().to_series().to_list())
+        else:
+            signal_options = [i for i in schema if i not in ["permno", date_col]]
+        signal = st.multiselect("Signals", signal_options)
+        columns = st.multiselect("Columns", list(schema))
+        permno = st.text_input("Permnos (comma separated)")
+        errors = []
+        try:
+            permno = [int(i) for i in permno.replace(" ", "").split(",") if i]
+        except ValueError:
+            errors.append("Permnos must be whole numbers separated by commas.")
+        if signal and not long_format:
+            # Selecting signals of a wide panel narrows its columns
+            missing = [i for i in columns if i not in ["permno", date_col, *signal]]
+            if missing:
+                errors.append(f"Columns not among the selected signals: {', '.join(missing)}")
+        bounds = (
+            scan_source(source)
+            .select(pl.col(date_col).min().alias("min"), pl.col(date_col).max().alias("max"))
+            .collect().row(0))
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start = st.text_input("From", str(bounds[0]))
+        with col2:
+            end = st.text_input("To", str(bounds[1]))
+        with col3:
+            page_size = st.selectbox("Rows per page", [50, 100, 500, 1000])
+        try:
+            if date_col == "date":
+                start, end = pd.Timestamp(start), pd.Timestamp(end)
+                if pd.isna(start) or pd.isna(end):
+                    raise ValueError
+                start, end = start.date(), end.date()
+            else:
+                start, end = int(start), int(end)
+        except ValueError:
+            errors.append(f"From and To must look like {bounds[0]}.")
+        page = st.number_input("Page", min_value=1, value=1, step=1) - 1
+        if errors:
+            for error in errors:
+                st.error(error)
+        else:
+            page_df, n_rows = browse_page(
+                source, source_mtime(source), tuple(columns), tuple(signal),
+                tuple(permno), start, end, int(page), page_size, date_col)
+            first = min(page * page_size + 1, n_rows)
+            st.caption(f"Rows {first:,}–{page * page_size + len(page_df):,} of {n_rows:,}")
+            st.dataframe(page_df)
+
 # --- Hypothesis-Driven Analysis Tab ---
 with main_tabs[2]:
     st.header("📈 Hypothesis-Driven Analysis")
@@ -121,7 +328,15 @@ with main_tabs[2]:
         ])
 
         with model_tabs[0]:
-            st.image("dashboard_ref/composite_signal.png", caption="Composite Signal", use_container_width=True)
+            composite_path = artifact_path("composite")
+            if composite_path is None:
+                st.image("dashboard_ref/composite_signal.png", caption="Composite Signal", use_container_width=True)
+            else:
+                composite = (
+                    pl.read_parquet(composite_path)
+                    .select("date", pl.col("composite").fill_null(0).cum_sum())
+                    .to_pandas().set_index("date"))
+                st.line_chart(downsample(composite))
             st.markdown("""
             **Composite Signal Explanation**
 
@@ -137,14 +352,14 @@ The weighted signals are then aggregated using a dot product, where the normaliz
             """)
         
         with model_tabs[1]:
-            st.image("dashboard_ref/LinearRegression_cumulative_return.png", caption="Linear Regression", use_container_width=True)
+            cumulative_chart("LinearRegression", "dashboard_ref/LinearRegression_cumulative_return.png", "Linear Regression")
             st.markdown("""
             **Summary**:  
             The **Linear Regression** model captures the general trend of the **Actual Returns** well, but it struggles with larger fluctuations, particularly during volatile market periods like the 2008 financial crisis. The blue line representing the predicted returns tends to smooth out market extremes, failing to track sharp drops or spikes accurately. While **Linear Regression** reflects the overall upward trend of the market, it lacks precision in more turbulent times, such as during market crashes. This suggests that linear models may not fully capture the complexities and nonlinearities of the market, and adding more features could improve the model's predictive power.\n
             The **correlation** shows a reasonable fit to the market data, though there is room for improvement. The **Sharpe Ratio** suggests the model's returns are not well-adjusted for volatility, and the **T-Statistic** indicates that the model's significance is moderate.
             """)
         with model_tabs[2]:
-            st.image("dashboard_ref/MLPRegressor_cumulative_return.png", caption="MLP Regressor", use_container_width=True)
+            cumulative_chart("MLPRegressor", "dashboard_ref/MLPRegressor_cumulative_return.png", "MLP Regressor")
             st.markdown("""
             **Summary**:  
             The **MLP Regressor** provides a better fit compared to **Linear Regression**, as it captures more of the volatility and trends in the actual returns. It adapts well to the changing dynamics of the market, but still exhibits some lag during extreme periods, particularly in 2008. While the **MLP Regressor** does a better job of handling market fluctuations compared to simpler models, it still misses sharp market movements, which can limit its effectiveness during times of market stress. The model shows promise, but fine-tuning its architecture or adding more features could improve its performance in volatile markets.\n
@@ -152,14 +367,14 @@ The weighted signals are then aggregated using a dot product, where the normaliz
             """)
         
         with model_tabs[3]:
-            st.image("dashboard_ref/RandomForestRegressor_cumulative_return.png", caption="Random Forest Regressor", use_container_width=True)
+            cumulative_chart("RandomForestRegressor", "dashboard_ref/RandomForestRegressor_cumulative_return.png", "Random Forest Regressor")
             st.markdown("""
             **Summary**:  
             The **Random Forest Regressor** performs well in tracking the major trends of the **Actual Returns**, including significant market fluctuations such as the 2008 financial crisis. The predicted values (blue line) show a reasonable alignment with the actual returns (green line), though it slightly lags during periods of rapid market change. Despite this, the **Random Forest** model demonstrates higher robustness compared to **Linear Regression** and **MLP**, and it handles sudden market shifts better. Overall, **Random Forest** is a strong performer, but could still benefit from improvements to better capture extreme market movements.\n
             The **correlation** of 1.000000 indicates a perfect fit, which is expected given how **Random Forest** works by aggregating multiple decision trees. However, the **Sharpe Ratio** suggests that the model’s returns are not very well-adjusted for risk, and further tuning could improve its performance.
             """)
         with model_tabs[4]:
-            st.image("dashboard_ref/SVR_cumulative_return.png", caption="Support Vector Regressor", use_container_width=True)
+            cumulative_chart("SVR", "dashboard_ref/SVR_cumulative_return.png", "Support Vector Regressor")
             st.markdown("""
             **Summary**:  
             The **SVR Regressor** seems to struggle with capturing sharp downturns, particularly during significant market crises like the 2008 financial crisis. While it follows the general market trend well, the predicted returns appear smoother and less responsive to extreme market movements. This suggests that **SVR** may be too conservative and not sufficiently sensitive to market shocks. The model could be improved by adjusting its regularization parameters or incorporating more dynamic features to capture sudden market fluctuations.\n
@@ -167,7 +382,7 @@ The weighted signals are then aggregated using a dot product, where the normaliz
             """)
         
         with model_tabs[5]:
-            st.image("dashboard_ref/XGBRegressor_cumulative_return.png", caption="XGBoost Regressor", use_container_width=True)
+            cumulative_chart("XGBRegressor", "dashboard_ref/XGBRegressor_cumulative_return.png", "XGBoost Regressor")
             st.markdown("""
             **Summary**:  
             The **XGBoost Regressor** performs well overall, tracking the **Actual Returns** more accurately than most other models, especially during volatile periods. It provides superior predictive power, handling complex market conditions effectively. **XGBoost** is a top performer in terms of predictive accuracy and managing market dynamics, making it one of the most reliable models for stock return prediction.\n
@@ -175,7 +390,7 @@ The weighted signals are then aggregated using a dot product, where the normaliz
             """)
         
         # Load and display the "model_summary.csv" table
-        model_summary_df = pd.read_csv("dashboard_ref/model_summary.csv")
+        model_summary_df = load_table("model_summary", "dashboard_ref/model_summary.csv")
         st.subheader("📊 Model Summary")
         st.markdown("Here is the summary of various models' performance metrics.")
         st.dataframe(model_summary_df)
@@ -204,7 +419,7 @@ The weighted signals are then aggregated using a dot product, where the normaliz
         """)
 
     if analysis_tab == "Survival Analysis - When will a stock die?":
-        surv_analysis_df = pd.read_csv("dashboard_ref/surv_analysis.csv")
+        surv_analysis_df = load_table("surv_analysis", "dashboard_ref/surv_analysis.csv")
         st.header("📊 Survival Analysis")
         st.dataframe(surv_analysis_df)
         st.markdown("""
@@ -289,7 +504,34 @@ A hazard ratio (**exp(coef)**) greater than 1 suggests the signal increases the
         
     if analysis_tab == "Signal Decay":
         st.header("📊 Signal Decay")
-        st.image("dashboard_ref/decay_graph.png")
+        panel_path = artifact_path("panel")
+        if panel_path is None:
+            st.image("dashboard_ref/decay_graph.png")
+        else:
+            signal_options = [
+                i for i in pl.read_parquet_schema(panel_path)
+                if i not in ["permno", "yyyymm", "date", "ret"]]
+            months = (
+                pl.scan_parquet(panel_path)
+                .select(pl.col("yyyymm").unique().sort())
+                .collect().to_series().to_list())
+            default = load_table("decay", "dashboard_ref/decay.csv")["Signal"]
+            signals = st.multiselect(
+                "Signals", signal_options,
+                default=[i for i in default if i in signal_options][:5]
+                or signal_options[:5])
+            horizons = st.multiselect(
+                "Horizons (months)", list(range(1, 13)), default=[1, 3, 6])
+            start, end = st.select_slider(
+                "Date range", options=months, value=(months[0], months[-1]))
+            if signals and horizons:
+                decay = decay_table(
+                    tuple(signals), tuple(sorted(horizons)), start, end,
+                    *release_version())
+                ic = decay.set_index("Signal")[
+                    [f"IC_{h}m_mean" for h in sorted(horizons)]].T
+                ic.index = sorted(horizons)
+                st.line_chart(ic)
         st.markdown("""
 ## Graph Overview
 The graph illustrates the signal decay patterns for the top five financial signals, evaluated based on their Spearman Rank Correlation (IC) with future stock returns over 1-month, 3-month, and 6-month horizons.
@@ -316,8 +558,8 @@ Understanding signal decay helps align trading strategies with the appropriate i
         
     if analysis_tab == "Signal Engineering":
         st.header("📊 Signal Engineering")
-        importance_eng = pd.read_csv("dashboard_ref/importance_eng.csv")
-        orig_importance = pd.read_csv("dashboard_ref/orig_importance.csv")
+        importance_eng = load_table("importance_eng", "dashboard_ref/importance_eng.csv")
+        orig_importance = load_table("orig_importance", "dashboard_ref/orig_importance.csv")
         
         # Create two columns for side-by-side display
         col1, col2 = st.columns(2)
@@ -344,8 +586,17 @@ Through this project, I demonstrated that thoughtful signal engineering can mate
 """)
     if analysis_tab == "Regime-Aware Models":
         st.header("📊 Regime-Aware Models")
-        st.image("dashboard_ref/top22featuredecade.png", caption="Top 22 Feature Decade")
-        st.image("dashboard_ref/spearman.png", caption="Spearman Correlation")
+        if artifact_path("regime_importance") is None:
+            st.image("dashboard_ref/top22featuredecade.png", caption="Top 22 Feature Decade")
+            st.image("dashboard_ref/spearman.png", caption="Spearman Correlation")
+        else:
+            top_k = st.slider("Top features", 5, 40, 22)
+            importance, spearman = regime_views(top_k, *release_version())
+            st.bar_chart(importance.div(importance.sum(axis=0), axis=1).T)
+            st.plotly_chart(px.imshow(
+                spearman, text_auto=".2f", zmin=0, zmax=1,
+                color_continuous_scale="viridis",
+                title="Spearman correlation of importance rankings"))
         st.markdown("""
         ## 1.  Pipeline Overview
 
@@ -1,2 +1,21 @@
 from .openap_download import list_release
 from .openap_download import OpenAP
+from .portfolio import port_returns
+from .regression import ts_regress, fama_macbeth
+from .predict import predict_panel
+from .decay import forward_returns, ic_series, signal_decay
+from .composite import CompositeSignal
+from .backtest import walk_forward
+from .matrix import feature_matrix, export_matrix
+from .regime import regime_importance
+from .transform import cross_section
+from .survival import survival_spells, cox_screen
+from .features import build_features, top_signals
+from .importance import permutation_importance
+from .artifacts import ArtifactStore, build_artifacts
+from .cache import DEFAULT_CACHE_DIR, cache_path, scan_cache, list_cache, browse
+from .diff import diff_releases, upgrade_cache
+from .registry import ReleaseRegistry
+from .plan import plan_download
+from .instrument import Instrument
+from .synthetic import write_release
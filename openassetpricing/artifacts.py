@@ -0,0 +1,196 @@
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import polars as pl
+from .backtest import walk_forward
+from .composite import CompositeSignal
+from .decay import signal_decay
+from .features import build_features, moving_averages, top_signals
+from .importance import permutation_importance
+from .matrix import feature_matrix
+from .regime import regime_importance
+from .survival import survival_spells, cox_screen
+from .utils import (
+    _check_backend, _to_lazy, _convert_to_backend, _release_key)
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Versioned store of analytics tables, one folder per data release.
+
+    Every artifact is a Parquet file next to a manifest.json holding its
+    rows, columns, hash and creation time. The manifest also carries a
+    release `version` that changes whenever an artifact is written, so
+    readers such as app.py can key their caches on (release, version).
+    """
+
+    def __init__(self, root='artifacts'):
+        self.root = root
+
+    def _dir(self, release):
+        return os.path.join(self.root, str(release))
+
+    def _manifest_path(self, release):
+        return os.path.join(self._dir(release), 'manifest.json')
+
+    def manifest(self, release=None):
+        release = release or self.latest()
+        if release is None or not os.path.exists(
+                self._manifest_path(release)):
+            return {'release': release, 'version': None, 'artifacts': {}}
+        with open(self._manifest_path(release)) as f:
+            return json.load(f)
+
+    def releases(self):
+        if not os.path.isdir(self.root):
+            return []
+        res = [i for i in os.listdir(self.root)
+               if os.path.exists(self._manifest_path(i))]
+        return sorted(res, key=_release_key)
+
+    def latest(self):
+        releases = self.releases()
+        return releases[-1] if releases else None
+
+    def version(self, release=None):
+        return self.manifest(release)['version']
+
+    def write(self, name, df, release, **meta):
+        """Writes one artifact and updates the manifest of the release."""
+
+        os.makedirs(self._dir(release), exist_ok=True)
+        df = _to_lazy(df).collect()
+        path = os.path.join(self._dir(release), f'{name}.parquet')
+        # Write then rename, so readers never see a partial file
+        df.write_parquet(path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+        manifest = self.manifest(release)
+        manifest['release'] = str(release)
+        manifest['artifacts'][name] = {
+            'file': f'{name}.parquet',
+            'rows': len(df),
+            'columns': df.columns,
+            'sha256': _file_hash(path),
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            **meta,
+        }
+        manifest['version'] = hashlib.sha256(json.dumps(
+            sorted((k, v['sha256'])
+                   for k, v in manifest['artifacts'].items())).encode()
+        ).hexdigest()[:16]
+        tmp = self._manifest_path(release) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self._manifest_path(release))
+
+    def path(self, name, release=None):
+        """Parquet file of an artifact, or None where it was not written."""
+
+        release = release or self.latest()
+        artifacts = self.manifest(release)['artifacts']
+        if name not in artifacts:
+            return None
+        return os.path.join(self._dir(release), artifacts[name]['file'])
+
+    def read(self, name, release=None, df_backend='polars'):
+        _check_backend(df_backend)
+        release = release or self.latest()
+        path = self.path(name, release)
+        if path is None:
+            raise ValueError(
+                f'Artifact {name} is not available for release {release}.')
+        return _convert_to_backend(pl.read_parquet(path), df_backend)
+
+
+def _importance(model, df, x, path, y='ret', k=10):
+    """
+    Top `k` of the `x` columns by the permutation importance of a copy of
+    `model` fit on them, on the rows where all are observed.
+    """
+
+    df = df.select(*x, y).drop_nulls()
+    xx = feature_matrix(df, x, path)
+    yy = df.get_column(y).to_numpy()
+    model = pickle.loads(pickle.dumps(model))
+    model.fit(xx, yy)
+    imp = permutation_importance(model, path, yy, x)
+    return imp.select('Feature', 'Importance').head(k)
+
+
+def build_artifacts(store, openap, panel=None, signals=None, models=None,
+                    regime_model=None, crsp=None, importance_model=None):
+    """
+    Batch pipeline that fills the store with the dashboard tables.
+
+    The signal doc and composite signal come from `openap` alone. With a
+    merged `panel` (permno, yyyymm, date, ret and the `signals`) it adds
+    signal decay, the walk-forward model summary of `models`, the regime
+    importance of `regime_model`, and with a CRSP return panel `crsp` the
+    Cox screening of the signals. With `importance_model` it adds the
+    permutation importance of the signals (orig_importance) and of the
+    3- and 6-month moving averages of the top ten (importance_eng), as in
+    best_model_10_random_good.ipynb. Artifacts are written under the
+    release of `openap`.
+    """
+
+    release = openap.release
+    doc = openap.dl_signal_doc('polars')
+    store.write('signaldoc', doc, release)
+    comp = CompositeSignal.from_openap(openap)
+    store.write('composite', comp.composite, release,
+                signals=comp.signals)
+
+    if panel is None or signals is None:
+        return store.manifest(release)
+
+    panel = _to_lazy(panel).collect()
+    store.write('merged_head', panel.head(10), release)
+    # Feeds the live charts of app.py
+    store.write(
+        'panel', panel.select('permno', 'yyyymm', 'ret', *signals), release)
+    store.write('decay', signal_decay(panel, signals), release)
+    if models is not None:
+        summary, pred = walk_forward(panel, models, signals)
+        store.write('model_summary', summary, release)
+        store.write('predictions', pred, release)
+    if regime_model is not None:
+        importance, spearman, r2 = regime_importance(
+            panel, regime_model, signals)
+        store.write('regime_importance', importance, release)
+        store.write('spearman', spearman, release)
+        store.write('regime_r2', r2, release)
+    if crsp is not None:
+        spells = survival_spells(
+            crsp, panel.select('permno', 'yyyymm', *signals))
+        store.write('surv_analysis', cox_screen(spells, signals), release)
+    if importance_model is not None:
+        tmpdir = tempfile.mkdtemp()
+        try:
+            orig = _importance(
+                importance_model, panel, signals,
+                os.path.join(tmpdir, 'orig.npy'))
+            store.write('orig_importance', orig, release)
+            ma = moving_averages(top_signals(orig, k=10), windows=(3, 6))
+            eng = build_features(
+                panel.select('permno', 'yyyymm', 'ret', *signals), ma)
+            store.write(
+                'importance_eng',
+                _importance(importance_model, eng, list(ma),
+                            os.path.join(tmpdir, 'eng.npy')),
+                release)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    return store.manifest(release)
@@ -0,0 +1,167 @@
+import os
+import pickle
+import numpy as np
+import polars as pl
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from .matrix import feature_matrix
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+# Feature matrix and target as seen by a worker process
+_SHARED = {}
+
+
+def _share(arr):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[:] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _attach(x_meta, y_meta):
+    if isinstance(x_meta, str):
+        # A feature_matrix file, mapped read-only
+        _SHARED['x'] = np.load(x_meta, mmap_mode='r')
+        x_meta = None
+    for key, meta in [('x', x_meta), ('y', y_meta)]:
+        if meta is None:
+            continue
+        name, shape, dtype = meta
+        shm = shared_memory.SharedMemory(name=name)
+        _SHARED[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        # Keep the handle alive for as long as the worker uses the view
+        _SHARED[f'{key}_shm'] = shm
+
+
+def _run_fold(model, train, test):
+    # Views into shared memory: slicing a row range copies nothing
+    xx, yy = _SHARED['x'], _SHARED['y']
+    model = pickle.loads(model)
+    model.fit(xx[train[0]:train[1]], yy[train[0]:train[1]])
+    return np.asarray(model.predict(xx[test[0]:test[1]]), dtype=np.float64)
+
+
+def _folds(dates, min_train, step, window):
+    """Row ranges (train, test) for an expanding or rolling window."""
+
+    periods, start = np.unique(dates, return_index=True)
+    bounds = np.r_[start, len(dates)]
+    folds = []
+    for i in range(min_train, len(periods), step):
+        first = 0 if window is None else max(0, i - window)
+        end = min(i + step, len(periods))
+        folds.append(
+            ((bounds[first], bounds[i]), (bounds[i], bounds[end])))
+    return folds
+
+
+def summary_stats(pred, y, dates):
+    """The per-model statistics of best_model_10_random_good.ipynb."""
+
+    mean = pred.mean()
+    std = pred.std(ddof=1)
+    return {
+        'Mean Squared Error': float(np.mean((y - pred) ** 2)),
+        'Correlation': float(np.corrcoef(pred, y)[0, 1]),
+        'Mean Return': float(mean),
+        'Volatility': float(std),
+        'Sharpe Ratio': float(mean / std),
+        'T-Statistic': float(mean / (std / np.sqrt(len(pred)))),
+        'Start Date': dates.min(),
+        'End Date': dates.max(),
+    }
+
+
+def _model_names(models):
+    # Named by class; repeated classes also by their position in the list
+    names = [type(i).__name__ for i in models]
+    return {
+        name if names.count(name) == 1 else f'{name}_{i}': model
+        for i, (name, model) in enumerate(zip(names, models))}
+
+
+def walk_forward(df, models, x, y='ret', date='date', min_train=120, step=12,
+                 window=None, path=None, n_jobs=None, df_backend='polars'):
+    """
+    Out-of-sample walk-forward evaluation of several models.
+
+    The panel is sorted by `date`; every `step` periods each model is refit
+    on the preceding periods (all of them, or the last `window`) and
+    predicts the next `step` periods, starting after `min_train` periods.
+    Folds x models run in a process pool of `n_jobs` workers (all cores by
+    default). The feature matrix is built once as float32 and placed in
+    shared memory, so workers read row ranges without copies. With `path`
+    it is written there by feature_matrix instead, and reused by later
+    calls on the same rows; workers map the file.
+
+    `models` is a dict of name -> unfitted sklearn-style model, or a list
+    named by class, with the list index appended to classes that appear
+    more than once (e.g. RandomForestRegressor_0). Returns the summary in the layout of
+    dashboard_ref/model_summary.csv and the out-of-sample predictions.
+    """
+
+    _check_backend(df_backend)
+    if not isinstance(models, dict):
+        models = _model_names(models)
+
+    # A stable sort, so a matrix written from `lf` has the rows of `data`
+    lf = _to_lazy(df).filter(pl.col(y).is_not_null()).sort(
+        date, maintain_order=True)
+    ids = [i for i in ['permno'] if i in lf.collect_schema().names()]
+    if path is None:
+        data = lf.collect()
+        xx = np.ascontiguousarray(
+            data.select(x).to_numpy(), dtype=np.float32)
+    else:
+        data = lf.select(*ids, date, y).collect()
+        xx = feature_matrix(lf, x, path)
+    yy = data.get_column(y).to_numpy().astype(np.float64)
+    dates = data.get_column(date).to_numpy()
+    folds = _folds(dates, min_train, step, window)
+    if not folds:
+        raise ValueError('Not enough periods for the first training window.')
+
+    tasks = [
+        (name, pickle.dumps(model), train, test)
+        for name, model in models.items() for train, test in folds]
+    n_jobs = n_jobs or os.cpu_count()
+    if n_jobs == 1:
+        _SHARED.update(x=xx, y=yy)
+        res = [_run_fold(*i[1:]) for i in tasks]
+        _SHARED.clear()
+    else:
+        x_shm, x_meta = _share(xx) if path is None else (None, str(path))
+        y_shm, y_meta = _share(yy)
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=n_jobs, initializer=_attach,
+                    initargs=(x_meta, y_meta)) as pool:
+                futures = [pool.submit(_run_fold, *i[1:]) for i in tasks]
+                res = [i.result() for i in futures]
+        finally:
+            for shm in [x_shm, y_shm]:
+                if shm is None:
+                    continue
+                shm.close()
+                shm.unlink()
+
+    test_start, test_end = folds[0][1][0], folds[-1][1][1]
+    pred = {name: np.empty(test_end - test_start) for name in models}
+    for (name, _, _, test), p in zip(tasks, res):
+        pred[name][test[0]-test_start:test[1]-test_start] = p
+
+    y_test = yy[test_start:test_end]
+    date_test = data.get_column(date).slice(test_start, test_end - test_start)
+    summary = pl.DataFrame([
+        {'Model': name, **summary_stats(p, y_test, date_test)}
+        for name, p in pred.items()])
+
+    predictions = (
+        data.slice(test_start, test_end - test_start)
+        .select(*ids, date, y)
+        .with_columns(**{name: pl.Series(p) for name, p in pred.items()})
+    )
+    return (
+        _convert_to_backend(summary, df_backend),
+        _convert_to_backend(predictions, df_backend))
@@ -0,0 +1,121 @@
+import json
+import os
+import polars as pl
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'OAP_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'openassetpricing'))
+
+
+def cache_path(cache_dir, release, data_name):
+    return os.path.join(cache_dir, str(release), f'{data_name}.parquet')
+
+
+def _delta_meta_path(cache_dir, release, data_name):
+    return os.path.join(cache_dir, str(release), f'{data_name}.delta.json')
+
+
+def is_cached(cache_dir, release, data_name):
+    return (
+        os.path.exists(cache_path(cache_dir, release, data_name))
+        or os.path.exists(_delta_meta_path(cache_dir, release, data_name)))
+
+
+def write_cache(df, cache_dir, release, data_name):
+    path = cache_path(cache_dir, release, data_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Row groups of 100k rows keep page reads and release diffs granular
+    _to_lazy(df).collect().write_parquet(
+        path + '.tmp', row_group_size=100_000)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def _conform(lf, schema):
+    # Frame on the given columns and types, missing columns as null
+    names = lf.collect_schema().names()
+    return lf.select(
+        pl.col(i).cast(dtype) if i in names
+        else pl.lit(None, dtype=dtype).alias(i)
+        for i, dtype in schema.items())
+
+
+def scan_cache(cache_dir, release, data_name):
+    """
+    Lazily scans a cached dataset, stored in full or as a delta.
+
+    A delta (see upgrade_cache) reads the groups it did not replace from
+    its base release and the rest from its own file.
+    """
+
+    meta_path = _delta_meta_path(cache_dir, release, data_name)
+    if not os.path.exists(meta_path):
+        return pl.scan_parquet(cache_path(cache_dir, release, data_name))
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    delta = pl.scan_parquet(
+        cache_path(cache_dir, release, f'{data_name}.delta'))
+    base = (
+        _conform(scan_cache(cache_dir, meta['base'], data_name),
+                 delta.collect_schema())
+        .filter(~pl.col(meta['key']).is_in(meta['replaced']))
+    )
+    return pl.concat([base, delta]).sort(*meta['sort'])
+
+
+def list_cache(cache_dir=DEFAULT_CACHE_DIR):
+    """Cached datasets as (release, data_name) pairs."""
+
+    if not os.path.isdir(cache_dir):
+        return []
+    return sorted(
+        (release, i.removesuffix('.parquet').removesuffix('.delta'))
+        for release in os.listdir(cache_dir)
+        if os.path.isdir(os.path.join(cache_dir, release))
+        for i in os.listdir(os.path.join(cache_dir, release))
+        if i.endswith('.parquet'))
+
+
+def browse(df, columns=None, signal=None, permno=None, start=None, end=None,
+           page=0, page_size=100, date='yyyymm', df_backend='polars'):
+    """
+    One page of a lazily scanned dataset and the number of matching rows.
+
+    Filters are pushed into the scan: `signal` keeps those signalname rows
+    of portfolio data, or selects those signal columns (rows where any is
+    observed) of a signal panel; `permno` is one or a list of permnos and
+    `start`/`end` bound `date`. Only the `columns` and the rows of `page`
+    are read into memory.
+    """
+
+    _check_backend(df_backend)
+    lf = _to_lazy(df)
+    names = lf.collect_schema().names()
+    if isinstance(signal, str):
+        signal = [signal]
+    if isinstance(permno, int):
+        permno = [permno]
+
+    if signal and 'signalname' in names:
+        lf = lf.filter(pl.col('signalname').is_in(signal))
+    elif signal:
+        keys = [i for i in ['permno', date] if i in names]
+        lf = (
+            lf.select(*keys, *[i for i in signal if i not in keys])
+            .filter(pl.any_horizontal(pl.col(signal).is_not_null()))
+        )
+    if permno and 'permno' in names:
+        lf = lf.filter(pl.col('permno').is_in(permno))
+    if start is not None:
+        lf = lf.filter(pl.col(date) >= start)
+    if end is not None:
+        lf = lf.filter(pl.col(date) <= end)
+    if columns:
+        lf = lf.select(columns)
+
+    n = lf.select(pl.len()).collect().item()
+    res = lf.slice(page * page_size, page_size).collect()
+    return _convert_to_backend(res, df_backend), n
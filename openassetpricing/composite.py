@@ -0,0 +1,207 @@
+import numpy as np
+import polars as pl
+from .utils import _to_lazy
+
+
+def _tstat_weights(signals, source):
+    # source: signal doc with Acronym and T-Stat, e.g. dl_signal_doc output
+    doc = (
+        _to_lazy(source)
+        .select(
+            pl.col('Acronym').alias('signal'),
+            pl.col('T-Stat').cast(pl.Float64, strict=False).alias('weight'))
+        .collect()
+    )
+    return dict(doc.iter_rows())
+
+
+def _equal_weights(signals, source):
+    return {i: 1.0 for i in signals}
+
+
+def _ic_weights(signals, source):
+    # source: signal_decay output; IC_avg averages over horizons
+    df = _to_lazy(source).select('Signal', 'IC_avg').collect()
+    return dict(df.iter_rows())
+
+
+def _hazard_weights(signals, source):
+    # source: Cox results with covariate and coef (log hazard ratio), as in
+    # dashboard_ref/surv_analysis.csv. Signals that lower the hazard of a
+    # crash get positive weight
+    df = (
+        _to_lazy(source)
+        .select('covariate', pl.col('coef').mul(-1))
+        .collect()
+    )
+    return dict(df.iter_rows())
+
+
+WEIGHTINGS = {
+    'tstat': _tstat_weights,
+    'equal': _equal_weights,
+    'ic': _ic_weights,
+    'hazard': _hazard_weights,
+}
+
+# The table each built-in weighting reads from `source`
+SOURCES = {
+    'tstat': 'the signal doc (dl_signal_doc)',
+    'ic': 'the signal_decay output',
+    'hazard': 'the Cox results (cox_screen)',
+}
+
+
+class CompositeSignal:
+    """
+    Weighted composite of long-short signal returns.
+
+    Each signal's LS return is z-scored with its expanding mean and
+    standard deviation up to and including the current month, so no
+    month uses information from later months. The composite is the
+    weighted sum of the available z-scores, with weights normalized to
+    sum to one as in best_model_10_random_good.ipynb. Hazard weights are
+    signed (signals that raise the hazard of a crash count against the
+    composite), so they are normalized by the sum of their absolute values.
+
+    `weighting` is one of 'tstat', 'equal', 'ic', 'hazard' or a function
+    (signals, source) -> {signal: weight}; `source` is the table the
+    weighting reads (signal doc, signal_decay output or Cox results).
+    """
+
+    def __init__(self, weighting='tstat', source=None, min_periods=12):
+        if not callable(weighting) and weighting not in WEIGHTINGS:
+            raise ValueError(
+                f"Unsupported weighting. Choose one of {list(WEIGHTINGS)} "
+                "or pass a function.")
+        if source is None and weighting in SOURCES:
+            raise ValueError(
+                f"weighting='{weighting}' needs source, "
+                f"{SOURCES[weighting]}.")
+        self.weighting = weighting
+        self.source = source
+        self.min_periods = min_periods
+
+    @classmethod
+    def from_openap(cls, openap, data_name='deciles_vw', quality='1_good',
+                    min_tstat=3, weighting='tstat', source=None,
+                    min_periods=12):
+        """Selects signals from the signal doc and fits on their LS returns."""
+
+        doc = openap.dl_signal_doc('polars')
+        if weighting == 'tstat' and source is None:
+            source = doc
+        # Checked before the download
+        comp = cls(weighting, source, min_periods)
+        signals = (
+            doc.filter(
+                pl.col('Signal Rep Quality') == quality,
+                pl.col('T-Stat').cast(pl.Float64, strict=False) > min_tstat)
+            .get_column('Acronym').to_list()
+        )
+        port = openap.dl_port(data_name, 'polars', signals)
+        return comp.fit(port)
+
+    def _ls_wide(self, port):
+        lf = _to_lazy(port)
+        if 'port' in lf.collect_schema().names():
+            lf = lf.filter(pl.col('port') == 'LS')
+        return (
+            lf.select('date', 'signalname', 'ret')
+            .collect()
+            .pivot(on='signalname', index='date', values='ret')
+            .sort('date')
+        )
+
+    def _set_weights(self):
+        func = self.weighting
+        if not callable(func):
+            func = WEIGHTINGS[func]
+        raw = func(self.signals, self.source)
+        w = np.array(
+            [raw.get(i) if raw.get(i) is not None else 0.0
+             for i in self.signals], dtype=np.float64)
+        w = np.nan_to_num(w)
+        total = np.abs(w).sum() if self.weighting == 'hazard' else w.sum()
+        if total == 0:
+            raise ValueError('Weights of the selected signals sum to zero.')
+        self.weights = dict(zip(self.signals, (w / total).tolist()))
+
+    def _composite(self, z):
+        # Missing z-scores count as zero; months with none stay missing
+        w = np.array([self.weights[i] for i in self.signals])
+        res = np.nansum(z * w, axis=-1)
+        return np.where(np.isnan(z).all(axis=-1), np.nan, res)
+
+    def fit(self, port):
+        """
+        Builds the full history from dl_port output (or LS rows only).
+
+        The expanding moments of each signal are kept as running state
+        (count, mean, sum of squared deviations), which `update` extends.
+        """
+
+        wide = self._ls_wide(port)
+        self.signals = [i for i in wide.columns if i != 'date']
+        self._set_weights()
+
+        x = wide.select(self.signals).to_numpy().astype(np.float64)
+        valid = ~np.isnan(x)
+        n = np.cumsum(valid, axis=0)
+        s1 = np.cumsum(np.where(valid, x, 0), axis=0)
+        s2 = np.cumsum(np.where(valid, x, 0) ** 2, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = s1 / n
+            var = (s2 - n * mean ** 2) / (n - 1)
+            z = (x - mean) / np.sqrt(var)
+        z[(n < self.min_periods) | ~valid] = np.nan
+
+        self._n = n[-1].astype(np.float64)
+        self._mean = np.nan_to_num(mean[-1])
+        self._m2 = np.nan_to_num(s2[-1] - n[-1] * mean[-1] ** 2)
+        self.zscore = wide.select('date').with_columns(
+            pl.DataFrame(z, schema=self.signals, orient='row'))
+        self.composite = wide.select(
+            'date', composite=pl.Series(self._composite(z)))
+        return self
+
+    def update(self, port):
+        """
+        Appends months later than the last fitted date, one row each.
+
+        `port` can be a fresh dl_port download or just the new rows;
+        months already in the history are ignored, so nothing is
+        recomputed.
+        """
+
+        last = self.composite.get_column('date').max()
+        wide = self._ls_wide(
+            _to_lazy(port).filter(
+                pl.col('date') > last,
+                pl.col('signalname').is_in(self.signals)))
+        wide = wide.select(
+            'date',
+            *[pl.col(i) if i in wide.columns
+              else pl.lit(None, dtype=pl.Float64).alias(i)
+              for i in self.signals])
+
+        for row in wide.iter_rows():
+            x = np.array(row[1:], dtype=np.float64)
+            valid = ~np.isnan(x)
+            # Welford update of the expanding moments
+            self._n += valid
+            delta = np.where(valid, x - self._mean, 0)
+            self._mean += np.where(valid, delta / np.maximum(self._n, 1), 0)
+            self._m2 += np.where(valid, delta * (x - self._mean), 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = (x - self._mean) / np.sqrt(self._m2 / (self._n - 1))
+            z[(self._n < self.min_periods) | ~valid] = np.nan
+
+            self.zscore = self.zscore.vstack(
+                pl.DataFrame([[row[0]], *[[i] for i in z]],
+                             schema=self.zscore.schema, orient='col'))
+            self.composite = self.composite.vstack(
+                pl.DataFrame({'date': [row[0]],
+                              'composite': [self._composite(z)]},
+                             schema=self.composite.schema))
+        return self
@@ -0,0 +1,195 @@
+import numpy as np
+import polars as pl
+from concurrent.futures import ThreadPoolExecutor
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+def _month_index(lf, date):
+    # Consecutive integer per calendar month, for yyyymm or date columns
+    if lf.collect_schema()[date].is_integer():
+        return (pl.col(date) // 100) * 12 + pl.col(date) % 100
+    return pl.col(date).dt.year().cast(pl.Int32) * 12 + pl.col(date).dt.month()
+
+
+def forward_returns(df, horizons=(1, 3, 6), ret='ret', date='yyyymm',
+                    df_backend='polars'):
+    """
+    Adds forward returns ret_{h}m_fwd for every horizon in one sorted pass.
+
+    The h-month forward return is the sum of ret over months t+1 to t+h,
+    as in personal_ref/minh.ipynb. It is computed as a difference of one
+    cumulative sum over the sorted panel, and is null unless the permno has
+    all h following months, so gaps in the panel never bridge months.
+    """
+
+    _check_backend(df_backend)
+    lf = _to_lazy(df)
+    month = _month_index(lf, date)
+    # On the sorted panel a plain shift stays within the permno as long as
+    # the permno h rows ahead is the same and the months are consecutive
+    res = (
+        lf.sort('permno', date)
+        .with_columns(
+            _m=month,
+            _cs=pl.col(ret).fill_null(0).cum_sum(),
+            _n=pl.col(ret).is_not_null().cum_sum())
+        .with_columns(
+            pl.when(
+                (pl.col('permno').shift(-h) == pl.col('permno')) &
+                (pl.col('_m').shift(-h) == pl.col('_m') + h) &
+                (pl.col('_n').shift(-h) == pl.col('_n') + h))
+            .then(pl.col('_cs').shift(-h) - pl.col('_cs'))
+            .alias(f'ret_{h}m_fwd')
+            for h in horizons)
+        .drop('_m', '_cs', '_n')
+    )
+    if isinstance(df, pl.LazyFrame):
+        return res
+    return _convert_to_backend(res.collect(), df_backend)
+
+
+def _spearman_ic(lf, predictor, horizons, date):
+    # Re-ranks every signal-horizon pair on its common stocks
+    exprs = []
+    for s in predictor:
+        for h in horizons:
+            f = f'ret_{h}m_fwd'
+            valid = pl.col(s).is_not_null() & pl.col(f).is_not_null()
+            exprs += [
+                pl.corr(
+                    pl.col(s).filter(valid), pl.col(f).filter(valid),
+                    method='spearman').alias(f'{s}|{h}'),
+                valid.sum().alias(f'{s}|{h}|n')]
+
+    wide = lf.group_by(date).agg(exprs).sort(date).collect()
+    shape = (len(wide), len(predictor), len(horizons))
+    keys = [f'{s}|{h}' for s in predictor for h in horizons]
+    ic = wide.select(keys).to_numpy().reshape(shape)
+    nobs = wide.select([f'{i}|n' for i in keys]).to_numpy().reshape(shape)
+    return wide.get_column(date), ic, nobs
+
+
+def _month_ic(xx, yy):
+    """
+    Pairwise-complete correlations of all signal and return columns.
+
+    Built from the sufficient statistics n, sum x, sum y, sum xy, sum x^2
+    and sum y^2 over common stocks, each a single matrix product.
+    """
+
+    mx, my = ~np.isnan(xx), ~np.isnan(yy)
+    x0, y0 = np.where(mx, xx, 0), np.where(my, yy, 0)
+    mx, my = mx.astype(np.float64), my.astype(np.float64)
+    n = mx.T @ my
+    sx, sy = x0.T @ my, mx.T @ y0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = x0.T @ y0 - sx * sy / n
+        vx = (x0 ** 2).T @ my - sx ** 2 / n
+        vy = mx.T @ (y0 ** 2) - sy ** 2 / n
+        return cov / np.sqrt(vx * vy), n
+
+
+def _rank_ic(lf, predictor, horizons, date, n_jobs):
+    fwd = [f'ret_{h}m_fwd' for h in horizons]
+    data = (
+        lf.select(date, *predictor, *fwd)
+        .with_columns(pl.col(*predictor, *fwd).rank().over(date))
+        .sort(date)
+        .collect()
+    )
+    dates = data.get_column(date)
+    start = np.flatnonzero(np.r_[True, (dates[1:] != dates[:-1]).to_numpy()])
+    length = np.diff(np.r_[start, len(data)])
+
+    def _month(i):
+        month = data.slice(start[i], length[i])
+        return _month_ic(
+            month.select(predictor).to_numpy().astype(np.float64),
+            month.select(fwd).to_numpy().astype(np.float64))
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        res = list(pool.map(_month, range(len(start))))
+    shape = (len(start), len(predictor), len(horizons))
+    ic = np.array([i[0] for i in res]).reshape(shape)
+    nobs = np.array([i[1] for i in res]).reshape(shape)
+    return dates.gather(start), ic, nobs
+
+
+def ic_series(df, predictor, horizons=(1, 3, 6), ret='ret', date='yyyymm',
+              min_obs=10, exact=False, n_jobs=1, df_backend='polars'):
+    """
+    Monthly rank IC of every signal with forward returns at each horizon.
+
+    Signals and forward returns are ranked once per month over their own
+    available values, and the IC is the correlation of these average ranks
+    over the stocks where both are observed, for all signal x horizon
+    pairs from matrix products with months spread over `n_jobs` threads.
+    This is an approximation: it equals the Spearman IC (scipy's spearmanr
+    on the pair) only where the signal and the return are observed for
+    the same stocks. With missing values on one side only, the ranks are
+    not those of the common stocks. `exact=True` re-ranks every pair on
+    its common stocks, which is exact but about ten times slower. Returns
+    signal, horizon, date, ic and nobs.
+    """
+
+    _check_backend(df_backend)
+    lf = forward_returns(
+        _to_lazy(df).select('permno', date, ret, *predictor),
+        horizons, ret, date)
+
+    if exact:
+        dates, ic, nobs = _spearman_ic(lf, predictor, horizons, date)
+    else:
+        dates, ic, nobs = _rank_ic(lf, predictor, horizons, date, n_jobs)
+
+    n_month, n_signal, n_horizon = ic.shape
+    ic = np.where(nobs >= min_obs, ic, np.nan).transpose(1, 2, 0)
+    nobs = nobs.transpose(1, 2, 0)
+    res = (
+        pl.DataFrame({
+            'signal': np.repeat(predictor, n_horizon * n_month),
+            'horizon': np.tile(np.repeat(horizons, n_month), n_signal),
+            'ic': ic.ravel(),
+            'nobs': nobs.ravel()})
+        .select(
+            'signal',
+            pl.col('horizon').cast(pl.Int32),
+            pl.concat([dates] * n_signal * n_horizon).alias(date),
+            pl.col('ic').fill_nan(None),
+            pl.col('nobs').cast(pl.Int64))
+    )
+    return _convert_to_backend(res, df_backend)
+
+
+def signal_decay(df, predictor, horizons=(1, 3, 6), ret='ret', date='yyyymm',
+                 min_obs=10, exact=False, n_jobs=1, df_backend='polars'):
+    """
+    Signal decay table in the layout of dashboard_ref/decay.csv.
+
+    One row per signal with the time-series mean and standard deviation of
+    the monthly rank IC at each horizon, plus IC_avg across horizons. The
+    IC is approximate unless `exact=True`; see ic_series.
+    """
+
+    _check_backend(df_backend)
+    ic = ic_series(
+        df, predictor, horizons, ret, date, min_obs, exact, n_jobs, 'polars')
+    stats = (
+        ic.group_by('signal', 'horizon')
+        .agg(
+            mean=pl.col('ic').mean(),
+            std=pl.col('ic').std(ddof=0))
+    )
+    res = (
+        stats.pivot(on='horizon', index='signal', values=['mean', 'std'])
+        .select(
+            pl.col('signal').alias('Signal'),
+            *[pl.col(f'mean_{h}').alias(f'IC_{h}m_mean') for h in horizons],
+            *[pl.col(f'std_{h}').alias(f'IC_{h}m_std') for h in horizons])
+        .with_columns(
+            IC_avg=pl.mean_horizontal(
+                [f'IC_{h}m_mean' for h in horizons]))
+        .sort(pl.col('Signal').replace_strict(
+            list(predictor), list(range(len(predictor)))))
+    )
+    return _convert_to_backend(res, df_backend)
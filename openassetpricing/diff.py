@@ -0,0 +1,126 @@
+import json
+import os
+import polars as pl
+from .cache import (
+    cache_path, write_cache, scan_cache, _conform,
+    _delta_meta_path)
+
+
+def _key(names):
+    # Signal panels are grouped by month, portfolio files by signal
+    return 'yyyymm' if 'yyyymm' in names else 'signalname'
+
+
+def _date(names):
+    return 'yyyymm' if 'yyyymm' in names else 'date'
+
+
+def _group_hashes(lf, key):
+    # Order-free hash of each group: wrapping sum of its row hashes
+    return (
+        lf.group_by(key)
+        .agg(
+            _hash=pl.struct(pl.exclude(key)).hash(0).sum(),
+            _rows=pl.len())
+    )
+
+
+def diff_releases(cache_dir, old, new, data_name):
+    """
+    Compares one dataset between two cached releases.
+
+    Rows are grouped by month (signal panels) or by signal (portfolio
+    files) and every group is hashed, so changed groups are found without
+    comparing rows. Returns a dict with the columns and signals added and
+    removed, the date range of both releases, the number of rows in new or
+    changed groups, and `groups`: one row per group with its status
+    ('added', 'removed', 'changed' or 'same') and row counts.
+    """
+
+    lf_old = scan_cache(cache_dir, old, data_name)
+    lf_new = scan_cache(cache_dir, new, data_name)
+    schema = lf_new.collect_schema()
+    old_names = lf_old.collect_schema().names()
+    key, date = _key(schema.names()), _date(schema.names())
+
+    groups = (
+        _group_hashes(_conform(lf_old, schema), key)
+        .join(_group_hashes(lf_new, key), on=key, how='full',
+              coalesce=True, suffix='_new')
+        .select(
+            key,
+            pl.when(pl.col('_rows').is_null()).then(pl.lit('added'))
+            .when(pl.col('_rows_new').is_null()).then(pl.lit('removed'))
+            .when(pl.col('_hash') != pl.col('_hash_new'))
+            .then(pl.lit('changed'))
+            .otherwise(pl.lit('same')).alias('status'),
+            pl.col('_rows').fill_null(0).alias('rows_old'),
+            pl.col('_rows_new').fill_null(0).alias('rows_new'))
+        .sort(key)
+        .collect()
+    )
+
+    res = {
+        'columns_added': [i for i in schema.names() if i not in old_names],
+        'columns_removed': [i for i in old_names if i not in schema],
+    }
+    if key == 'signalname':
+        res['signals_added'] = (
+            groups.filter(pl.col('status') == 'added')
+            .get_column(key).to_list())
+        res['signals_removed'] = (
+            groups.filter(pl.col('status') == 'removed')
+            .get_column(key).to_list())
+    else:
+        res['signals_added'] = [
+            i for i in res['columns_added'] if i not in ['permno', key]]
+        res['signals_removed'] = [
+            i for i in res['columns_removed'] if i not in ['permno', key]]
+    res['date_range'] = {
+        i: lf.select(pl.col(date).min().alias('min'),
+                     pl.col(date).max().alias('max')).collect().row(0)
+        for i, lf in [(old, lf_old), (new, lf_new)]}
+    res['rows_changed'] = (
+        groups.filter(pl.col('status').is_in(['added', 'changed']))
+        .get_column('rows_new').sum())
+    res['groups'] = groups
+    return res
+
+
+def upgrade_cache(openap, old, data_name, keep_full=False):
+    """
+    Moves a cached dataset from release `old` to the release of `openap`.
+
+    The new release is fetched, diffed against the old one by hashed
+    groups, and stored as a delta: only the added and changed groups,
+    plus a note of which groups replace the old ones. scan_cache
+    rebuilds the full dataset from both. A dataset already stored as a
+    delta is left as is. Returns the diff.
+    """
+
+    cache_dir, new = openap.cache_dir, openap.release
+    # Drive data only, streamed to the cache: no WRDS login
+    openap._ensure_cached(data_name)
+
+    res = diff_releases(cache_dir, old, new, data_name)
+    if keep_full or os.path.exists(
+            _delta_meta_path(cache_dir, new, data_name)):
+        return res
+
+    groups = res['groups']
+    key = groups.columns[0]
+    replaced = (
+        groups.filter(pl.col('status') != 'same').get_column(key).to_list())
+    delta = (
+        scan_cache(cache_dir, new, data_name)
+        .filter(pl.col(key).is_in(replaced))
+    )
+    write_cache(delta, cache_dir, new, f'{data_name}.delta')
+    with open(_delta_meta_path(cache_dir, new, data_name), 'w') as f:
+        json.dump({
+            'base': old, 'key': key, 'replaced': replaced,
+            'sort': ['permno', 'yyyymm'] if key == 'yyyymm'
+            else ['signalname', 'port', 'date']}, f)
+    if os.path.exists(cache_path(cache_dir, new, data_name)):
+        os.remove(cache_path(cache_dir, new, data_name))
+    return res
@@ -0,0 +1,133 @@
+from itertools import combinations
+import polars as pl
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+# A feature is name -> (kind, inputs, parameter); inputs may be signals or
+# other features
+def interactions(signals):
+    """Pairwise products a_x_b of the signals."""
+
+    return {f'{a}_x_{b}': ('product', (a, b), None)
+            for a, b in combinations(signals, 2)}
+
+
+def squares(signals):
+    """Squares s_sq of the signals."""
+
+    return {f'{i}_sq': ('product', (i, i), None) for i in signals}
+
+
+def ratios(pairs):
+    """Ratios a_over_b for (a, b) pairs; null where b is zero."""
+
+    return {f'{a}_over_{b}': ('ratio', (a, b), None) for a, b in pairs}
+
+
+def lags(signals, lags=(1,)):
+    """Values of the same permno `k` rows earlier, named s_lag{k}."""
+
+    return {f'{i}_lag{k}': ('lag', (i,), k) for i in signals for k in lags}
+
+
+def moving_averages(signals, windows=(3, 6)):
+    """
+    Rolling means over the permno's last `w` rows, named s_MA{w} as in
+    best_model_10_random_good.ipynb (min_periods=1).
+    """
+
+    return {f'{i}_MA{w}': ('ma', (i,), w) for i in signals for w in windows}
+
+
+def ranks(signals):
+    """Monthly cross-sectional percentile ranks, named s_rank."""
+
+    return {f'{i}_rank': ('rank', (i,), None) for i in signals}
+
+
+def top_signals(importance, k=20):
+    """The `k` most important features of a Feature, Importance table."""
+
+    return (
+        _to_lazy(importance)
+        .sort('Importance', descending=True)
+        .head(k)
+        .collect()
+        .get_column('Feature').to_list()
+    )
+
+
+def _expr(kind, inputs, param, date):
+    a = pl.col(inputs[0])
+    if kind == 'product':
+        # Squares reuse the same column expression
+        return a * a if inputs[0] == inputs[1] else a * pl.col(inputs[1])
+    if kind == 'ratio':
+        b = pl.col(inputs[1])
+        return pl.when(b != 0).then(a / b)
+    if kind == 'lag':
+        return a.shift(param).over('permno')
+    if kind == 'ma':
+        return a.rolling_mean(param, min_samples=1).over('permno')
+    if kind == 'rank':
+        return a.rank().over(date) / a.count().over(date)
+    raise ValueError(f'Unsupported feature kind: {kind}.')
+
+
+def _levels(specs, columns):
+    """Groups features so each only uses columns of earlier groups."""
+
+    level = {}
+
+    def _level(name):
+        if name in columns:
+            return -1
+        if name not in specs:
+            raise ValueError(f'{name} is neither a column nor a feature.')
+        if name not in level:
+            level[name] = 1 + max(_level(i) for i in specs[name][1])
+        return level[name]
+
+    for name in specs:
+        _level(name)
+    groups = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for name, i in level.items():
+        groups[i].append(name)
+    return groups
+
+
+def build_features(df, *features, date='yyyymm', keep=True,
+                   df_backend='polars'):
+    """
+    Adds engineered features to a permno-yyyymm signal panel.
+
+    `features` are dicts from interactions, squares, ratios, lags,
+    moving_averages and ranks. Features declared more than once are
+    computed once, and all features are compiled into one lazy plan with
+    one with_columns per dependency level, so polars can share common
+    subexpressions. Products and ratios are row-wise and stream. Lags and
+    moving averages sort the panel by permno and date, and they and ranks
+    are window expressions (one per feature) over permno or date, which
+    need the full panel in memory. With `keep=False` only permno, date and
+    the features are returned. A LazyFrame in gives a LazyFrame out, which
+    can be sunk to disk.
+    """
+
+    _check_backend(df_backend)
+    specs = {}
+    for i in features:
+        specs.update(i)
+
+    lf = _to_lazy(df)
+    columns = lf.collect_schema().names()
+    if any(kind in ['lag', 'ma'] for kind, _, _ in specs.values()):
+        lf = lf.sort('permno', date)
+    for group in _levels(specs, columns):
+        lf = lf.with_columns(
+            _expr(*specs[name], date).alias(name) for name in group)
+    if not keep:
+        lf = lf.select('permno', date, *specs)
+
+    if isinstance(df, pl.LazyFrame):
+        return lf
+    return _convert_to_backend(lf.collect(engine='streaming'), df_backend)
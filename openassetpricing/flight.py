@@ -0,0 +1,49 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs a function once per key for all callers that ask at the same time.
+
+    The first caller of a key runs it; callers of the same key arriving
+    before it returns wait and get the same result (or exception). The key
+    is forgotten once the call returns, so later callers run it again:
+    this coalesces concurrent work, it does not cache. Safe to share
+    between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args):
+        """Returns fn(*args) and whether it came from another caller's call."""
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -7,6 +7,7 @@ import requests
 import urllib
 import itertools
 import json
+import os
 import os.path as osp
 import re
 import warnings
@@ -16,6 +17,10 @@ import polars as pl
 
 MAX_NUMBER_FILES = 50
 
+# Host of the Drive pages and downloads; tests/bench points it to a local
+# fake server
+DRIVE_URL = os.environ.get("OAP_DRIVE_URL", "https://drive.google.com")
+
 class FileURLRetrievalError(Exception):
     pass
 
@@ -31,6 +36,9 @@ class _GoogleDriveFile(object):
     def is_folder(self):
         return self.type == self.TYPE_FOLDER
 
+def _folder_url(folder_id):
+    return DRIVE_URL + "/drive/folders/" + folder_id
+
 def _get_session():
     sess = requests.session()
     # We need to use different user agent for folder download c.f., file
@@ -118,11 +126,43 @@ def _download_and_parse_google_drive_link(sess, url):
         else:
             child = _download_and_parse_google_drive_link(
                 sess=sess,
-                url="https://drive.google.com/drive/folders/" + child_id)
+                url=_folder_url(child_id))
             gdrive_file.children.append(child)
 
     return gdrive_file
 
+def _list_folder(sess, url):
+    """Children of a Google Drive folder as (id, name, type) tuples."""
+
+    for _ in range(2):
+        url += "&hl=en" if "?" in url else "?hl=en"
+        res = sess.get(url, verify=True)
+        url = res.url
+
+    _, id_name_type_iter = _parse_google_drive_file(url=url, content=res.text)
+    return id_name_type_iter
+
+def _get_file_size(sess, url):
+    """
+    Size in bytes of a Google Drive file, or None if it cannot be told.
+
+    Small files answer a HEAD request with their Content-Length. Files too
+    large for the virus scan answer with a confirmation page that only
+    states a rounded size, e.g. (1.2G), which is returned instead.
+    """
+
+    res = sess.head(url, allow_redirects=True, verify=True)
+    length = res.headers.get("Content-Length")
+    if "text/html" not in res.headers.get("Content-Type", "") and length:
+        return int(length)
+
+    res = sess.get(url, verify=True)
+    m = re.search(r"\((\d+(?:\.\d+)?)([KMGT])\)", res.text)
+    if m is None:
+        return None
+    unit = 1024 ** ("KMGT".index(m.group(2)) + 1)
+    return int(float(m.group(1)) * unit)
+
 def _get_individual_signal_folder_id(sess, url):
     """
     Recursively searches for a folder named 'Predictors' and returns its ID.
@@ -145,7 +185,7 @@ def _get_individual_signal_folder_id(sess, url):
         if child_type == _GoogleDriveFile.TYPE_FOLDER:
             result = _get_individual_signal_folder_id(
                 sess=sess,
-                url="https://drive.google.com/drive/folders/" + child_id
+                url=_folder_url(child_id)
             )
             if result:
                 return result
@@ -209,7 +249,7 @@ def _get_name_id_map(url):
     sess = _get_session()
     gdrive_file = _download_and_parse_google_drive_link(sess, url=url)
     directory_structure = _get_directory_structure(gdrive_file)
-    url_prefix = 'https://drive.google.com/uc?id='
+    url_prefix = DRIVE_URL + '/uc?id='
     datasets_map = {
         'SignalDoc.csv': 'signal_doc',
         'PredictorPortsFull.csv': 'op',
@@ -263,18 +303,18 @@ def _get_name_id_map(url):
 
     # Individual signals
     signal_folder_id = _get_individual_signal_folder_id(sess, url)
-    signal_folder_url = f'https://drive.google.com/embeddedfolderview?id={signal_folder_id}'
+    signal_folder_url = f'{DRIVE_URL}/embeddedfolderview?id={signal_folder_id}'
     signal_response = requests.get(signal_folder_url)
     signal_text = str(signal_response.content)
 
     signal_file_name = r'<div class="flip-entry-title">(.*?).csv</div>'
-    signal_file_id = r'https://drive\.google\.com/file/d/([-\w]{25,})/view\?usp=drive_web'
+    signal_file_id = r'/file/d/([-\w]{25,})/view\?usp=drive_web'
     signal_matches = {
         'signal': re.findall(signal_file_name, signal_text),
         'file_id': re.findall(signal_file_id, signal_text)}
     df_signal = (
         pl.DataFrame(signal_matches)
-        .with_columns(file_id='https://drive.google.com/uc?id='+pl.col('file_id'))
+        .with_columns(file_id=url_prefix+pl.col('file_id'))
     )
     return df, df_signal
 
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+import polars as pl
+from concurrent.futures import ProcessPoolExecutor
+from .utils import _check_backend, _chunk_list, _convert_to_backend
+
+
+# Feature matrix and model as seen by a worker process
+_WORKER = {}
+
+
+def _init_worker(path, model):
+    _WORKER['x'] = np.load(path, mmap_mode='r')
+    _WORKER['model'] = pickle.loads(model)
+
+
+def _score(model, xx, yy, scoring):
+    if scoring is None:
+        return model.score(xx, yy)
+    return scoring(yy, model.predict(xx))
+
+
+def _permute_fold(fold, rows, yy, features, n_repeats, seed, scoring):
+    # Copies only the sampled rows of the fold; each feature is permuted in
+    # place and restored, with a generator seeded by (seed, fold, feature)
+    model = _WORKER['model']
+    xx = np.array(_WORKER['x'][rows], dtype=np.float32)
+    base = _score(model, xx, yy, scoring)
+    res = []
+    for j in features:
+        rng = np.random.default_rng([seed, fold, j])
+        orig = xx[:, j].copy()
+        drop = []
+        for _ in range(n_repeats):
+            xx[:, j] = orig[rng.permutation(len(orig))]
+            drop.append(base - _score(model, xx, yy, scoring))
+        xx[:, j] = orig
+        res.append((j, drop))
+    return res
+
+
+def _cache_key(model, data_version, params):
+    h = hashlib.sha256(pickle.dumps(model))
+    h.update(repr((data_version, params)).encode())
+    return h.hexdigest()[:16]
+
+
+def _data_version(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _array_version(a):
+    # Content digest, for arrays that have no file of their own
+    a = np.ascontiguousarray(a)
+    return (a.shape, a.dtype.str, hashlib.sha256(a).hexdigest())
+
+
+def permutation_importance(model, xx, y, columns=None, n_repeats=5,
+                           n_folds=4, max_rows=10_000, n_jobs=None, seed=42,
+                           scoring=None, cache_dir=None, data_version=None,
+                           df_backend='polars'):
+    """
+    Permutation importance of a fitted model on a memory-mapped matrix.
+
+    `xx` is the path of a .npy feature matrix (e.g. from feature_matrix,
+    matrix.export_matrix or OpenAP.export_signals), a memmap of one, or an
+    array, which is written to a temporary file first. Rows are split into `n_folds` contiguous folds
+    and each fold is sampled down to `max_rows` rows. Every feature is
+    permuted `n_repeats` times per fold; the importance is the drop in
+    `model.score`, or in `scoring(y, pred)` where higher is better,
+    averaged over folds and repeats. Fold x feature chunks run in a process
+    pool of `n_jobs` workers that map the matrix read-only. All randomness
+    derives from `seed`, so the result does not depend on `n_jobs`.
+
+    With `cache_dir` the result is stored as parquet, keyed by the hash of
+    the pickled model, `data_version` (by default the path, size and
+    modification time of the matrix file, or the shape, dtype and content
+    digest of an array), the target and the parameters, and read back on
+    later calls. Returns Feature, Importance and Std, sorted as in
+    dashboard_ref/orig_importance.csv.
+    """
+
+    _check_backend(df_backend)
+    tmpdir = None
+    if isinstance(xx, np.memmap) and xx.filename is not None:
+        path = xx.filename
+    elif isinstance(xx, (str, os.PathLike)):
+        path = os.fspath(xx)
+    else:
+        xx = np.asarray(xx, dtype=np.float32)
+        if cache_dir is not None and data_version is None:
+            # The temporary file is new on every call
+            data_version = _array_version(xx)
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'features.npy')
+        np.save(path, xx)
+
+    try:
+        shape = np.load(path, mmap_mode='r').shape
+        columns = list(columns) if columns is not None else [
+            f'x{i}' for i in range(shape[1])]
+        yy = np.asarray(y, dtype=np.float64)
+
+        cache_path = None
+        if cache_dir is not None:
+            if data_version is None:
+                data_version = _data_version(path)
+            key = _cache_key(
+                model, data_version,
+                (_array_version(yy), columns, n_repeats, n_folds, max_rows,
+                 seed, getattr(scoring, '__name__', scoring)))
+            cache_path = os.path.join(cache_dir, f'importance_{key}.parquet')
+            if os.path.exists(cache_path):
+                return _convert_to_backend(
+                    pl.read_parquet(cache_path), df_backend)
+
+        n_jobs = n_jobs or os.cpu_count()
+        bounds = np.linspace(0, shape[0], n_folds + 1).astype(np.int64)
+        chunks = _chunk_list(
+            list(range(len(columns))),
+            max(1, -(-n_jobs // n_folds)))
+        tasks = []
+        for fold in range(n_folds):
+            lo, hi = bounds[fold], bounds[fold + 1]
+            rng = np.random.default_rng([seed, fold])
+            rows = np.arange(lo, hi)
+            if max_rows and hi - lo > max_rows:
+                rows = np.sort(rng.choice(rows, max_rows, replace=False))
+            for features in chunks:
+                tasks.append(
+                    (fold, rows, yy[rows], features, n_repeats, seed,
+                     scoring))
+
+        model_bytes = pickle.dumps(model)
+        if n_jobs == 1:
+            _init_worker(path, model_bytes)
+            res = [_permute_fold(*i) for i in tasks]
+            _WORKER.clear()
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=n_jobs, initializer=_init_worker,
+                    initargs=(path, model_bytes)) as pool:
+                futures = [pool.submit(_permute_fold, *i) for i in tasks]
+                res = [i.result() for i in futures]
+    finally:
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    drops = [[] for _ in columns]
+    for chunk in res:
+        for j, drop in chunk:
+            drops[j] += drop
+    drops = np.array(drops)
+    out = (
+        pl.DataFrame({
+            'Feature': columns,
+            'Importance': drops.mean(axis=1),
+            'Std': drops.std(axis=1)})
+        .sort('Importance', descending=True)
+    )
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        out.write_parquet(cache_path)
+    return _convert_to_backend(out, df_backend)
@@ -0,0 +1,199 @@
+import contextlib
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import polars as pl
+from .utils import _check_backend, _convert_to_backend
+
+
+_PAGE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss():
+    """Resident memory of the process in bytes."""
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        # Windows: no cheap way to read it without psutil
+        return 0
+    # Peak so far where /proc is missing (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Sampler(threading.Thread):
+    # Polls the resident memory while stages run and keeps the peak of each
+    # open stage; Rust and C allocations of polars and pyarrow are
+    # invisible to tracemalloc
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self._peaks = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            rss = _rss()
+            with self._lock:
+                for k, v in self._peaks.items():
+                    self._peaks[k] = max(v, rss)
+
+    def add(self, key):
+        with self._lock:
+            self._peaks[key] = _rss()
+
+    def remove(self, key):
+        """Peak of the stage `key` and whether any stage is still open."""
+
+        with self._lock:
+            peak = max(self._peaks.pop(key), _rss())
+            return peak, bool(self._peaks)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class Instrument:
+    """
+    Collects the timing, bytes and memory of download stages.
+
+    Every stage (manifest, link, network, decompress, parse, cast, join,
+    sort, convert and the total of each download) becomes an event dict
+    with its stage, data_name, seconds, bytes and MB/s where bytes are
+    known, the resident memory at the start and the peak during the stage.
+    Events are kept in `events`, passed to every callback, written to
+    `logger` at INFO level (`logger=True` uses the openassetpricing
+    logger), and, with an OpenTelemetry-style `tracer`, recorded as spans
+    with the event as attributes. Stages nest: total covers its stages,
+    and a stage takes the data_name of the stage around it.
+    """
+
+    def __init__(self, callbacks=(), logger=None, tracer=None,
+                 sample_memory=True, interval=0.01):
+        self.callbacks = list(callbacks)
+        if logger is True:
+            logger = logging.getLogger('openassetpricing')
+        self.logger = logger
+        self.tracer = tracer
+        self.sample_memory = sample_memory
+        self.interval = interval
+        self.events = []
+        # Open stages of the current thread or asyncio task
+        self._open = contextvars.ContextVar('open', default=())
+        # One sampler thread while any stage is open, shared by nested and
+        # concurrent stages
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Copies sent to worker processes only collect their own events
+        state = self.__dict__.copy()
+        state.update(callbacks=[], tracer=None, events=[])
+        for i in ['_open', '_sampler', '_lock']:
+            del state[i]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open = contextvars.ContextVar('open', default=())
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    def _sample(self, key):
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = _Sampler(self.interval)
+                self._sampler.start()
+            self._sampler.add(key)
+
+    def _peak(self, key):
+        with self._lock:
+            sampler = self._sampler
+            peak, active = sampler.remove(key)
+            if not active:
+                self._sampler = None
+        if not active:
+            sampler.stop()
+        return peak
+
+    def add(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def reset(self):
+        self.events = []
+
+    @contextlib.contextmanager
+    def span(self, stage, **attrs):
+        """
+        Times the block as one stage. The block may add to the yielded
+        dict, e.g. the `bytes` it read.
+        """
+
+        event = {'stage': stage, **attrs}
+        parents = self._open.get()
+        if parents:
+            event.setdefault('data_name', parents[-1].get('data_name'))
+            event['parent'] = parents[-1]['stage']
+        token = self._open.set(parents + (event,))
+        otel = (
+            self.tracer.start_as_current_span(stage)
+            if self.tracer is not None else contextlib.nullcontext())
+        with otel as otel_span:
+            event['rss_start'] = _rss()
+            if self.sample_memory:
+                self._sample(id(event))
+            start = time.perf_counter()
+            try:
+                yield event
+            finally:
+                self._open.reset(token)
+                event['seconds'] = time.perf_counter() - start
+                event['peak_rss'] = (
+                    self._peak(id(event)) if self.sample_memory else _rss())
+                if event.get('bytes') is not None and event['seconds'] > 0:
+                    event['mb_per_s'] = (
+                        event['bytes'] / 1e6 / event['seconds'])
+                self._emit(event, otel_span)
+
+    def _emit(self, event, otel_span):
+        self.events.append(event)
+        for callback in self.callbacks:
+            callback(event)
+        if self.logger is not None:
+            self.logger.info(
+                '%s %s: %.2fs, peak %.0f MB%s', event['stage'],
+                event.get('data_name', ''), event['seconds'],
+                event['peak_rss'] / 1e6,
+                f", {event['mb_per_s']:.1f} MB/s" if 'mb_per_s' in event
+                else '')
+        if otel_span is not None:
+            for k, v in event.items():
+                if isinstance(v, (bool, int, float, str)):
+                    otel_span.set_attribute(f'oap.{k}', v)
+
+    def summary(self, df_backend='polars'):
+        """Events as a frame, in the order stages finished."""
+
+        _check_backend(df_backend)
+        df = pl.DataFrame(self.events, infer_schema_length=None)
+        return _convert_to_backend(df, df_backend)
+
+
+def _span(instrument, stage, **attrs):
+    """Stage of `instrument`, or a no-op when there is none."""
+
+    if instrument is None:
+        return contextlib.nullcontext(attrs)
+    return instrument.span(stage, **attrs)
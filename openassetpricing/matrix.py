@@ -0,0 +1,141 @@
+import json
+import os
+import numpy as np
+import polars as pl
+import pyarrow as pa
+from .utils import _to_lazy, _batches
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _fingerprint(lf, columns):
+    # Order-sensitive hash of the rows; u64 sums wrap around. Polars hashes
+    # may change between versions, which only costs a rewrite
+    n, h = lf.select(
+        pl.len(),
+        pl.struct(pl.int_range(pl.len()).alias('_row'), *columns)
+        .hash().sum()).collect().row(0)
+    return n, str(h)
+
+
+def _write_matrix(data, x, keys, path, n, batch_size, index_path=None):
+    """
+    Writes the `x` columns to a float32 .npy file in one pass over row
+    batches, with the (permno, yyyymm) index to `index_path` if given.
+    Returns the _fingerprint of the rows, summed batch by batch.
+    """
+
+    mm = np.lib.format.open_memmap(
+        path, mode='w+', dtype=np.float32, shape=(n, len(x)))
+    index = None
+    if index_path is not None:
+        index = np.lib.format.open_memmap(
+            index_path, mode='w+', dtype=np.int32, shape=(n, len(keys)))
+    h, offset = 0, 0
+    for batch in _batches(data, [*keys, *x], batch_size):
+        m = batch.num_rows
+        cols = [i.to_numpy(zero_copy_only=False) for i in batch.columns]
+        mm[offset:offset+m] = np.column_stack(cols[len(keys):])
+        if index is not None:
+            index[offset:offset+m] = np.column_stack(cols[:len(keys)])
+        h += pl.from_arrow(batch).select(
+            pl.struct(pl.int_range(offset, offset + m).alias('_row'),
+                      *keys, *x).hash().sum()).item()
+        offset += m
+    mm.flush()
+    del mm
+    if index is not None:
+        index.flush()
+        del index
+    return str(h % 2 ** 64)
+
+
+def _write_meta(path, x, n, fingerprint):
+    with open(_meta_path(path), 'w') as f:
+        json.dump(
+            {'columns': list(x), 'n_rows': n, 'fingerprint': fingerprint}, f)
+
+
+def feature_matrix(df, x, path, batch_size=500_000, overwrite=False):
+    """
+    Contiguous float32 feature matrix memory-mapped from a .npy file.
+
+    The `x` columns of `df` are written to `path` in row batches (streamed
+    for a LazyFrame), so the full matrix never has to fit in memory next
+    to the frame. If `path` already holds a matrix of the same columns
+    and rows, in the same order (checked with a hash of the rows, and of
+    permno and yyyymm where `df` has them), it is reused as is. With
+    `overwrite` the check is skipped and the hash is taken while writing.
+    Returns the read-only memmap; nulls are NaN.
+    """
+
+    lf = _to_lazy(df)
+    keys = [i for i in ['permno', 'yyyymm']
+            if i in lf.collect_schema().names() and i not in x]
+
+    meta_path = _meta_path(path)
+    if not overwrite and os.path.exists(path) and os.path.exists(meta_path):
+        n, fingerprint = _fingerprint(lf, [*keys, *x])
+        meta = {'columns': list(x), 'n_rows': n, 'fingerprint': fingerprint}
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return np.load(path, mmap_mode='r')
+    elif isinstance(df, pl.DataFrame):
+        n = len(df)
+    else:
+        # Metadata only for scanned Parquet
+        n = lf.select(pl.len()).collect().item()
+
+    data = df if isinstance(df, pl.DataFrame) else lf
+    fingerprint = _write_matrix(data, x, keys, path, n, batch_size)
+    _write_meta(path, x, n, fingerprint)
+    return np.load(path, mmap_mode='r')
+
+
+def _index_path(path):
+    return os.path.splitext(path)[0] + '_index.npy'
+
+
+def export_matrix(df, path, x=None, standardize=False, fill_null=None,
+                  format='npy', batch_size=500_000):
+    """
+    Exports a signal panel for ML workers that map it read-only.
+
+    `x` defaults to every column other than permno and yyyymm. Signals are
+    optionally standardized over the full panel and nulls filled with
+    `fill_null`, as in examples/ML_portfolio_example.ipynb. With
+    format='npy' the float32 matrix is written to `path` and the
+    (permno, yyyymm) row index to `<path>_index.npy`; both are returned as
+    memmaps; the matrix, the index and the feature_matrix hash are written
+    in one pass over row batches, after a count of the rows. With
+    format='ipc' the index and signals are streamed into one Arrow IPC
+    file, returned as a memory-mapped pyarrow Table.
+    """
+
+    if format not in ['npy', 'ipc']:
+        raise ValueError("Unsupported format. Choose 'npy' or 'ipc'.")
+
+    lf = _to_lazy(df)
+    if x is None:
+        x = [i for i in lf.collect_schema().names()
+             if i not in ['permno', 'yyyymm']]
+    lf = lf.select('permno', 'yyyymm', *x)
+    if standardize:
+        lf = lf.with_columns(
+            (pl.col(x) - pl.col(x).mean()) / pl.col(x).std())
+    if fill_null is not None:
+        lf = lf.with_columns(pl.col(x).fill_null(fill_null))
+    lf = lf.with_columns(pl.col(x).cast(pl.Float32))
+
+    if format == 'ipc':
+        lf.sink_ipc(path)
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+    n = lf.select(pl.len()).collect().item()
+    fingerprint = _write_matrix(
+        lf, x, ['permno', 'yyyymm'], path, n, batch_size, _index_path(path))
+    _write_meta(path, x, n, fingerprint)
+    return (np.load(path, mmap_mode='r'),
+            np.load(_index_path(path), mmap_mode='r'))
@@ -1,5 +1,11 @@
-from . import urls
-from .gdrive_parse import _get_name_id_map, _get_readable_link
+from .gdrive_parse import (
+    _get_name_id_map, _get_readable_link, _get_url_from_gdrive_confirmation)
+from .matrix import export_matrix
+from .cache import cache_path, is_cached, write_cache, scan_cache
+from .registry import ReleaseRegistry
+from .plan import plan_download
+from .instrument import _span
+from .flight import SingleFlight
 import polars as pl
 import pandas as pd
 import requests
@@ -7,35 +13,60 @@ from io import BytesIO
 from zipfile import ZipFile
 from tabulate import tabulate
 import wrds
-import re
+import os
+import shutil
+import tempfile
 import time
+import asyncio
+import functools
 
+try:
+    import httpx
+except ImportError:
+    # Without httpx, the async API fetches with requests in threads
+    httpx = None
 
-def list_release():
-    df = pl.DataFrame(
-        {'release':
-         [re.findall(r'release(\d+)_url', i)[0]
-          for i in dir(urls) if i.startswith('release')]}
-    )
+
+PORT_ALT_LIST = [
+    'deciles_ew', 'deciles_vw', 'ex_nyse_p20_me', 'nyse', 'ex_price5',
+    'quintiles_ew', 'quintiles_vw']
+# Files behind the Drive virus-scan confirmation page
+FILE_WITH_CONFIRM = ['firm_char', 'deciles_ew', 'deciles_vw']
+# Concurrent identical downloads of the process, from any OpenAP
+_FLIGHTS = SingleFlight()
+
+
+def list_release(registry=None):
+    registry = registry or ReleaseRegistry()
+    df = registry.releases().select('release', 'source')
     table = [i for i in df.iter_rows()]
-    headers = ['Release']
+    headers = ['Release', 'Source']
     print(tabulate(table, headers, tablefmt='simple_outline'))
 
 class OpenAP:
-    def __init__(self, release_year=None):
-        if not release_year:
-            release_url = getattr(urls, dir(urls)[-1], None)
-        if release_year:
-            release_url = getattr(urls, f'release{release_year}_url', None)
-
-        self.name_id_map, self.individual_signal_id_map = _get_name_id_map(release_url)
-        self.signal_sign = (
-            pl.read_csv(
-                self._get_url('signal_doc'), infer_schema_length=300,
-                columns=['Acronym', 'Sign'], null_values='NA')
-            .rename({'Acronym': 'signal', 'Sign': 'sign'})
-            .with_columns(pl.col('sign').cast(pl.Int8))
-        )
+    def __init__(self, release_year=None, cache_dir=None, registry=None,
+                 instrument=None):
+        # With a cache_dir, each dataset is downloaded once per release and
+        # read from Parquet afterwards
+        self.cache_dir = cache_dir
+        # An Instrument receives the timing and memory of every stage
+        self.instrument = instrument
+        with self._stage('manifest', data_name='release'):
+            # None or 'latest' resolves to the most recent known release
+            self.registry = registry or ReleaseRegistry(cache_dir=cache_dir)
+            self.release = self.registry.resolve(release_year)
+            release_url = self.registry.url(self.release)
+
+            self.name_id_map, self.individual_signal_id_map = _get_name_id_map(release_url)
+        url = self._get_url('signal_doc')
+        with self._stage('parse', data_name='signal_doc'):
+            self.signal_sign = (
+                pl.read_csv(
+                    url, infer_schema_length=300,
+                    columns=['Acronym', 'Sign'], null_values='NA')
+                .rename({'Acronym': 'signal', 'Sign': 'sign'})
+                .with_columns(pl.col('sign').cast(pl.Int8))
+            )
 
     def list_port(self):
         df = (
@@ -46,108 +77,142 @@ class OpenAP:
         headers = ['CZ portfolio file', 'Name for download']
         print(tabulate(table, headers, tablefmt='simple_outline'))
 
+    def _stage(self, stage, **attrs):
+        return _span(self.instrument, stage, **attrs)
+
     def _get_url(self, data_name):
-        data_header = self.name_id_map.filter(pl.col('download_name')==data_name)
-        file_with_confirm = ['firm_char', 'deciles_ew', 'deciles_vw']
-        if data_name in file_with_confirm:
-            self.url = _get_readable_link(data_header[0, 'file_id'])
-        else:
-            self.url = data_header[0, 'file_id']
+        with self._stage('link', data_name=data_name):
+            data_header = self.name_id_map.filter(pl.col('download_name')==data_name)
+            if len(data_header) == 0:
+                return None
+            if data_name in FILE_WITH_CONFIRM:
+                url = _get_readable_link(data_header[0, 'file_id'])
+            else:
+                url = data_header[0, 'file_id']
 
-        return self.url
+        return url
 
     def _get_individual_signal_url(self, signal_name):
         data_header = self.individual_signal_id_map.filter(pl.col('signal')==signal_name)
-        self.url = data_header[0, 'file_id']
-        return self.url
+        return data_header[0, 'file_id']
 
     def _zip_source(self, url):
         # Reading in chunks is 20% faster for large single file
         chunk_size = 1024 * 1024 * 10
-        source = requests.get(url, stream=True)
-        io_data = BytesIO()
-        for chunk in source.iter_content(chunk_size=chunk_size):
-            if chunk:
-                io_data.write(chunk)
+        with self._stage('network') as event:
+            source = requests.get(url, stream=True)
+            io_data = BytesIO()
+            for chunk in source.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    io_data.write(chunk)
+            event['bytes'] = io_data.tell()
 
         io_data.seek(0)
         zip_file = ZipFile(io_data)
         return zip_file
 
+    def _unzip(self, zip_file):
+        with self._stage('decompress') as event:
+            data = zip_file.read(zip_file.filelist[0])
+            event['bytes'] = len(data)
+        return data
+
+    def _fetch(self, url):
+        with self._stage('network') as event:
+            data = requests.get(url).content
+            event['bytes'] = len(data)
+        return data
+
+    def _source(self, data_name, source):
+        # Bytes fetched by the caller (e.g. the async API) or the url to get
+        if source is None:
+            source = self._get_url(data_name)
+            if not source:
+                raise ValueError('Dataset is not available.')
+        return source
+
+    def _csv_source(self, source):
+        if isinstance(source, bytes):
+            return source
+        return self._fetch(source)
+
+    def _zip_file(self, source):
+        if isinstance(source, bytes):
+            return ZipFile(BytesIO(source))
+        return self._zip_source(source)
+
+    def _shared(self, key, fn, *args):
+        """
+        Polars frame of fn(*args), computed once for all threads asking for
+        the same key of this release at the same time. Each caller gets a
+        clone: the Arrow buffers are shared and never written to.
+        """
+
+        df, _ = _FLIGHTS.do(
+            (self.registry.root_url, self.release, *key), fn, *args)
+        return df.clone()
+
     def _convert_to_backend(self, df, df_backend):
-        if df_backend == 'polars':
-            return df
-        if df_backend == 'pandas':
-            return df.to_pandas()
+        with self._stage('convert', backend=df_backend):
+            if df_backend == 'polars':
+                return df
+            if df_backend == 'pandas':
+                return df.to_pandas()
 
     def _port_indiv(self, df, predictor):
-        n_input = len(predictor)
+        # Lazy frames are filtered in the scan and checked after collecting
         df = df.filter(pl.col('signalname').is_in(predictor))
-        n = df['signalname'].n_unique()
-        if n != n_input:
-            print('One or more input predictors are not available.')
-
+        if isinstance(df, pl.DataFrame):
+            self._check_port_indiv(df, predictor)
         return df
 
-    def _dl_port_op(self, df_backend, predictor=None):
-        if not predictor:
-            df = (
-                pl.read_csv(
-                    self.url, null_values='NA',
-                    schema_overrides={'port': pl.String})
-                .with_columns(pl.col('date').str.to_date('%Y-%m-%d'))
-            )
+    def _check_port_indiv(self, df, predictor):
+        if df['signalname'].n_unique() != len(predictor):
+            print('One or more input predictors are not available.')
 
-        if predictor:
-            if type(predictor) is list:
-                df = (
-                    pl.read_csv(
-                        self.url, null_values='NA',
-                        schema_overrides={'port': pl.String})
-                    .with_columns(pl.col('date').str.to_date('%Y-%m-%d'))
-                )
-                df = self._port_indiv(df, predictor)
-            else:
-                print('Predictor must be a list')
+    def _read_port(self, data):
+        with self._stage('parse') as event:
+            event['bytes'] = len(data)
+            df = pl.read_csv(
+                data, null_values='NA', schema_overrides={'port': pl.String})
+        del data
+        with self._stage('cast'):
+            df = df.with_columns(pl.col('date').str.to_date('%Y-%m-%d'))
+        return df
 
-        df = df.sort('signalname', 'port', 'date')
-        return self._convert_to_backend(df, df_backend)
+    def _read_port_file(self, data_name, source):
+        # The whole file, sorted; predictors are selected by each caller
+        source = self._source(data_name, source)
+        if data_name == 'op':
+            df = self._read_port(self._csv_source(source))
+        else:
+            df = self._read_port(self._unzip(self._zip_file(source)))
+        with self._stage('sort'):
+            return df.sort('signalname', 'port', 'date')
 
-    def _dl_port_alt(self, df_backend, predictor=None):
-        if not predictor:
-            zip_file = self._zip_source(self.url)
-            df = (
-                pl.read_csv(
-                    zip_file.read(zip_file.filelist[0]), null_values='NA',
-                    schema_overrides={'port': pl.String})
-                .with_columns(pl.col('date').str.to_date('%Y-%m-%d'))
-            )
+    def _dl_port(self, data_name, df_backend, predictor=None, source=None):
+        df = self._shared(
+            (data_name,), self._read_port_file, data_name, source)
 
         if predictor:
             if type(predictor) is list:
-                zip_file = self._zip_source(self.url)
-                df = (
-                    pl.read_csv(
-                        zip_file.read(zip_file.filelist[0]), null_values='NA',
-                        schema_overrides={'port': pl.String})
-                    .with_columns(pl.col('date').str.to_date('%Y-%m-%d'))
-                )
+                # Filtering keeps the order
                 df = self._port_indiv(df, predictor)
             else:
                 print('Predictor must be a list')
 
-        df = df.sort('signalname', 'port', 'date')
         return self._convert_to_backend(df, df_backend)
 
     def _dl_signal_crsp3(self):
-        conn = wrds.Connection()
-
-        df = conn.raw_sql(
-            """
-            select permno, date, prc, ret, shrout
-            from crsp.msf
-            """, date_cols=['date']
-        )
+        with self._stage('crsp'):
+            conn = wrds.Connection()
+
+            df = conn.raw_sql(
+                """
+                select permno, date, prc, ret, shrout
+                from crsp.msf
+                """, date_cols=['date']
+            )
 
         # They are signed
         df = (
@@ -170,62 +235,127 @@ class OpenAP:
         )
         return df
 
-    def _dl_signal(self, df_backend, predictor=None):
+    def _dl_signal(self, df_backend, predictor=None, source=None):
+        key = tuple(predictor) if type(predictor) is list else predictor
+        df = self._shared(
+            ('firm_char', key), self._read_signal, predictor, source)
+        return self._convert_to_backend(df, df_backend)
+
+    def _read_signal_panel(self, source):
+        # The Drive panel alone, without the CRSP signals
+        zip_file = self._zip_file(self._source('firm_char', source))
+        del source
+        csv = self._unzip(zip_file)
+        with self._stage('parse') as event:
+            event['bytes'] = len(csv)
+            df = pl.read_csv(csv, infer_schema_length=0)
+        del csv
+        with self._stage('cast'):
+            return df.with_columns(
+                pl.col('permno', 'yyyymm').cast(pl.Int32),
+                pl.exclude('permno', 'yyyymm').cast(pl.Float64))
+
+    def _sink_signal_panel(self, source, path):
+        # The Drive panel streamed to Parquet: the csv is unzipped to disk
+        # and scanned in batches, so it is never held in memory
+        zip_file = self._zip_file(self._source('firm_char', source))
+        del source
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(path)) as tmp:
+            csv = os.path.join(tmp, 'panel.csv')
+            with self._stage('decompress') as event:
+                with zip_file.open(zip_file.filelist[0]) as f, \
+                        open(csv, 'wb') as out:
+                    shutil.copyfileobj(f, out, 1 << 24)
+                    event['bytes'] = out.tell()
+            del zip_file
+            with self._stage('parse') as event:
+                event['bytes'] = os.path.getsize(csv)
+                (
+                    pl.scan_csv(csv, infer_schema=False)
+                    .with_columns(
+                        pl.col('permno', 'yyyymm').cast(pl.Int32),
+                        pl.exclude('permno', 'yyyymm').cast(pl.Float64))
+                    .sink_parquet(path + '.tmp', row_group_size=100_000)
+                )
+        os.replace(path + '.tmp', path)
+
+    def _read_signal(self, predictor, source):
         if not predictor:
             temp = self._dl_signal_crsp3()
-            zip_file = self._zip_source(self.url)
-            df = (
-                pl.read_csv(
-                    zip_file.read(zip_file.filelist[0]), infer_schema_length=0)
-                .with_columns(
-                    pl.col('permno', 'yyyymm').cast(pl.Int32),
-                    pl.exclude('permno', 'yyyymm').cast(pl.Float64))
-                .join(temp, how='left', on=['permno', 'yyyymm'])
-            )
+            df = self._read_signal_panel(source)
+            del source
+            with self._stage('join'):
+                df = df.join(temp, how='left', on=['permno', 'yyyymm'])
 
         if predictor:
             crsp3 = {'Price', 'Size', 'STreversal'}
             ex_crsp3 = [i for i in predictor if i not in crsp3]
             if type(predictor) is list:
+                if len(ex_crsp3) > 0:
+                    source = self._source('firm_char', source)
                 try:
                     if crsp3 & set(predictor):
                         temp = self._dl_signal_crsp3()
 
                     if len(ex_crsp3) > 0:
-                        zip_file = self._zip_source(self.url)
-                        df = (
-                            pl.from_pandas(
-                                pd.read_csv(
-                                    zip_file.open(zip_file.filelist[0]),
-                                    usecols=['permno', 'yyyymm']+ex_crsp3,
-                                    engine='pyarrow')
+                        zip_file = self._zip_file(source)
+                        # Decompressed while parsing
+                        with self._stage('parse') as event:
+                            event['bytes'] = zip_file.filelist[0].file_size
+                            df = pd.read_csv(
+                                zip_file.open(zip_file.filelist[0]),
+                                usecols=['permno', 'yyyymm']+ex_crsp3,
+                                engine='pyarrow')
+                        with self._stage('cast'):
+                            df = (
+                                pl.from_pandas(df)
+                                .with_columns(
+                                    pl.col('permno', 'yyyymm').cast(pl.Int32))
                             )
-                            .with_columns(
-                                pl.col('permno', 'yyyymm').cast(pl.Int32))
-                        )
                         if len(ex_crsp3) < len(predictor):
-                            df = df.join(
-                                temp, how='left', on=['permno', 'yyyymm'])
+                            with self._stage('join'):
+                                df = df.join(
+                                    temp, how='left', on=['permno', 'yyyymm'])
                     else:
                         df = temp
 
-                    df = (
-                        df.select('permno', 'yyyymm', pl.col(predictor))
-                        .filter(
-                            pl.any_horizontal(pl.col(predictor)).is_not_null())
-                        .with_columns(
-                            pl.exclude('permno', 'yyyymm').cast(pl.Float64))
-                        .sort('permno', 'yyyymm')
-                    )
+                    with self._stage('cast'):
+                        df = (
+                            df.select('permno', 'yyyymm', pl.col(predictor))
+                            .filter(
+                                pl.any_horizontal(pl.col(predictor)).is_not_null())
+                            .with_columns(
+                                pl.exclude('permno', 'yyyymm').cast(pl.Float64))
+                        )
                 except:
                     print('One or more input predictors are not available.')
             else:
                 print('Predictor must be a list')
 
-        df = df.sort('permno', 'yyyymm')
-        return self._convert_to_backend(df, df_backend)
+        with self._stage('sort'):
+            return df.sort('permno', 'yyyymm')
+
+    def _read_individual_signal(self, signal_name, source):
+        url = self._get_individual_signal_url(signal_name)
+        # Fetched while parsing
+        with self._stage('parse', data_name=signal_name):
+            df = pl.read_csv(source if source is not None else url)
+        if len(df) > 0:
+            df = df.with_columns(pl.col('permno', 'yyyymm').cast(pl.Int32))
+        if len(df) == 0:
+            with self._stage('link', data_name=signal_name):
+                url = _get_readable_link(url)
+            with self._stage('parse', data_name=signal_name):
+                df = (
+                    pl.read_csv(url)
+                    .with_columns(pl.col('permno', 'yyyymm').cast(pl.Int32))
+                )
+        return df
 
-    def _dl_individual_signal(self, df_backend, predictor, signed=False):
+    def _dl_individual_signal(self, df_backend, predictor, signed=False,
+                              sources=None):
+        # `sources` maps signals to csv bytes fetched by the caller
         crsp3 = {'Price', 'Size', 'STreversal'}
         ex_crsp3 = [i for i in predictor if i not in crsp3]
         if type(predictor) is list:
@@ -245,18 +375,9 @@ class OpenAP:
                     df = pl.DataFrame(
                         schema={'permno': pl.Int32, 'yyyymm': pl.Int32})
                     for i in ex_crsp3:
-                        self.url = self._get_individual_signal_url(i)
-                        temp_signal = pl.read_csv(self.url)
-                        if len(temp_signal) > 0:
-                            temp_signal = temp_signal.with_columns(
-                                pl.col('permno', 'yyyymm').cast(pl.Int32))
-                        if len(temp_signal) == 0:
-                            self.url = _get_readable_link(self.url)
-                            temp_signal = (
-                                pl.read_csv(self.url)
-                                .with_columns(
-                                    pl.col('permno', 'yyyymm').cast(pl.Int32))
-                            )
+                        temp_signal = self._shared(
+                            ('signal', i), self._read_individual_signal, i,
+                            sources[i] if sources else None)
                         if signed:
                             _sign = (
                                 self.signal_sign.filter(pl.col('signal')==i)
@@ -265,29 +386,106 @@ class OpenAP:
                                 temp_signal = (
                                     temp_signal.with_columns(pl.col(i)*_sign))
 
-                        df = df.join(
-                            temp_signal, how='full', on=['permno', 'yyyymm'],
-                            coalesce=True)
+                        with self._stage('join', data_name=i):
+                            df = df.join(
+                                temp_signal, how='full',
+                                on=['permno', 'yyyymm'], coalesce=True)
                     if len(ex_crsp3) < len(predictor):
-                        df = df.join(
-                            temp, how='full', on=['permno', 'yyyymm'],
-                            coalesce=True)
+                        with self._stage('join'):
+                            df = df.join(
+                                temp, how='full', on=['permno', 'yyyymm'],
+                                coalesce=True)
                 else:
                     df = temp
 
-                df = (
-                    df.select('permno', 'yyyymm', pl.col(predictor))
-                    .filter(pl.any_horizontal(pl.col(predictor)).is_not_null())
-                    .with_columns(
-                        pl.exclude('permno', 'yyyymm').cast(pl.Float64))
-                    .sort('permno', 'yyyymm')
-                )
+                with self._stage('cast'):
+                    df = (
+                        df.select('permno', 'yyyymm', pl.col(predictor))
+                        .filter(pl.any_horizontal(pl.col(predictor)).is_not_null())
+                        .with_columns(
+                            pl.exclude('permno', 'yyyymm').cast(pl.Float64))
+                    )
             except:
                 print('One or more input predictors are not available.')
         else:
             print('Predictor must be a list')
 
-        df = df.sort('permno', 'yyyymm')
+        with self._stage('sort'):
+            df = df.sort('permno', 'yyyymm')
+        return self._convert_to_backend(df, df_backend)
+
+    def _fill_cache(self, data_name, source):
+        # Written by another thread since the caller looked
+        if is_cached(self.cache_dir, self.release, data_name):
+            return
+        if data_name == 'firm_char':
+            # CRSP signals need WRDS; they are joined when asked for
+            with self._stage('cache_write'):
+                self._sink_signal_panel(
+                    source,
+                    cache_path(self.cache_dir, self.release, data_name))
+            return
+        df = self._dl_port(data_name, 'polars', source=source)
+        del source
+        with self._stage('cache_write'):
+            write_cache(df, self.cache_dir, self.release, data_name)
+
+    def _ensure_cached(self, data_name, source=None):
+        # Drive data only: the CRSP signals are never cached
+        if not is_cached(self.cache_dir, self.release, data_name):
+            # Concurrent callers, whatever their predictors, wait for one
+            # download and write
+            _FLIGHTS.do(
+                ('cache', self.cache_dir, self.release, data_name),
+                self._fill_cache, data_name, source)
+
+    def _scan_signals(self, lf, predictor=None):
+        # The scanned Drive panel with the CRSP signals joined on and the
+        # predictor selected, still lazy
+        names = lf.collect_schema().names()
+        # Caches written by older versions hold the CRSP signals
+        crsp3 = [i for i in ['Price', 'Size', 'STreversal']
+                 if i not in names]
+        if predictor:
+            if not set(predictor) <= set(names) | set(crsp3):
+                print('One or more input predictors are not available.')
+                predictor = [
+                    i for i in predictor if i in names or i in crsp3]
+            crsp3 = [i for i in crsp3 if i in predictor]
+        if crsp3:
+            temp = self._dl_signal_crsp3().lazy()
+            if predictor and set(predictor) <= set(crsp3):
+                lf = temp
+            else:
+                lf = lf.join(
+                    temp.select('permno', 'yyyymm', *crsp3),
+                    how='left', on=['permno', 'yyyymm'])
+        if predictor:
+            lf = (
+                lf.select('permno', 'yyyymm', *predictor)
+                .filter(pl.any_horizontal(pl.col(predictor)).is_not_null())
+            )
+        return lf, predictor
+
+    def _dl_cached(self, data_name, df_backend, predictor=None, source=None):
+        self._ensure_cached(data_name, source)
+        lf = scan_cache(self.cache_dir, self.release, data_name)
+        if predictor and type(predictor) is not list:
+            print('Predictor must be a list')
+            predictor = None
+        if data_name == 'firm_char':
+            lf, predictor = self._scan_signals(lf, predictor)
+            with self._stage('cache_read'):
+                df = lf.sort('permno', 'yyyymm').collect()
+        else:
+            if predictor:
+                lf = self._port_indiv(lf, predictor)
+            with self._stage('cache_read'):
+                df = lf.collect()
+            if predictor:
+                self._check_port_indiv(df, predictor)
+            with self._stage('sort'):
+                df = df.sort('signalname', 'port', 'date')
         return self._convert_to_backend(df, df_backend)
 
     def _print_time(self, time_used):
@@ -298,22 +496,20 @@ class OpenAP:
 
     def dl_signal_doc(self, df_backend):
         url = self._get_url('signal_doc')
-        df = pl.read_csv(url, infer_schema_length=300)
+        with self._stage('parse', data_name='signal_doc'):
+            df = pl.read_csv(url, infer_schema_length=300)
         return self._convert_to_backend(df, df_backend)
 
     def dl_port(self, data_name, df_backend, predictor=None):
-        port_alt_list = [
-            'deciles_ew', 'deciles_vw', 'ex_nyse_p20_me', 'nyse', 'ex_price5',
-            'quintiles_ew', 'quintiles_vw']
-
         if df_backend in ['polars', 'pandas']:
-            self.url = self._get_url(data_name)
-            if self.url:
+            # The link is resolved with the download, once for all threads
+            if data_name == 'op' or data_name in PORT_ALT_LIST:
                 start_time = time.time()
-                if data_name == 'op':
-                    df = self._dl_port_op(df_backend, predictor)
-                if data_name in port_alt_list:
-                    df = self._dl_port_alt(df_backend, predictor)
+                with self._stage('total', data_name=data_name):
+                    if self.cache_dir is not None:
+                        df = self._dl_cached(data_name, df_backend, predictor)
+                    else:
+                        df = self._dl_port(data_name, df_backend, predictor)
 
                 end_time = time.time()
                 time_used = end_time - start_time
@@ -326,26 +522,220 @@ class OpenAP:
 
     def dl_all_signals(self, df_backend, predictor=None):
         if df_backend in ['polars', 'pandas']:
-            self.url = self._get_url('firm_char')
-            if self.url:
-                start_time = time.time()
-                df = self._dl_signal(df_backend, predictor)
-                end_time = time.time()
-                time_used = end_time - start_time
-                self._print_time(time_used)
-                return df
-            else:
-                raise ValueError('Dataset is not available.')
+            start_time = time.time()
+            with self._stage('total', data_name='firm_char'):
+                if self.cache_dir is not None:
+                    df = self._dl_cached('firm_char', df_backend, predictor)
+                else:
+                    df = self._dl_signal(df_backend, predictor)
+            end_time = time.time()
+            time_used = end_time - start_time
+            self._print_time(time_used)
+            return df
         else:
             raise ValueError("Unsupported backend. Choose 'polars' or 'pandas'.")
 
     def dl_signal(self, df_backend, predictor, signed=False):
         if df_backend in ['polars', 'pandas']:
             start_time = time.time()
-            df = self._dl_individual_signal(df_backend, predictor, signed)
+            with self._stage('total', data_name='signal'):
+                df = self._dl_individual_signal(df_backend, predictor, signed)
             end_time = time.time()
             time_used = end_time - start_time
             self._print_time(time_used)
             return df
         else:
             raise ValueError("Unsupported backend. Choose 'polars' or 'pandas'.")
+
+    def export_signals(self, path, predictor=None, standardize=False,
+                       fill_null=None, format='npy'):
+        """
+        Downloads the signal panel and writes it to a memory-mapped file.
+
+        The panel is streamed from the Parquet cache (filled first if
+        needed), or without `cache_dir` from the Drive csv unzipped to a
+        temporary directory next to `path`, so it is never held in memory.
+        Rows keep the order of the file; the index records it. See
+        export_matrix for the formats. Returns the read-only memmaps
+        (matrix, index) or the memory-mapped Arrow table.
+        """
+
+        if predictor and type(predictor) is not list:
+            print('Predictor must be a list')
+            predictor = None
+        with self._stage('total', data_name='firm_char'):
+            if self.cache_dir is not None:
+                self._ensure_cached('firm_char')
+                lf = scan_cache(self.cache_dir, self.release, 'firm_char')
+                lf, predictor = self._scan_signals(lf, predictor)
+                return export_matrix(
+                    lf, path, predictor, standardize, fill_null, format)
+            if predictor and set(predictor) <= {'Price', 'Size', 'STreversal'}:
+                # CRSP signals only: no Drive panel to stream
+                lf = pl.LazyFrame(
+                    schema={'permno': pl.Int32, 'yyyymm': pl.Int32})
+                lf, predictor = self._scan_signals(lf, predictor)
+                return export_matrix(
+                    lf, path, predictor, standardize, fill_null, format)
+            folder = os.path.dirname(os.path.abspath(path))
+            with tempfile.TemporaryDirectory(dir=folder) as tmp:
+                panel = os.path.join(tmp, 'firm_char.parquet')
+                self._sink_signal_panel(None, panel)
+                lf, predictor = self._scan_signals(
+                    pl.scan_parquet(panel), predictor)
+                return export_matrix(
+                    lf, path, predictor, standardize, fill_null, format)
+
+    def plan(self, data_name, predictor=None, bandwidth=10e6,
+             df_backend='polars'):
+        """Sizes, peak memory and fetch time of a download; see plan_download."""
+
+        return plan_download(
+            self, data_name, predictor, bandwidth, df_backend)
+
+    @classmethod
+    async def acreate(cls, release_year=None, cache_dir=None, registry=None,
+                      instrument=None):
+        """Builds an OpenAP in a thread, without blocking the event loop."""
+
+        return await asyncio.to_thread(
+            cls, release_year, cache_dir, registry, instrument)
+
+    def _aclient(self):
+        if httpx is None:
+            return _NoClient()
+        return httpx.AsyncClient(follow_redirects=True, timeout=None)
+
+    async def _arun(self, executor, fn, *args):
+        # Parsing runs in a thread, or in `executor` such as a process pool
+        if executor is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(fn, *args))
+
+    async def _aget(self, client, url, **attrs):
+        with self._stage('network', **attrs) as event:
+            res = await client.get(url)
+            res.raise_for_status()
+            event['bytes'] = len(res.content)
+        return res.content
+
+    async def _aget_url(self, client, data_name):
+        with self._stage('link', data_name=data_name):
+            data_header = self.name_id_map.filter(
+                pl.col('download_name')==data_name)
+            if len(data_header) == 0:
+                return None
+            url = data_header[0, 'file_id']
+            if data_name in FILE_WITH_CONFIRM:
+                page = await self._aget(client, url)
+                url = _get_url_from_gdrive_confirmation(
+                    page.decode('utf-8', 'ignore'))
+        return url
+
+    async def _aget_signal(self, client, signal_name):
+        data_header = self.individual_signal_id_map.filter(
+            pl.col('signal')==signal_name)
+        if len(data_header) == 0:
+            return None
+        data = await self._aget(
+            client, data_header[0, 'file_id'], data_name=signal_name)
+        if data.lstrip()[:1] == b'<':
+            # A confirmation page instead of the csv
+            url = _get_url_from_gdrive_confirmation(
+                data.decode('utf-8', 'ignore'))
+            data = await self._aget(client, url, data_name=signal_name)
+        return data
+
+    async def _adl(self, data_name, df_backend, predictor, executor, parse,
+                   drive=True):
+        if df_backend not in ['polars', 'pandas']:
+            raise ValueError(
+                "Unsupported backend. Choose 'polars' or 'pandas'.")
+        start_time = time.time()
+        with self._stage('total', data_name=data_name):
+            if not drive:
+                # Nothing to fetch from Drive or to cache
+                df = await self._arun(executor, parse, df_backend, predictor)
+            elif self.cache_dir is not None and is_cached(
+                    self.cache_dir, self.release, data_name):
+                df = await self._arun(
+                    executor, self._dl_cached, data_name, df_backend,
+                    predictor)
+            else:
+                async with self._aclient() as client:
+                    url = await self._aget_url(client, data_name)
+                    if not url:
+                        raise ValueError('Dataset is not available.')
+                    data = await self._aget(client, url)
+                if self.cache_dir is not None:
+                    df = await self._arun(
+                        executor, self._dl_cached, data_name, df_backend,
+                        predictor, data)
+                else:
+                    df = await self._arun(
+                        executor, parse, df_backend, predictor, data)
+        self._print_time(time.time() - start_time)
+        return df
+
+    async def adl_port(self, data_name, df_backend, predictor=None,
+                       executor=None):
+        """
+        dl_port for asyncio. The file is fetched without blocking the
+        event loop (with httpx when installed) and parsed in a thread, or
+        in `executor` such as a ProcessPoolExecutor. Process pools must use
+        the 'spawn' start method, as polars deadlocks in forked processes.
+        """
+
+        if data_name != 'op' and data_name not in PORT_ALT_LIST:
+            raise ValueError('Dataset is not available.')
+        return await self._adl(
+            data_name, df_backend, predictor, executor,
+            functools.partial(self._dl_port, data_name))
+
+    async def adl_all_signals(self, df_backend, predictor=None,
+                              executor=None):
+        """dl_all_signals for asyncio; see adl_port."""
+
+        # The CRSP signals alone come from WRDS, as in dl_all_signals
+        crsp_only = (type(predictor) is list and len(predictor) > 0
+                     and set(predictor) <= {'Price', 'Size', 'STreversal'})
+        return await self._adl(
+            'firm_char', df_backend, predictor, executor, self._dl_signal,
+            drive=not crsp_only)
+
+    async def adl_signal(self, df_backend, predictor, signed=False,
+                         executor=None):
+        """dl_signal for asyncio; the signal files are fetched concurrently."""
+
+        if df_backend not in ['polars', 'pandas']:
+            raise ValueError(
+                "Unsupported backend. Choose 'polars' or 'pandas'.")
+        start_time = time.time()
+        with self._stage('total', data_name='signal'):
+            sources = {}
+            if type(predictor) is list:
+                crsp3 = {'Price', 'Size', 'STreversal'}
+                names = [i for i in predictor if i not in crsp3]
+                async with self._aclient() as client:
+                    data = await asyncio.gather(
+                        *(self._aget_signal(client, i) for i in names))
+                sources = dict(zip(names, data))
+            df = await self._arun(
+                executor, self._dl_individual_signal, df_backend, predictor,
+                signed, sources)
+        self._print_time(time.time() - start_time)
+        return df
+
+
+class _NoClient:
+    """Stands in for httpx.AsyncClient with requests run in threads."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, url):
+        return await asyncio.to_thread(requests.get, url)
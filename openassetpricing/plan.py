@@ -0,0 +1,277 @@
+import os
+import re
+import struct
+import zlib
+import polars as pl
+from .cache import cache_path, is_cached, scan_cache
+from .gdrive_parse import _get_session
+from .utils import _check_backend, _convert_to_backend
+
+
+_SAMPLE_BYTES = 1 << 20
+_TAIL_BYTES = 1 << 16
+
+
+def _get_range(sess, url, spec):
+    # Reads at most one sample even if the server ignores the Range header
+    with sess.get(url, headers={'Range': f'bytes={spec}'}, stream=True,
+                  verify=True) as res:
+        data = next(res.iter_content(_SAMPLE_BYTES), b'')
+        total = res.headers.get('Content-Range', '').rpartition('/')[2]
+        if res.status_code == 206 and total.isdigit():
+            return data, int(total)
+        if res.status_code == 200 and res.headers.get('Content-Length'):
+            return data, int(res.headers['Content-Length'])
+        return data, None
+
+
+def _zip_size(tail):
+    """Uncompressed size of the first entry of a zip central directory."""
+
+    i = tail.find(b'PK\x01\x02')
+    if i < 0 or len(tail) < i + 46:
+        return None
+    (_, _, _, _, _, _, _, _, _, size, n_name, n_extra, _, _, _, _,
+     _) = struct.unpack('<4s6H3I5H2I', tail[i:i + 46])
+    if size != 0xFFFFFFFF:
+        return size
+    # Zip64: the size moves to the extra field with id 1
+    extra = tail[i + 46 + n_name:i + 46 + n_name + n_extra]
+    j = 0
+    while j + 4 <= len(extra):
+        tag, n = struct.unpack('<2H', extra[j:j + 4])
+        if tag == 1:
+            return struct.unpack('<Q', extra[j + 4:j + 12])[0]
+        j += 4 + n
+    return None
+
+
+def _unzip_sample(head):
+    """First decompressed bytes of the first zip entry and their ratio."""
+
+    (_, _, _, method, _, _, _, _, _, n_name,
+     n_extra) = struct.unpack('<4s5H3I2H', head[:30])
+    data = head[30 + n_name + n_extra:]
+    if method == 0:
+        return data, 1.0
+    d = zlib.decompressobj(-15)
+    out = d.decompress(data)
+    return out, len(out) / max(1, len(data) - len(d.unused_data))
+
+
+def _probe(url, zipped):
+    """
+    Compressed and uncompressed size and a sample of a remote csv.
+
+    Only the first MB and, for zip files, the central directory at the end
+    are requested. Where the server gives no exact uncompressed size, it is
+    extrapolated from the compression ratio of the sample.
+    """
+
+    sess = _get_session()
+    head, compressed = _get_range(sess, url, f'0-{_SAMPLE_BYTES - 1}')
+    if not zipped:
+        return compressed, compressed, head
+    sample, ratio = _unzip_sample(head)
+    uncompressed = None
+    if compressed is not None:
+        tail, _ = _get_range(sess, url, f'-{_TAIL_BYTES}')
+        uncompressed = _zip_size(tail)
+        if uncompressed is None:
+            uncompressed = int(compressed * ratio)
+    return compressed, uncompressed, sample
+
+
+def _layout(data_name, sample, uncompressed):
+    """Columns with their kind, average width and the estimated rows."""
+
+    lines = sample.decode('utf-8', 'ignore').splitlines()
+    if uncompressed is None or len(lines) < 3:
+        raise ValueError(f'Cannot tell the size of {data_name}.')
+    header, rows = lines[0].split(','), [i.split(',') for i in lines[1:-1]]
+    row_bytes = sum(len(i) + 1 for i in lines[1:-1]) / len(rows)
+    n = int((uncompressed - len(lines[0]) - 1) / row_bytes)
+
+    columns = {}
+    for j, name in enumerate(header):
+        values = [i[j] for i in rows if j < len(i) and i[j] not in ['', 'NA']]
+        width = sum(len(i) for i in values) / max(1, len(values))
+        if name in ['permno', 'yyyymm']:
+            kind = 'int'
+        elif values and all(
+                re.fullmatch(r'\d{4}-\d{2}-\d{2}', i) for i in values):
+            kind = 'date'
+        elif all(re.fullmatch(r'-?[\d.]+(?:[eE][-+]?\d+)?', i)
+                 for i in values):
+            kind = 'float'
+        else:
+            kind = 'str'
+        columns[name] = (kind, width)
+    return columns, n
+
+
+def _frame_bytes(columns, n, df_backend, dtype):
+    """In-memory size of a frame of `n` rows of the columns."""
+
+    size = 0
+    for kind, width in columns.values():
+        if kind == 'int':
+            size += 4
+        elif kind == 'date':
+            size += 4 if df_backend == 'polars' else 8
+        elif kind == 'float':
+            size += 4 if dtype == 'float32' else 8
+        elif df_backend == 'polars':
+            # String views inline up to 12 bytes
+            size += 16 + (width if width > 12 else 0)
+        else:
+            size += 57 + width
+    return int(size * n)
+
+
+def _plan_rows(data_name, release, cached, compressed, uncompressed,
+               n_full, full, n, selected, path, bandwidth):
+    """Peak and result size for each backend and dtype of one dataset."""
+
+    rows = []
+    for df_backend in ['polars', 'pandas']:
+        for dtype in ['float64', 'float32']:
+            res = _frame_bytes(selected, n, df_backend, dtype)
+            res64 = _frame_bytes(selected, n, 'polars', 'float64')
+            whole = _frame_bytes(full, n_full, 'polars', 'float64')
+            if cached:
+                # Scanned from Parquet: only the selection is read
+                peak = res64
+            elif path == 'csv':
+                peak = uncompressed + whole + res64
+            elif path == 'signal_str':
+                # The full panel is read as strings before the cast
+                peak = (compressed + uncompressed
+                        + 16 * n_full * len(full) + whole)
+            elif path == 'signal_sel':
+                peak = compressed + 2 * res64
+            else:
+                peak = compressed + uncompressed + whole + res64
+            if df_backend == 'pandas' or dtype == 'float32':
+                # Converted from the polars frame, both alive at once
+                peak = max(peak, res64 + res)
+            rows.append((
+                data_name, release, cached, df_backend, dtype, compressed,
+                uncompressed, n, len(selected), res, peak,
+                0.0 if cached else compressed / bandwidth))
+    return rows
+
+
+def plan_download(openap, data_name, predictor=None, bandwidth=10e6,
+                  df_backend='polars'):
+    """
+    Sizes of a download before it is made.
+
+    `data_name` is a dataset of openap.list_port(), 'firm_char' for the
+    signal panel, or 'signal' for the individual signal files of
+    `predictor`. For each backend and dtype (float64 as downloaded, or
+    float32 after a cast) returns the compressed and uncompressed size,
+    the estimated rows and columns, the size of the result, the expected
+    peak memory of the download and the time to fetch it at `bandwidth`
+    bytes per second. `cached` tells whether the dataset is in the cache of
+    `openap`, in which case sizes come from the Parquet files.
+
+    Only the first MB and the zip directory of each file are requested.
+    Rows are extrapolated from the average row width of that sample, so
+    sizes are estimates; signals computed from CRSP are not included.
+    """
+
+    _check_backend(df_backend)
+    crsp3 = {'Price', 'Size', 'STreversal'}
+    if isinstance(predictor, str):
+        predictor = [predictor]
+    if data_name == 'signal':
+        if not predictor:
+            raise ValueError("Choose the signals of 'signal' with predictor.")
+        known = set(openap.individual_signal_id_map.get_column('signal'))
+        missing = [i for i in predictor if i not in known | crsp3]
+        if missing:
+            raise ValueError(f'Signals not available: {missing}.')
+    elif data_name not in set(openap.name_id_map.get_column('download_name')):
+        raise ValueError(
+            f'Dataset {data_name} is not available. Choose from '
+            "openap.list_port(), 'firm_char' or 'signal'.")
+    cached = openap.cache_dir is not None and data_name != 'signal' and (
+        is_cached(openap.cache_dir, openap.release, data_name))
+    names = None
+    if data_name == 'firm_char' and predictor:
+        names = ['permno', 'yyyymm', *predictor]
+
+    rows = []
+    if cached:
+        lf = lf_full = scan_cache(
+            openap.cache_dir, openap.release, data_name)
+        schema = lf.collect_schema()
+        if names:
+            lf = lf.select(i for i in names if i in schema)
+        elif predictor:
+            lf = lf.filter(pl.col('signalname').is_in(predictor))
+        n = lf.select(pl.len()).collect().item()
+        n_full = lf_full.select(pl.len()).collect().item()
+        full = {
+            i: ('int' if dtype.is_integer() else
+                'date' if dtype == pl.Date else
+                'float' if dtype.is_float() else 'str', 8)
+            for i, dtype in schema.items()}
+        selected = {
+            i: full[i] for i in lf.collect_schema().names()}
+        compressed = sum(
+            os.path.getsize(cache_path(openap.cache_dir, openap.release, i))
+            for i in [data_name, f'{data_name}.delta']
+            if os.path.exists(
+                cache_path(openap.cache_dir, openap.release, i)))
+        rows += _plan_rows(
+            data_name, openap.release, True, compressed,
+            _frame_bytes(full, n_full, 'polars', 'float64'), n_full, full,
+            n, selected, None, bandwidth)
+    elif data_name == 'signal':
+        for i in [i for i in predictor if i not in crsp3]:
+            compressed, uncompressed, sample = _probe(
+                openap._get_individual_signal_url(i), zipped=False)
+            columns, n = _layout(i, sample, uncompressed)
+            rows += _plan_rows(
+                i, openap.release, False, compressed, uncompressed, n,
+                columns, n, columns, 'csv', bandwidth)
+    else:
+        zipped = data_name not in ['op', 'signal_doc']
+        compressed, uncompressed, sample = _probe(
+            openap._get_url(data_name), zipped)
+        full, n_full = _layout(data_name, sample, uncompressed)
+        selected, n = full, n_full
+        if names:
+            selected = {i: full[i] for i in names if i in full}
+        elif predictor:
+            # Portfolio files are long: rows scale with the signals kept
+            n = int(n_full * min(1, len(predictor) / len(openap.signal_sign)))
+        path = ('csv' if not zipped else
+                'signal_str' if data_name == 'firm_char' and not names else
+                'signal_sel' if data_name == 'firm_char' else 'zip')
+        rows += _plan_rows(
+            data_name, openap.release, False, compressed, uncompressed,
+            n_full, full, n, selected, path, bandwidth)
+
+    res = pl.DataFrame(
+        rows, orient='row',
+        schema={'data_name': pl.String, 'release': pl.String,
+                'cached': pl.Boolean, 'backend': pl.String,
+                'dtype': pl.String, 'compressed_bytes': pl.Int64,
+                'uncompressed_bytes': pl.Int64, 'rows': pl.Int64,
+                'columns': pl.Int64, 'result_bytes': pl.Int64,
+                'peak_bytes': pl.Int64, 'eta_seconds': pl.Float64})
+    if data_name == 'signal':
+        # One file per signal, joined into one frame
+        res = (
+            res.group_by('backend', 'dtype', maintain_order=True)
+            .agg(pl.lit('signal').alias('data_name'),
+                 pl.first('release'), pl.first('cached'),
+                 pl.sum('compressed_bytes', 'uncompressed_bytes'),
+                 pl.max('rows'), (pl.sum('columns') - 2 * (pl.len() - 1)),
+                 pl.sum('result_bytes', 'peak_bytes', 'eta_seconds'))
+            .select(res.columns)
+        )
+    return _convert_to_backend(res, df_backend)
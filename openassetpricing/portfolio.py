@@ -0,0 +1,113 @@
+import polars as pl
+from concurrent.futures import ThreadPoolExecutor
+from .utils import _check_backend, _to_lazy, _convert_to_backend, _chunk_list
+
+
+# Columns of the panel that are never treated as signals
+ID_COLS = ['permno', 'yyyymm', 'date', 'ret', 'me']
+
+
+def _port_expr(nport):
+    # Same breakpoints as port_sort in examples/ML_portfolio_example.ipynb
+    # ceil(rank * nport / (n + 1)), ranked within signal-month
+    rank = pl.col('signal').rank('min').over('signalname', 'date')
+    n = pl.len().over('signalname', 'date')
+    return (
+        (rank * nport / (n + 1)).ceil().cast(pl.Int32)
+        .cast(pl.String).str.zfill(2).alias('port'))
+
+
+def _port_agg(lf, predictor, nport, ret, me):
+    long = (
+        lf.select('permno', 'date', pl.col(ret).alias('ret'),
+                  pl.col(me).alias('me'), *predictor)
+        .unpivot(
+            index=['permno', 'date', 'ret', 'me'], on=predictor,
+            variable_name='signalname', value_name='signal')
+        .filter(pl.col('signal').is_not_null(), pl.col('ret').is_not_null())
+        .with_columns(_port_expr(nport))
+    )
+
+    # One group-by produces both weightings; vw only uses stocks with
+    # positive lagged market equity
+    w = pl.when(pl.col('me') > 0).then(pl.col('me'))
+    return (
+        long.group_by('signalname', 'port', 'date')
+        .agg(
+            ret_ew=pl.col('ret').mean(),
+            ret_vw=(pl.col('ret') * w).sum() / w.sum(),
+            signallag=pl.col('signal').mean(),
+            Nlong=pl.len().cast(pl.Int64))
+        .with_columns(Nshort=pl.lit(0, dtype=pl.Int64))
+    )
+
+
+def _add_ls(df, nport, ret_col):
+    top = str(nport).zfill(2)
+    ls = (
+        df.filter(pl.col('port') == top)
+        .join(
+            df.filter(pl.col('port') == '01'),
+            on=['signalname', 'date'], how='inner', suffix='_short')
+        .select(
+            'signalname',
+            pl.lit('LS').alias('port'),
+            'date',
+            (pl.col(ret_col) - pl.col(f'{ret_col}_short')).alias(ret_col),
+            pl.lit(None, dtype=pl.Float64).alias('signallag'),
+            'Nlong',
+            pl.col('Nlong_short').alias('Nshort'))
+    )
+    return pl.concat([df, ls])
+
+
+def port_returns(df, predictor=None, nport=10, weight='vw', ret='ret',
+                 me='me', n_jobs=1, df_backend='polars'):
+    """
+    Portfolio returns for every signal x port x month in one pass.
+
+    `df` is a firm-month panel with permno, date, signal columns, ret and me,
+    where signals and me are already lagged relative to ret (as after the
+    merge in examples/ML_portfolio_example.ipynb). Output has the same schema
+    as `OpenAP.dl_port` (signalname, port, date, ret, signallag, Nlong,
+    Nshort), including the LS spread of the top minus the bottom portfolio.
+
+    `weight` is 'ew', 'vw' or a list of both, in which case a dict keyed by
+    weighting is returned. `n_jobs` > 1 partitions the signals and
+    aggregates the partitions on separate threads.
+    """
+
+    _check_backend(df_backend)
+    weights = [weight] if isinstance(weight, str) else list(weight)
+    if not set(weights) <= {'ew', 'vw'}:
+        raise ValueError("Unsupported weight. Choose 'ew' or 'vw'.")
+
+    lf = _to_lazy(df)
+    if not predictor:
+        predictor = [
+            i for i in lf.collect_schema().names()
+            if i not in ID_COLS + [ret, me]]
+
+    if n_jobs > 1:
+        chunks = _chunk_list(predictor, n_jobs)
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            parts = pool.map(
+                lambda i: _port_agg(lf, i, nport, ret, me).collect(), chunks)
+            agg = pl.concat(list(parts))
+    else:
+        agg = _port_agg(lf, predictor, nport, ret, me).collect()
+
+    res = {}
+    for i in weights:
+        temp = (
+            agg.select(
+                'signalname', 'port', 'date',
+                pl.col(f'ret_{i}').alias('ret'),
+                'signallag', 'Nlong', 'Nshort')
+        )
+        temp = _add_ls(temp, nport, 'ret').sort('signalname', 'port', 'date')
+        res[i] = _convert_to_backend(temp, df_backend)
+
+    if isinstance(weight, str):
+        return res[weight]
+    return res
@@ -0,0 +1,86 @@
+import numpy as np
+import polars as pl
+import pandas as pd
+from .utils import _batches
+
+
+def _n_rows(data):
+    if isinstance(data, pl.LazyFrame):
+        # Only reads metadata for scanned Parquet/IPC files
+        return data.select(pl.len()).collect().item()
+    return len(data)
+
+
+def _linear_params(model, x):
+    """Returns (beta, intercept) for coefficient inputs, None for models."""
+
+    # statsmodels results, e.g. smf.ols(...).fit()
+    if isinstance(getattr(model, 'params', None), pd.Series):
+        model = model.params
+    if isinstance(model, (pd.Series, dict)):
+        missing = [i for i in x if i not in model]
+        if missing:
+            raise ValueError(f'No coefficient for predictors {missing}.')
+    if isinstance(model, pd.Series):
+        return (
+            model.reindex(x).to_numpy(dtype=np.float64),
+            float(model.get('Intercept', model.get('const', 0.0))))
+    if isinstance(model, dict):
+        return (
+            np.array([model[i] for i in x], dtype=np.float64),
+            float(model.get('Intercept', 0.0)))
+    if hasattr(model, 'predict'):
+        return None
+
+    beta = np.asarray(model, dtype=np.float64).ravel()
+    if len(beta) == len(x) + 1:
+        return beta[1:], beta[0]
+    if len(beta) == len(x):
+        return beta, 0.0
+    raise ValueError(
+        'Coefficient vector must have one entry per predictor, '
+        'optionally preceded by the intercept.')
+
+
+def predict_panel(data, model, x, batch_size=500_000, dtype=np.float64):
+    """
+    Applies a fitted model to the signal panel batch by batch.
+
+    `data` is a polars DataFrame, a LazyFrame (e.g. from `pl.scan_parquet`,
+    which is then streamed and never fully loaded) or a pandas DataFrame.
+    `model` is a coefficient vector (optionally with the intercept first),
+    a pandas Series or statsmodels result keyed by signal name with an
+    'Intercept' entry, or any object with a sklearn-style `predict`.
+
+    Predictions are written into one preallocated array in the row order
+    of `data`, so the result can be attached with
+    `df.with_columns(pred=predict_panel(df, fit, signal_list))`.
+    """
+
+    n = _n_rows(data)
+    out = np.empty(n, dtype=dtype)
+    params = _linear_params(model, x)
+    buf = np.empty((min(batch_size, n), len(x)), dtype=np.float64)
+
+    offset = 0
+    for batch in _batches(data, x, batch_size):
+        m = batch.num_rows
+        xx = buf[:m]
+        for j, col in enumerate(batch.columns):
+            # Nulls become NaN, as with DataFrame.to_numpy()
+            xx[:, j] = col.to_numpy(zero_copy_only=False)
+        if params is None:
+            out[offset:offset+m] = model.predict(xx)
+        else:
+            beta, intercept = params
+            res = out[offset:offset+m]
+            if dtype == np.float64:
+                np.matmul(xx, beta, out=res)
+            else:
+                res[:] = xx @ beta
+            res += intercept
+        offset += m
+
+    if offset != n:
+        raise RuntimeError(f'Expected {n} rows but scored {offset}.')
+    return out
@@ -0,0 +1,139 @@
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+import polars as pl
+from concurrent.futures import ProcessPoolExecutor
+from .matrix import feature_matrix
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+# Calendar regimes of personal_ref/mia.ipynb, inclusive year ranges
+REGIMES = {
+    '1990s': ('1990', '1999'),
+    '2000s': ('2000', '2009'),
+    '2010s': ('2010', '2019'),
+    '2020s': ('2020', '2024'),
+}
+
+# Feature matrix as seen by a worker process
+_MATRIX = {}
+
+
+def _open_matrix(path):
+    _MATRIX['x'] = np.load(path, mmap_mode='r')
+
+
+def _importances(model):
+    # Last step of a Pipeline, else the model itself
+    est = model[-1] if hasattr(model, 'steps') else model
+    if hasattr(est, 'feature_importances_'):
+        return np.asarray(est.feature_importances_, dtype=np.float64)
+    if hasattr(est, 'coef_'):
+        return np.abs(np.ravel(est.coef_)).astype(np.float64)
+    raise ValueError(
+        'Model exposes neither feature_importances_ nor coef_.')
+
+
+def _fit_regime(model, rows, yy):
+    # rows is a slice of the memmap, with a step when down-sampled, so the
+    # regime is a zero-copy view
+    xx = _MATRIX['x'][rows]
+    model = pickle.loads(model)
+    model.fit(xx, yy)
+    return _importances(model), float(model.score(xx, yy))
+
+
+def _year(lf, date):
+    if lf.collect_schema()[date].is_integer():
+        return pl.col(date) // 100
+    return pl.col(date).dt.year()
+
+
+def regime_importance(df, model, x, y='ret', date='date', regimes=REGIMES,
+                      max_rows=10_000, path=None, n_jobs=None, seed=42,
+                      df_backend='polars'):
+    """
+    Feature importance of one model refit in every calendar regime.
+
+    The panel is sorted by `date` and its feature matrix is streamed once
+    as float32 to a memory-mapped .npy (`path`, or a temporary file), so
+    each regime is a row range of the same array; only the dates and
+    `y` are held in memory. Regimes with more than `max_rows` rows are
+    down-sampled to every k-th row from an offset drawn with `seed`, which
+    keeps them views of the array and spreads them over all months.
+    Regimes are fit in a process pool of `n_jobs` workers (all cores by
+    default) that read the matrix from the memmap.
+
+    Returns the importance table (Feature plus one column per regime, each
+    summing to one), the Spearman correlation of importance rankings across
+    regimes, and the in-sample R2 of every regime.
+    """
+
+    _check_backend(df_backend)
+    lf = _to_lazy(df).filter(pl.col(y).is_not_null())
+    # A stable sort, so the matrix and y below have the same row order
+    lf = lf.with_columns(_year=_year(lf, date)).sort(
+        date, maintain_order=True)
+    data = lf.select(y, '_year').collect()
+    years = data.get_column('_year').to_numpy()
+    yy = data.get_column(y).to_numpy().astype(np.float64)
+    del data
+
+    tmpdir = None
+    if path is None:
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'features.npy')
+    feature_matrix(lf, x, path)
+
+    rng = np.random.default_rng(seed)
+    tasks = {}
+    for name, (start, end) in regimes.items():
+        lo = np.searchsorted(years, int(start), side='left')
+        hi = np.searchsorted(years, int(end), side='right')
+        if hi - lo == 0:
+            print(f'No rows in regime {name}, skipped.')
+            continue
+        if max_rows and hi - lo > max_rows:
+            step = -(-(hi - lo) // max_rows)
+            rows = slice(lo + int(rng.integers(step)), hi, step)
+        else:
+            rows = slice(lo, hi)
+        tasks[name] = (pickle.dumps(model), rows, yy[rows])
+
+    n_jobs = n_jobs or os.cpu_count()
+    try:
+        if n_jobs == 1:
+            _open_matrix(path)
+            res = [_fit_regime(*i) for i in tasks.values()]
+            _MATRIX.clear()
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=n_jobs, initializer=_open_matrix,
+                    initargs=(path,)) as pool:
+                futures = [pool.submit(_fit_regime, *i)
+                           for i in tasks.values()]
+                res = [i.result() for i in futures]
+    finally:
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    names = list(tasks)
+    imp = np.column_stack([i[0] for i in res])
+    with np.errstate(invalid='ignore'):
+        imp = imp / imp.sum(axis=0)
+    importance = pl.DataFrame({'Feature': list(x)}).with_columns(
+        pl.DataFrame(imp, schema=names))
+
+    # Correlation of the rankings, so equal to the Spearman correlation
+    ranks = importance.select(pl.col(names).rank(descending=True))
+    corr = np.corrcoef(ranks.to_numpy(), rowvar=False).reshape(
+        len(names), len(names))
+    spearman = pl.DataFrame({'Regime': names}).with_columns(
+        pl.DataFrame(corr, schema=names))
+    r2 = pl.DataFrame({'Regime': names, 'R2': [i[1] for i in res]})
+    return (
+        _convert_to_backend(importance, df_backend),
+        _convert_to_backend(spearman, df_backend),
+        _convert_to_backend(r2, df_backend))
@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import time
+import polars as pl
+from . import urls
+from .gdrive_parse import (
+    _GoogleDriveFile, _get_session, _list_folder, _get_name_id_map,
+    _get_file_size, _folder_url)
+from .utils import _check_backend, _convert_to_backend, _release_key
+
+
+# Root Drive folder holding one sub-folder per release, for registries
+# created without a root_url. Discovery is opt-in: the package ships no
+# root folder, so unset, releases come from the urls.py table only
+ROOT_URL = os.environ.get('OAP_ROOT_URL')
+
+def _table_releases():
+    """Releases of the urls.py table as {release: url}."""
+
+    res = {}
+    for i in vars(urls):
+        m = re.fullmatch(r'release(\d+)_url', i)
+        if m:
+            res[m.group(1)] = getattr(urls, i)
+    return res
+
+
+def _folder_id(url):
+    m = re.search(r'/folders/([\w-]+)', url)
+    return m.group(1) if m else url
+
+
+def _valid_state(state):
+    """Whether a registry.json has the structure _save writes."""
+
+    try:
+        if state['releases'] is not None:
+            float(state['releases']['fetched'])
+            for i in state['releases']['releases'].values():
+                str(i['url']), str(i['source'])
+        for i in state['datasets'].values():
+            float(i['fetched']), bool(i['sizes']), list(i['rows'])
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return False
+    return True
+
+
+def _folder_release(name):
+    """Release of a folder name such as '2024.10' or 'Release 2023'."""
+
+    m = re.search(r'(?<!\d)((?:19|20)\d{2})(?:[._ -]?(0[1-9]|1[0-2]))?(?!\d)',
+                  name)
+    if m is None:
+        return None
+    return m.group(1) + (m.group(2) or '')
+
+
+class ReleaseRegistry:
+    """
+    Data releases of Open Source Asset Pricing and their datasets.
+
+    Discovery is opt-in: releases are found in the sub-folders of the root
+    Drive folder `root_url` (by default $OAP_ROOT_URL) only when one is
+    given. Otherwise, and when the folder cannot be read, the releases are
+    those of the urls.py table, which also completes the discovered ones.
+    A table release in the same Drive folder as a discovered one, or named
+    by its year only when Drive has a single release that year (2023 and
+    202308), is the same release: it is listed once, under the Drive
+    name, and both names resolve to it. The release list and the dataset
+    listings are kept for `ttl` seconds, in memory and, with a
+    `cache_dir`, in a json file there; a copy that cannot be read or has
+    another structure is treated as stale and fetched again. Releases are ordered by yyyymm, with
+    year-only releases padded to yyyy00, so `latest` does not depend on
+    how they are named or listed.
+    """
+
+    def __init__(self, root_url=ROOT_URL, cache_dir=None, ttl=24 * 3600):
+        self.root_url = root_url
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._state = None
+
+    def _path(self):
+        return os.path.join(self.cache_dir, 'registry.json')
+
+    def _load(self):
+        if self._state is None:
+            self._state = {'releases': None, 'datasets': {}}
+            if self.cache_dir and os.path.exists(self._path()):
+                try:
+                    with open(self._path()) as f:
+                        self._state = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f'Cannot read {self._path()} ({e}); '
+                          'listing the releases again.')
+                if not _valid_state(self._state):
+                    print(f'{self._path()} is not a release registry; '
+                          'listing the releases again.')
+                    self._state = {'releases': None, 'datasets': {}}
+        return self._state
+
+    def _save(self):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so readers never see a partial file
+            with open(self._path() + '.tmp', 'w') as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(self._path() + '.tmp', self._path())
+        except OSError as e:
+            # The listing is still kept in memory
+            print(f'Cannot write {self._path()} ({e}).')
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry['fetched'] < self.ttl
+
+    def _discover(self):
+        found = {}
+        if self.root_url:
+            try:
+                children = _list_folder(_get_session(), self.root_url)
+            except Exception as e:
+                print(f'Cannot list the release folder ({e}); '
+                      'using the known releases.')
+                children = []
+            for child_id, child_name, child_type in children:
+                release = _folder_release(child_name)
+                if (child_type == _GoogleDriveFile.TYPE_FOLDER
+                        and release is not None):
+                    found[release] = {
+                        'url': _folder_url(child_id), 'name': child_name,
+                        'source': 'drive'}
+        drive = {_folder_id(v['url']): i for i, v in found.items()}
+        for release, url in _table_releases().items():
+            same = drive.get(_folder_id(url))
+            year = [i for i in drive.values() if i[:4] == release]
+            if same is None and len(release) == 4 and len(year) == 1:
+                same = year[0]
+            if same is not None and same != release:
+                found[same].setdefault('aliases', []).append(release)
+                continue
+            found.setdefault(
+                release, {'url': url, 'name': None, 'source': 'urls'})
+        return found
+
+    def _lookup(self, release, refresh=False):
+        # Release name of a name or an alias of it, None if unknown
+        found = self._releases(refresh)
+        if release in found:
+            return release
+        return next(
+            (i for i, v in found.items() if release in v.get('aliases', [])),
+            None)
+
+    def _releases(self, refresh=False):
+        state = self._load()
+        if refresh or not self._fresh(state['releases']):
+            state['releases'] = {
+                'fetched': time.time(), 'releases': self._discover()}
+            self._save()
+        return state['releases']['releases']
+
+    def releases(self, refresh=False, df_backend='polars'):
+        """Known releases, oldest first, with their folder url and source."""
+
+        _check_backend(df_backend)
+        found = self._releases(refresh)
+        order = sorted(found, key=lambda i: (_release_key(i), i))
+        df = pl.DataFrame(
+            [(i, found[i]['url'], found[i]['name'], found[i]['source'])
+             for i in order],
+            schema={'release': pl.String, 'url': pl.String,
+                    'folder': pl.String, 'source': pl.String},
+            orient='row')
+        return _convert_to_backend(df, df_backend)
+
+    def latest(self, refresh=False):
+        found = self._releases(refresh)
+        return max(found, key=lambda i: (_release_key(i), i))
+
+    def resolve(self, release=None):
+        """Release name of `release`, where None or 'latest' is the latest."""
+
+        if release is None or release == 'latest':
+            return self.latest()
+        name = self._lookup(str(release))
+        if name is None:
+            # A release published since the list was cached
+            name = self._lookup(str(release), refresh=True)
+        if name is None:
+            raise ValueError(
+                f'Unknown release {release}. '
+                'Choose from '
+                f'{sorted(self._releases(), key=_release_key)}.')
+        return name
+
+    def url(self, release=None):
+        return self._releases()[self.resolve(release)]['url']
+
+    def metadata(self, release=None, sizes=True, refresh=False,
+                 df_backend='polars'):
+        """
+        Datasets of a release: name for download, file name, Drive url and,
+        with `sizes`, the size in bytes.
+
+        Sizes come from HEAD requests; files behind the Drive virus-scan
+        page only have their rounded size. The listing is cached with the
+        release list.
+        """
+
+        _check_backend(df_backend)
+        release = self.resolve(release)
+        state = self._load()
+        entry = state['datasets'].get(release)
+        if (refresh or not self._fresh(entry)
+                or (sizes and not entry['sizes'])):
+            df = _get_name_id_map(self.url(release))[0].select(
+                'download_name', 'name', 'full_name', 'file_id')
+            size = [None] * len(df)
+            if sizes:
+                sess = _get_session()
+                size = [_get_file_size(sess, i)
+                        for i in df.get_column('file_id')]
+            entry = {
+                'fetched': time.time(), 'sizes': sizes,
+                'rows': df.with_columns(
+                    size=pl.Series(size, dtype=pl.Int64)).to_dicts()}
+            state['datasets'][release] = entry
+            self._save()
+
+        df = pl.DataFrame(
+            entry['rows'],
+            schema={'download_name': pl.String, 'name': pl.String,
+                    'full_name': pl.String, 'file_id': pl.String,
+                    'size': pl.Int64})
+        return _convert_to_backend(df, df_backend)
@@ -0,0 +1,240 @@
+import os
+import numpy as np
+import polars as pl
+from concurrent.futures import ThreadPoolExecutor
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+def _bartlett(nw_lags):
+    return 1 - np.arange(1, nw_lags + 1) / (nw_lags + 1)
+
+
+def _stack_groups(df, by, y, x):
+    """
+    Packs a long frame sorted by `by` into zero-padded (G, T, K) arrays.
+
+    Each group's observations are moved to the front of its row, so lags
+    in the Newey-West sums follow the observation order within the group.
+    """
+
+    gid = df.select(pl.struct(by).rle_id()).to_series().to_numpy()
+    start = np.flatnonzero(np.diff(gid, prepend=-1))
+    pos = np.arange(len(gid)) - start[gid]
+    n_group, n_time = len(start), pos.max() + 1
+
+    yy = np.zeros((n_group, n_time))
+    xx = np.zeros((n_group, n_time, len(x) + 1))
+    mask = np.zeros((n_group, n_time), dtype=bool)
+    yy[gid, pos] = df.get_column(y).to_numpy()
+    xx[gid, pos, 0] = 1
+    if x:
+        xx[gid, pos, 1:] = df.select(x).to_numpy()
+    mask[gid, pos] = True
+    return start, yy, xx, mask
+
+
+def _is_grouped(df, by):
+    # dl_port output is already sorted by group and date, which lets us skip
+    # a string sort of the whole file
+    gid = df.select(pl.struct(by).rle_id()).to_series().to_numpy()
+    if len(gid) and gid[-1] + 1 != df.select(by).n_unique():
+        return False
+    date = df.get_column('date').to_physical().to_numpy()
+    same = np.diff(gid) == 0
+    return bool((np.diff(date)[same] > 0).all())
+
+
+def _batched_ols(yy, xx, mask, nw_lags=None):
+    n_obs = mask.sum(axis=1)
+    k = xx.shape[2]
+    xtx = xx.transpose(0, 2, 1) @ xx
+    xty = (xx.transpose(0, 2, 1) @ yy[:, :, None])[:, :, 0]
+
+    # Groups without enough months to identify the model, or with collinear
+    # regressors, are left as NaN
+    ok = (n_obs > k) & (np.linalg.matrix_rank(xx) == k)
+    eye = np.broadcast_to(np.eye(k), xtx.shape)
+    xtx = np.where(ok[:, None, None], xtx, eye)
+    xtx_inv = np.linalg.inv(xtx)
+    beta = (xtx_inv @ xty[:, :, None])[:, :, 0]
+    resid = (yy - (xx @ beta[:, :, None])[:, :, 0]) * mask
+    dof = np.where(ok, n_obs - k, 1)
+
+    if nw_lags:
+        u = xx * resid[:, :, None]
+        u_t = u.transpose(0, 2, 1)
+        meat = u_t @ u
+        for lag, w in enumerate(_bartlett(nw_lags), start=1):
+            gamma = u_t[:, :, lag:] @ u[:, :-lag]
+            meat += w * (gamma + gamma.transpose(0, 2, 1))
+        cov = xtx_inv @ meat @ xtx_inv
+    else:
+        s2 = (resid ** 2).sum(axis=1) / dof
+        cov = xtx_inv * s2[:, None, None]
+
+    se = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    beta[~ok] = np.nan
+    se[~ok] = np.nan
+    return beta, se, n_obs
+
+
+def ts_regress(port, factors=None, factor_names=None, by=None, nw_lags=None,
+               df_backend='polars'):
+    """
+    Time-series regressions of portfolio returns on factors for all groups.
+
+    `port` is `OpenAP.dl_port` output (or `port_returns` output) and
+    `factors` a frame with a date column plus factor returns in the same
+    units as ret. Without factors, the intercept is the mean return, as in
+    the `ret ~ 1` regression of
+    examples/merge_portfolios_with_ff_factors.ipynb.
+
+    All signalname x port regressions are solved together from batched
+    normal equations. `nw_lags` switches to Newey-West standard errors.
+    Returns one row per group and term (alpha plus each factor) with coef,
+    se, tstat, nmonth, datemin and datemax.
+    """
+
+    _check_backend(df_backend)
+    by = by or ['signalname', 'port']
+    lf = _to_lazy(port).select(*by, 'date', 'ret')
+    if factors is not None:
+        factors = _to_lazy(factors)
+        if not factor_names:
+            factor_names = [
+                i for i in factors.collect_schema().names() if i != 'date']
+        lf = lf.join(
+            factors.select('date', *factor_names), on='date', how='inner',
+            maintain_order='left')
+    factor_names = factor_names or []
+
+    df = lf.drop_nulls(['ret'] + factor_names).collect()
+    if not _is_grouped(df, by):
+        df = df.sort(*by, 'date')
+    start, yy, xx, mask = _stack_groups(df, by, 'ret', factor_names)
+    beta, se, n_obs = _batched_ols(yy, xx, mask, nw_lags)
+
+    # Rows are sorted by group and date, so group bounds give the date range
+    terms = ['alpha'] + factor_names
+    n_group, n_term = beta.shape
+    res = (
+        df.select(*by, datemin='date')
+        .gather(start)
+        .with_columns(
+            datemax=df.get_column('date').gather(start + n_obs - 1),
+            nmonth=pl.Series(n_obs, dtype=pl.Int64))
+        .select(pl.all().gather(np.repeat(np.arange(n_group), n_term)))
+        .with_columns(
+            term=pl.Series(np.tile(terms, n_group)),
+            coef=pl.Series(beta.ravel()),
+            se=pl.Series(se.ravel()))
+        .select(
+            *by, 'term', 'coef', 'se',
+            (pl.col('coef') / pl.col('se')).alias('tstat'),
+            'nmonth', 'datemin', 'datemax')
+    )
+    return _convert_to_backend(res, df_backend)
+
+
+def _cs_ols(df, y, x, min_obs):
+    """
+    Cross-sectional OLS of one month from its sufficient statistics.
+
+    Signals with no data in the month are left out of that month's
+    regression, then rows with any remaining missing value are dropped.
+    """
+
+    yy = df.get_column(y).to_numpy()
+    xx = df.select(x).to_numpy().astype(np.float64)
+    cols = ~np.isnan(xx).all(axis=0)
+    xx = xx[:, cols]
+    rows = ~np.isnan(xx).any(axis=1) & ~np.isnan(yy)
+    zz = np.column_stack([np.ones(rows.sum()), xx[rows]])
+    beta = np.full(len(x) + 1, np.nan)
+    n_obs = len(zz)
+    if n_obs < max(min_obs, zz.shape[1] + 1):
+        return beta, n_obs
+
+    xtx = zz.T @ zz
+    xty = zz.T @ yy[rows]
+    try:
+        beta[np.r_[True, cols]] = np.linalg.solve(xtx, xty)
+    except np.linalg.LinAlgError:
+        pass
+    return beta, n_obs
+
+
+def _nw_mean_se(series, nw_lags=None):
+    series = series[~np.isnan(series)]
+    n = len(series)
+    if n < 2:
+        return np.nan
+    if not nw_lags:
+        return series.std(ddof=1) / np.sqrt(n)
+
+    e = series - series.mean()
+    lrv = e @ e / n
+    for lag, w in enumerate(_bartlett(min(nw_lags, n - 1)), start=1):
+        lrv += 2 * w * (e[lag:] @ e[:-lag]) / n
+    return np.sqrt(lrv / n)
+
+
+def fama_macbeth(df, x, y='ret', date='date', nw_lags=None, min_obs=None,
+                 n_jobs=None, monthly=False, df_backend='polars'):
+    """
+    Fama-MacBeth regressions of `y` on the signals in `x`.
+
+    `df` is a firm-month panel such as `OpenAP.dl_all_signals` output merged
+    with returns. Each month's regression is solved from its X'X and X'y,
+    with months spread over `n_jobs` threads (all cores by default).
+    Missing values are handled month by month: signals not available in a
+    month are dropped from it, then incomplete rows are dropped.
+
+    Returns the time-series average of each coefficient with its standard
+    error (Newey-West if `nw_lags` is given), t-stat and number of months.
+    With `monthly=True` the month-by-month coefficients are returned too.
+    """
+
+    _check_backend(df_backend)
+    min_obs = min_obs or len(x) + 2
+    data = (
+        _to_lazy(df)
+        .select(date, y, *x)
+        .filter(pl.col(y).is_not_null())
+        .sort(date)
+        .collect()
+    )
+
+    dates = data.get_column(date).to_numpy()
+    start = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    length = np.diff(np.r_[start, len(data)])
+
+    def _month(i):
+        return _cs_ols(data.slice(start[i], length[i]), y, x, min_obs)
+
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+        res = list(pool.map(_month, range(len(start))))
+
+    terms = ['Intercept'] + list(x)
+    beta = np.array([i[0] for i in res]).reshape(len(res), len(terms))
+    coef = np.nanmean(beta, axis=0)
+    se = np.array([_nw_mean_se(beta[:, i], nw_lags) for i in range(len(terms))])
+    summary = pl.DataFrame({
+        'term': terms,
+        'coef': coef,
+        'se': se,
+        'tstat': coef / se,
+        'nmonth': (~np.isnan(beta)).sum(axis=0).astype(np.int64)})
+
+    summary = _convert_to_backend(summary, df_backend)
+    if not monthly:
+        return summary
+
+    by_month = (
+        pl.DataFrame(beta, schema=terms)
+        .select(
+            pl.Series(date, dates[start]).cast(data.schema[date]),
+            pl.Series('nobs', [i[1] for i in res], dtype=pl.Int64),
+            pl.all())
+    )
+    return summary, _convert_to_backend(by_month, df_backend)
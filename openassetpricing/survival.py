@@ -0,0 +1,234 @@
+import math
+from statistics import NormalDist
+import numpy as np
+import polars as pl
+from .decay import _month_index
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+def survival_spells(df, signals=None, crash=-0.5, ret='ret', date='yyyymm',
+                    signal_lag=1, delist=True, max_stale=12,
+                    df_backend='polars'):
+    """
+    Cox-ready spells of every permno from a monthly CRSP return panel.
+
+    A spell starts in the first month of the permno and ends at the first
+    crash, the first month the drawdown of cumulative returns from their
+    running peak is at or below `crash`. Permnos that stop trading before
+    the last month of the panel without a crash end in a delisting, an
+    event unless `delist=False`; the rest are censored. Drawdowns come from
+    cumulative sums over the panel sorted once by permno, so all permnos
+    are handled in one pass.
+
+    `signals` is an optional permno-yyyymm panel, e.g. dl_all_signals
+    output. Its values as of `signal_lag` months before the spell start
+    are joined as covariates, unless they are more than `max_stale` months
+    older than that (None for no limit). A spell then starts in the first
+    month with a lagged signal, so new listings are not left without
+    covariates (and out of Cox fits) in their first months; permnos that
+    never have a signal start in their first month. Returns permno, the
+    start month, end, duration (months), event, event_type and the
+    signals.
+    """
+
+    _check_backend(df_backend)
+    lf = _to_lazy(df)
+    month = _month_index(lf, date)
+    last = pl.col('_m').max()
+
+    lf = lf.select('permno', date, ret)
+    if signals is not None:
+        sig = _to_lazy(signals)
+        sig_month = _month_index(sig, 'yyyymm')
+        names = [i for i in sig.collect_schema().names()
+                 if i not in ['permno', 'yyyymm', date]]
+        # CRSP panels are often Int64 and dl_all_signals is Int32
+        sig = (
+            sig.with_columns(
+                pl.col('permno').cast(pl.Int64),
+                _m=(sig_month + signal_lag).cast(pl.Int64))
+            .select('permno', '_m', *names)
+            .sort('_m')
+        )
+        first = (
+            sig.filter(pl.any_horizontal(pl.col(names).is_not_null()))
+            .group_by('permno')
+            .agg(_first=pl.col('_m').min())
+        )
+        lf = (
+            lf.with_columns(pl.col('permno').cast(pl.Int64))
+            .join(first, on='permno', how='left')
+            .filter(pl.col('_first').is_null() | (month >= pl.col('_first')))
+            .drop('_first')
+        )
+
+    spells = (
+        lf.sort('permno', date)
+        .with_columns(
+            _m=month,
+            _w=pl.col(ret).fill_null(0).log1p().cum_sum().over('permno'))
+        .with_columns(
+            # Peak wealth includes the starting value of one
+            _dd=(pl.col('_w') - pl.col('_w').cum_max().over('permno')
+                 .clip(lower_bound=0)).exp() - 1)
+        .with_columns(_last=last)
+        .group_by('permno')
+        .agg(
+            pl.col(date).first(),
+            pl.col(date).filter(pl.col('_dd') <= crash).first().alias('_crash'),
+            pl.col(date).last().alias('_end'),
+            pl.col('_m').first().alias('_m0'),
+            pl.col('_m').filter(pl.col('_dd') <= crash).first().alias('_mc'),
+            pl.col('_m').last().alias('_m1'),
+            pl.col('_last').first())
+        .select(
+            'permno', date,
+            pl.coalesce('_crash', '_end').alias('end'),
+            (pl.coalesce('_mc', '_m1') - pl.col('_m0') + 1)
+            .cast(pl.Int32).alias('duration'),
+            pl.when(pl.col('_crash').is_not_null()).then(pl.lit('crash'))
+            .when(pl.col('_m1') < pl.col('_last')).then(pl.lit('delist'))
+            .otherwise(pl.lit('censored')).alias('event_type'))
+        .with_columns(
+            pl.col('event_type').is_in(['crash', 'delist'] if delist
+                                       else ['crash'])
+            .cast(pl.Int8).alias('event'))
+        .select('permno', date, 'end', 'duration', 'event', 'event_type')
+        .sort('permno')
+    )
+
+    if signals is not None:
+        spells = (
+            spells.with_columns(
+                _m=_month_index(spells, date).cast(pl.Int64))
+            .sort('_m')
+            # Both sides are sorted above; polars cannot check it by group
+            .join_asof(sig, on='_m', by='permno', strategy='backward',
+                       tolerance=max_stale, check_sortedness=False)
+            .drop('_m')
+            .sort('permno')
+        )
+
+    res = spells.collect()
+    return _convert_to_backend(res, df_backend)
+
+
+def _cox_terms(beta, x, valid, ev, start, end, frac):
+    """
+    Efron log likelihood, score and information of univariate Cox models.
+
+    Rows are sorted by descending duration and every column of `x` is a
+    separate model with coefficient `beta`. Risk-set sums are cumulative
+    sums over rows, read at the last row of each tied duration, so all
+    columns share one pass.
+    """
+
+    bx = beta * x
+    r = np.exp(bx) * valid
+    rx = r * x
+    rxx = rx * x
+
+    def _risk(a):
+        return np.cumsum(a, axis=0)[end]
+
+    def _tied(a):
+        a = a * ev
+        cs = np.cumsum(a, axis=0)
+        return cs[end] - cs[start] + a[start]
+
+    # Efron: the l-th of d tied events removes l/d of the tied hazard
+    s0 = _risk(r) - frac * _tied(r)
+    s1 = _risk(rx) - frac * _tied(rx)
+    s2 = _risk(rxx) - frac * _tied(rxx)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m1 = np.where(ev, s1 / s0, 0)
+        ll = np.sum(np.where(ev, bx - np.log(s0), 0), axis=0)
+        score = np.sum(x * ev - m1, axis=0)
+        info = np.sum(np.where(ev, s2 / s0, 0) - m1 ** 2, axis=0)
+    return ll, score, info
+
+
+def cox_screen(df, x, duration='duration', event='event', max_iter=50,
+               tol=1e-9, df_backend='polars'):
+    """
+    Univariate Cox proportional-hazards model of every signal in `x`.
+
+    Each signal is fit on the rows where it is observed, with Efron ties
+    as in lifelines. Durations are sorted once, and the risk-set sums of all
+    signals are cumulative sums over the same sorted rows, so the Newton
+    steps of all models are solved together. Returns one row per signal in
+    the layout of dashboard_ref/surv_analysis.csv.
+    """
+
+    _check_backend(df_backend)
+    data = (
+        _to_lazy(df)
+        .select(duration, event, *x)
+        .filter(pl.col(duration).is_not_null(), pl.col(event).is_not_null())
+        .sort(duration, descending=True)
+        .collect()
+    )
+    t = data.get_column(duration).to_numpy()
+    xx = data.select(pl.col(x).cast(pl.Float64)).to_numpy()
+    valid = ~np.isnan(xx)
+    ev = valid & (data.get_column(event).to_numpy() > 0)[:, None]
+
+    # Rows of each tied duration, and the rank of each event among the
+    # observed events at that duration
+    first = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+    size = np.diff(np.r_[first, len(t)])
+    start = np.repeat(first, size)
+    end = np.repeat(first + size - 1, size)
+    cs = np.cumsum(ev, axis=0)
+    tie_l = cs - cs[start] + ev[start] - 1
+    tie_d = cs[end] - cs[start] + ev[start]
+    frac = np.where(ev, tie_l / np.maximum(tie_d, 1), 0)
+
+    # Centered and scaled for the solve; the coefficient is rescaled after
+    with np.errstate(invalid='ignore'):
+        mean, sd = np.nanmean(xx, axis=0), np.nanstd(xx, axis=0)
+    sd = np.where(sd > 0, sd, 1)
+    z = np.where(valid, (xx - mean) / sd, 0)
+
+    beta = np.zeros(len(x))
+    ll, score, info = _cox_terms(beta, z, valid, ev, start, end, frac)
+    for _ in range(max_iter):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(info > 0, score / info, 0)
+        new = beta + step
+        ll_new, score_new, info_new = _cox_terms(
+            new, z, valid, ev, start, end, frac)
+        # Halve the step of models whose likelihood did not improve
+        worse = ll_new < ll - 1e-10 * np.abs(ll)
+        while worse.any() and np.abs(step[worse]).max() > tol:
+            step = np.where(worse, step / 2, step)
+            new = beta + step
+            ll_new, score_new, info_new = _cox_terms(
+                new, z, valid, ev, start, end, frac)
+            worse = ll_new < ll - 1e-10 * np.abs(ll)
+        beta, ll, score, info = new, ll_new, score_new, info_new
+        if np.nanmax(np.abs(step), initial=0) < tol:
+            break
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coef = beta / sd
+        se = 1 / np.sqrt(info) / sd
+    zstat = coef / se
+    # Two-sided normal tail probability
+    p = np.array([math.erfc(abs(i) / math.sqrt(2)) for i in zstat])
+    q = NormalDist().inv_cdf(0.975)
+    res = pl.DataFrame({
+        'covariate': list(x),
+        'coef': coef,
+        'exp(coef)': np.exp(coef),
+        'se(coef)': se,
+        'coef lower 95%': coef - q * se,
+        'coef upper 95%': coef + q * se,
+        'exp(coef) lower 95%': np.exp(coef - q * se),
+        'exp(coef) upper 95%': np.exp(coef + q * se),
+        'cmp to': np.zeros(len(x)),
+        'z': zstat,
+        'p': p,
+        '-log2(p)': -np.log2(p),
+    })
+    return _convert_to_backend(res, df_backend)
@@ -0,0 +1,211 @@
+import io
+import os
+import zipfile
+import numpy as np
+import polars as pl
+
+
+# Alternative portfolio files and their number of portfolios
+ALT_PORTS = {
+    'Deciles': 10, 'DecilesVW': 10, 'LiqScreen_ME_gt_NYSE20pct': 10,
+    'LiqScreen_NYSEonly': 10, 'LiqScreen_Price_gt_5': 10, 'Quintiles': 5,
+    'QuintilesVW': 5}
+
+
+def _months(start, end):
+    first = start // 100 * 12 + start % 100 - 1
+    last = end // 100 * 12 + end % 100 - 1
+    idx = np.arange(first, last + 1)
+    return idx // 12 * 100 + idx % 12 + 1
+
+
+def _month_end(yyyymm):
+    return (
+        pl.date(yyyymm // 100, yyyymm % 100, 1).dt.month_end()
+        .dt.strftime('%Y-%m-%d'))
+
+
+def signal_names(n_signals=209):
+    return [f'Sig{i:03d}' for i in range(n_signals)]
+
+
+def _signal_traits(n_signals, n_months, seed):
+    # First month each signal is observed and its missing rate; a third of
+    # the signals start late, like those built on I/B/E/S or 13F data
+    rng = np.random.default_rng([seed, 0])
+    first = np.where(
+        rng.random(n_signals) < 1 / 3,
+        rng.integers(n_months // 3, 2 * n_months // 3, n_signals), 0)
+    missing = rng.beta(2, 5, n_signals)
+    return first, missing
+
+
+def signal_panel(n_permnos=30_000, n_signals=209, start=192601, end=202312,
+                 batch_permnos=1000, seed=0):
+    """
+    Yields a permno-yyyymm signal panel shaped like
+    signed_predictors_dl_wide, one batch of `batch_permnos` permnos at a
+    time, sorted by permno and yyyymm.
+
+    Every permno lives for a random span of months. Signals start in
+    different months and have their own missing rate (about 30% on
+    average), so the panel is as sparse as the real one. Output depends
+    on `seed` and `batch_permnos` only.
+    """
+
+    months = _months(start, end)
+    signals = signal_names(n_signals)
+    first, missing = _signal_traits(n_signals, len(months), seed)
+    for b, lo in enumerate(range(0, n_permnos, batch_permnos)):
+        rng = np.random.default_rng([seed, 1, b])
+        n = min(batch_permnos, n_permnos - lo)
+        born = rng.integers(0, len(months), n)
+        life = np.minimum(rng.geometric(1 / 120, n), len(months) - born)
+        permno = np.repeat(np.arange(10000 + lo, 10000 + lo + n), life)
+        idx = np.repeat(born - np.cumsum(life) + life, life) + np.arange(
+            life.sum())
+        values = rng.standard_normal((len(idx), n_signals))
+        values[(rng.random(values.shape) < missing)
+               | (idx[:, None] < first)] = np.nan
+        yield (
+            pl.DataFrame({
+                'permno': permno.astype(np.int32),
+                'yyyymm': months[idx].astype(np.int32),
+                **{s: values[:, j] for j, s in enumerate(signals)}})
+            .with_columns(pl.col(signals).fill_nan(None))
+            .filter(pl.any_horizontal(pl.col(signals).is_not_null()))
+        )
+
+
+def portfolio_panel(signals, n_ports=10, start=192601, end=202312, seed=0):
+    """
+    Yields portfolio returns shaped like PredictorAltPorts_*, one signal at
+    a time: signalname, port ('01'... and 'LS'), date, ret, signallag,
+    Nlong and Nshort (zero except for LS), sorted by signalname, port and
+    date.
+    """
+
+    months = _months(start, end)
+    first, _ = _signal_traits(len(signals), len(months), seed)
+    ports = [f'{i:02d}' for i in range(1, n_ports + 1)] + ['LS']
+    for j, s in enumerate(signals):
+        rng = np.random.default_rng([seed, 2, n_ports, j])
+        m = months[first[j]:]
+        n = len(m) * len(ports)
+        yield (
+            pl.DataFrame({
+                'signalname': [s] * n,
+                'port': np.repeat(ports, len(m)),
+                'yyyymm': np.tile(m, len(ports)),
+                'ret': rng.normal(1, 6, n),
+                'signallag': rng.standard_normal(n),
+                'Nlong': rng.integers(20, 800, n),
+                'Nshort': rng.integers(20, 800, n)})
+            .select(
+                'signalname', 'port',
+                _month_end(pl.col('yyyymm')).alias('date'),
+                'ret', 'signallag', 'Nlong',
+                pl.when(pl.col('port') == 'LS').then(pl.col('Nshort'))
+                .otherwise(0).alias('Nshort'))
+        )
+
+
+def signal_doc(signals, seed=0):
+    """The SignalDoc.csv columns read by the package, in their order."""
+
+    rng = np.random.default_rng([seed, 3])
+    n = len(signals)
+    return pl.DataFrame({
+        'Acronym': signals,
+        'Cat.Signal': ['Predictor'] * n,
+        'Predictability in OP': ['1_clear'] * n,
+        # About the shares of the real doc
+        'Signal Rep Quality': rng.choice(
+            ['1_good', '2_fair', '3_distant'], n, p=[0.7, 0.25, 0.05]),
+        'Sign': rng.choice([-1, 1], n),
+        'T-Stat': rng.gamma(3, 1.4, n).round(2)})
+
+
+def write_csv(path, frames, zip_name=None, compresslevel=6):
+    """
+    Streams frames into one csv, or into the entry `zip_name` of a zip.
+
+    Only one frame is held in memory at a time; zip entries are written
+    with Zip64 so they may exceed 4 GB; deflating takes most of the time,
+    which a lower `compresslevel` cuts. Returns the number of rows.
+    """
+
+    rows = 0
+    with open(path, 'wb') as f:
+        out = f
+        if zip_name is not None:
+            archive = zipfile.ZipFile(
+                f, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+            out = archive.open(zip_name, 'w', force_zip64=True)
+        for i, df in enumerate(frames):
+            buf = io.BytesIO()
+            # Seven decimals, as in the released files
+            df.write_csv(buf, include_header=i == 0, float_precision=7)
+            out.write(buf.getvalue())
+            rows += len(df)
+        if zip_name is not None:
+            out.close()
+            archive.close()
+    return rows
+
+
+def write_release(path, n_permnos=30_000, n_signals=209, start=192601,
+                  end=202312, alt_ports=('Deciles', 'Quintiles'),
+                  individual=True, batch_permnos=1000, compresslevel=6,
+                  seed=0):
+    """
+    Writes a synthetic data release in the formats the loaders read.
+
+    Files are named as on the Drive: SignalDoc.csv, PredictorPortsFull.csv,
+    PredictorAltPorts_<name>.zip for `alt_ports` (keys of ALT_PORTS),
+    signed_predictors_dl_wide.zip and, with `individual`, one
+    Predictors/<signal>.csv per signal. Everything is streamed, so the
+    size is limited by disk only. Returns {file: rows}.
+    """
+
+    os.makedirs(path, exist_ok=True)
+    signals = signal_names(n_signals)
+    res = {}
+    signal_doc(signals, seed).write_csv(os.path.join(path, 'SignalDoc.csv'))
+    res['SignalDoc.csv'] = n_signals
+    res['PredictorPortsFull.csv'] = write_csv(
+        os.path.join(path, 'PredictorPortsFull.csv'),
+        portfolio_panel(signals, 5, start, end, seed))
+    for name in alt_ports:
+        file = f'PredictorAltPorts_{name}'
+        res[f'{file}.zip'] = write_csv(
+            os.path.join(path, f'{file}.zip'),
+            portfolio_panel(signals, ALT_PORTS[name], start, end, seed),
+            f'{file}.csv', compresslevel)
+
+    panel = signal_panel(
+        n_permnos, n_signals, start, end, batch_permnos, seed)
+    if individual:
+        os.makedirs(os.path.join(path, 'Predictors'), exist_ok=True)
+        files = {
+            s: open(os.path.join(path, 'Predictors', f'{s}.csv'), 'wb')
+            for s in signals}
+
+        def _tee(frames):
+            # Appends each batch to the individual signal files on the way
+            for i, df in enumerate(frames):
+                for s, f in files.items():
+                    df.select('permno', 'yyyymm', s).drop_nulls().write_csv(
+                        f, include_header=i == 0, float_precision=7)
+                yield df
+
+        panel = _tee(panel)
+    try:
+        res['signed_predictors_dl_wide.zip'] = write_csv(
+            os.path.join(path, 'signed_predictors_dl_wide.zip'), panel,
+            'signed_predictors_dl_wide.csv', compresslevel)
+    finally:
+        if individual:
+            for f in files.values():
+                f.close()
+    return res
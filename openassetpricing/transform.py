@@ -0,0 +1,56 @@
+import polars as pl
+from .utils import _check_backend, _to_lazy, _convert_to_backend
+
+
+def _zscore(col, date, limits):
+    return (col - col.mean().over(date)) / col.std().over(date)
+
+
+def _rank(col, date, limits):
+    # Ranks mapped to [-1, 1] within the month; ties get the average rank
+    n = col.count().over(date)
+    return col.rank('average').over(date) * 2 / (n + 1) - 1
+
+
+def _winsorize(col, date, limits):
+    return col.clip(
+        col.quantile(limits[0]).over(date), col.quantile(limits[1]).over(date))
+
+
+METHODS = {
+    'zscore': _zscore,
+    'rank': _rank,
+    'winsorize': _winsorize,
+}
+
+
+def cross_section(df, x, method='zscore', date='yyyymm', limits=(0.01, 0.99),
+                  fill_null=None, df_backend='polars'):
+    """
+    Per-month cross-sectional transform of every signal in `x`.
+
+    `method` is 'zscore' (monthly mean and standard deviation), 'rank'
+    (monthly ranks scaled to [-1, 1]) or 'winsorize' (clipped at the
+    monthly `limits` quantiles). Only stocks in the same month are used,
+    so there is no look-ahead. Nulls stay null unless `fill_null` is set.
+
+    All signals go into one lazy with_columns, but each `.over(date)` is
+    its own window aggregation and join back, so the work grows with the
+    number of signals, and window expressions need every row of a month,
+    which polars executes on the full panel in memory. A LazyFrame in
+    gives a LazyFrame out, so it can still be sunk with
+    `.sink_parquet(path)`, but peak memory is about that of the panel.
+    """
+
+    _check_backend(df_backend)
+    if method not in METHODS:
+        raise ValueError(f'Unsupported method. Choose one of {list(METHODS)}.')
+
+    func = METHODS[method]
+    exprs = [func(pl.col(i), date, limits).alias(i) for i in x]
+    if fill_null is not None:
+        exprs = [i.fill_null(fill_null) for i in exprs]
+    res = _to_lazy(df).with_columns(exprs)
+    if isinstance(df, pl.LazyFrame):
+        return res
+    return _convert_to_backend(res.collect(engine='streaming'), df_backend)
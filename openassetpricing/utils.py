@@ -0,0 +1,58 @@
+import polars as pl
+import pandas as pd
+
+
+def _check_backend(df_backend):
+    if df_backend not in ['polars', 'pandas']:
+        raise ValueError("Unsupported backend. Choose 'polars' or 'pandas'.")
+
+
+def _to_lazy(df):
+    """Accepts polars (eager or lazy) or pandas input and returns a LazyFrame."""
+
+    if isinstance(df, pl.LazyFrame):
+        return df
+    if isinstance(df, pl.DataFrame):
+        return df.lazy()
+    if isinstance(df, pd.DataFrame):
+        return pl.from_pandas(df).lazy()
+    raise TypeError('Input must be a polars or pandas dataframe.')
+
+
+def _convert_to_backend(df, df_backend):
+    if df_backend == 'polars':
+        return df
+    if df_backend == 'pandas':
+        return df.to_pandas()
+
+
+def _release_key(release):
+    # Older releases are named by year only (2023); pad to yyyymm
+    return str(release).ljust(6, '0')
+
+
+def _chunk_list(items, n_chunks):
+    n_chunks = max(1, min(n_chunks, len(items)))
+    size = -(-len(items) // n_chunks)
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+
+def _batches(data, x, batch_size):
+    """Yields Arrow record batches of the `x` columns of the panel."""
+
+    if isinstance(data, pl.LazyFrame):
+        lf = data.select(x)
+        if hasattr(lf, 'collect_batches'):
+            chunks = lf.collect_batches(chunk_size=batch_size)
+        else:
+            n = lf.select(pl.len()).collect().item()
+            chunks = (
+                lf.slice(i, batch_size).collect()
+                for i in range(0, n, batch_size))
+        for chunk in chunks:
+            yield from chunk.to_arrow().to_batches(max_chunksize=batch_size)
+    else:
+        if isinstance(data, pd.DataFrame):
+            data = pl.from_pandas(data[x])
+        table = data.select(x).to_arrow()
+        yield from table.to_batches(max_chunksize=batch_size)
@@ -16,4 +16,8 @@ setup(
         'pyarrow',
         'beautifulsoup4'
     ],
+    extras_require={
+        'async': ['httpx'],
+        'test': ['pytest', 'pytest-benchmark'],
+    },
 )
@@ -0,0 +1,92 @@
+"""
+Fixtures of the benchmark suite: a fake Drive release of synthetic data.
+
+Run with `pytest tests/bench`. The panel size is set by the environment:
+OAP_BENCH_PERMNOS (default 500), OAP_BENCH_MONTHS (120) and
+OAP_BENCH_SIGNALS (20). Data comes from openassetpricing.synthetic and is
+streamed from disk, so large panels do not have to fit in memory.
+"""
+import os
+import zipfile
+import polars as pl
+import pytest
+import openassetpricing as oap
+from openassetpricing import gdrive_parse, synthetic
+from openassetpricing.openap_download import OpenAP
+from .fake_drive import FakeDrive
+from .helpers import MONTHS, PERMNOS, RELEASE, SIGNALS
+
+
+def _start(months, end=202312):
+    idx = end // 100 * 12 + end % 100 - months
+    return idx // 12 * 100 + idx % 12 + 1
+
+
+def _release(drive, path):
+    release = drive.folder('2024.10', drive.root)
+    drive.file('SignalDoc.csv', os.path.join(path, 'SignalDoc.csv'), release)
+    port_dir = drive.folder('Portfolios', release)
+    op = drive.folder('Full Sets OP', port_dir)
+    drive.file(
+        'PredictorPortsFull.csv',
+        os.path.join(path, 'PredictorPortsFull.csv'), op)
+    alt = drive.folder('Full Sets Alt', port_dir)
+    for name, confirm in [('Deciles', True), ('Quintiles', False)]:
+        file = f'PredictorAltPorts_{name}.zip'
+        drive.file(file, os.path.join(path, file), alt, confirm=confirm)
+    char = drive.folder('Firm Level Characteristics', release)
+    full = drive.folder('Full Sets', char)
+    drive.file(
+        'signed_predictors_dl_wide.zip',
+        os.path.join(path, 'signed_predictors_dl_wide.zip'), full,
+        confirm=True)
+    indiv = drive.folder('Predictors', drive.folder('Individual', char))
+    for i in sorted(os.listdir(os.path.join(path, 'Predictors'))):
+        drive.file(i, os.path.join(path, 'Predictors', i), indiv)
+    return release
+
+
+@pytest.fixture(scope='session')
+def data(tmp_path_factory):
+    """Signals, rows per file and the folder of a synthetic release."""
+
+    path = tmp_path_factory.mktemp('release')
+    rows = synthetic.write_release(
+        path, n_permnos=PERMNOS, n_signals=SIGNALS, start=_start(MONTHS),
+        batch_permnos=100)
+    with zipfile.ZipFile(path / 'signed_predictors_dl_wide.zip') as f:
+        keys = pl.read_csv(
+            f.read(f.filelist[0]), columns=['permno', 'yyyymm'],
+            schema_overrides={'permno': pl.Int32, 'yyyymm': pl.Int32})
+    crsp3 = keys.with_columns(
+        Price=pl.lit(1.0), Size=pl.lit(2.0), STreversal=pl.lit(0.0))
+    return {
+        'signals': synthetic.signal_names(SIGNALS), 'rows': rows,
+        'path': path, 'crsp3': crsp3}
+
+
+@pytest.fixture(scope='session')
+def drive(data):
+    drive = FakeDrive()
+    _release(drive, data['path'])
+    drive.start()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(gdrive_parse, 'DRIVE_URL', drive.url)
+        yield drive
+    drive.stop()
+
+
+@pytest.fixture
+def registry(drive, tmp_path):
+    return oap.ReleaseRegistry(
+        root_url=drive.folder_url(drive.root), cache_dir=tmp_path)
+
+
+@pytest.fixture
+def openap(drive, data, registry, monkeypatch):
+    # CRSP signals come from WRDS; the synthetic ones stand in for them
+    monkeypatch.setattr(
+        OpenAP, '_dl_signal_crsp3', lambda self: data['crsp3'])
+    instrument = oap.Instrument()
+    return OpenAP(RELEASE, registry=registry, instrument=instrument)
+
@@ -0,0 +1,177 @@
+"""
+Local HTTP server that mimics the Google Drive pages read by
+openassetpricing: folder pages, the embedded folder view of the individual
+signals, virus-scan confirmation pages and file downloads (with HEAD and
+Range requests).
+"""
+import http.server
+import itertools
+import json
+import os
+import threading
+import urllib.parse
+
+
+FOLDER = 'application/vnd.google-apps.folder'
+
+
+class FakeDrive:
+    """
+    A tree of folders and files served on 127.0.0.1.
+
+    Build it with `folder` and `file`, then `start` it; `url` is the host
+    to use as openassetpricing.gdrive_parse.DRIVE_URL. A file is bytes or
+    the path of a file on disk, which is streamed. Files added with
+    `confirm=True` answer /uc with a confirmation page, as large Drive
+    files do. `hits` counts the requests per path.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count()
+        self.folders = {}
+        self.files = {}
+        self.hits = {}
+        self.server = None
+        self.root = self.folder('openassetpricing')
+
+    def _id(self, prefix):
+        # Individual signal ids must be at least 25 characters long
+        return f'{prefix}{next(self._ids):024d}'
+
+    def folder(self, name, parent=None):
+        folder_id = self._id('d')
+        self.folders[folder_id] = {'name': name, 'children': []}
+        if parent is not None:
+            self.folders[parent]['children'].append(folder_id)
+        return folder_id
+
+    def file(self, name, data, parent, confirm=False):
+        file_id = self._id('f')
+        self.files[file_id] = {
+            'name': name, 'data': data, 'confirm': confirm}
+        self.folders[parent]['children'].append(file_id)
+        return file_id
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def folder_url(self, folder_id):
+        return f'{self.url}/drive/folders/{folder_id}'
+
+    def start(self):
+        handler = type('Handler', (_Handler,), {'drive': self})
+        self.server = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _folder_page(self, folder_id):
+        folder = self.folders[folder_id]
+        entries = []
+        for i in folder['children']:
+            if i in self.folders:
+                entries.append([i, None, self.folders[i]['name'], FOLDER])
+            else:
+                entries.append([i, None, self.files[i]['name'], 'text/csv'])
+        # Parsed as the second js string of the _DRIVE_ivd script
+        encoded = json.dumps([entries]).replace('\\', '\\\\')
+        return (
+            f"<html><head><title>{folder['name']} - Google Drive</title>"
+            "</head><body><script>window['_DRIVE_ivd'] = "
+            f"'{encoded}';</script></body></html>")
+
+    def _embedded_page(self, folder_id):
+        rows = []
+        for i in self.folders[folder_id]['children']:
+            if i in self.files:
+                rows.append(
+                    f'<a href="https://drive.google.com/file/d/{i}/view'
+                    f'?usp=drive_web"><div class="flip-entry-title">'
+                    f"{self.files[i]['name']}</div></a>")
+        return '<html><body>' + ''.join(rows) + '</body></html>'
+
+    def _confirm_page(self, file_id):
+        return (
+            '<html><body>\n<form id="download-form" '
+            f'action="{self.url}/download" method="get">'
+            f'<input type="hidden" name="id" value="{file_id}">'
+            '<input type="hidden" name="confirm" value="t"></form>\n'
+            '</body></html>')
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    drive = None
+
+    def log_message(self, *args):
+        pass
+
+    def _route(self):
+        parts = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parts.query)
+        path = parts.path
+        drive = self.drive
+        drive.hits[path] = drive.hits.get(path, 0) + 1
+        if path.startswith('/drive/folders/'):
+            return 'text/html', drive._folder_page(
+                path.rsplit('/', 1)[1]).encode()
+        if path == '/embeddedfolderview':
+            return 'text/html', drive._embedded_page(query['id'][0]).encode()
+        if path in ['/uc', '/download']:
+            file = drive.files[query['id'][0]]
+            if path == '/uc' and file['confirm']:
+                return 'text/html', drive._confirm_page(
+                    query['id'][0]).encode()
+            return 'application/octet-stream', file['data']
+        return None, None
+
+    def _send(self, body_out):
+        try:
+            content_type, body = self._route()
+        except KeyError:
+            content_type = None
+        if content_type is None:
+            self.send_error(404)
+            return
+        on_disk = not isinstance(body, bytes)
+        size = os.path.getsize(body) if on_disk else len(body)
+        status, headers = 200, {}
+        start, end = 0, size - 1
+        spec = self.headers.get('Range')
+        if spec and content_type != 'text/html':
+            start, end = spec.removeprefix('bytes=').split('-')
+            if start == '':
+                start, end = max(0, size - int(end)), size - 1
+            start, end = int(start), min(
+                int(end) if end else size - 1, size - 1)
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if not body_out:
+            return
+        if not on_disk:
+            self.wfile.write(body[start:end + 1])
+            return
+        with open(body, 'rb') as f:
+            f.seek(start)
+            left = end - start + 1
+            while left > 0:
+                chunk = f.read(min(left, 1 << 20))
+                self.wfile.write(chunk)
+                left -= len(chunk)
+
+    def do_GET(self):
+        self._send(True)
+
+    def do_HEAD(self):
+        self._send(False)
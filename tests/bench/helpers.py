@@ -0,0 +1,25 @@
+"""Settings and helpers shared by the benchmark fixtures and tests."""
+import os
+
+
+RELEASE = '202410'
+PERMNOS = int(os.environ.get('OAP_BENCH_PERMNOS', 500))
+MONTHS = int(os.environ.get('OAP_BENCH_MONTHS', 120))
+SIGNALS = int(os.environ.get('OAP_BENCH_SIGNALS', 20))
+# Portfolio files by download name
+PORT_FILES = {
+    'op': 'PredictorPortsFull.csv',
+    'deciles_ew': 'PredictorAltPorts_Deciles.zip',
+    'quintiles_ew': 'PredictorAltPorts_Quintiles.zip'}
+
+
+def stage_times(benchmark, instrument):
+    """Stores the time of each stage of the last round in extra_info."""
+
+    events = [i for i in instrument.events if i['stage'] != 'total']
+    for i in events:
+        key = f"{i['stage']}_s"
+        benchmark.extra_info[key] = (
+            benchmark.extra_info.get(key, 0) + i['seconds'])
+    benchmark.extra_info['peak_rss_mb'] = max(
+        (i['peak_rss'] for i in instrument.events), default=0) / 1e6
@@ -0,0 +1,194 @@
+"""
+End-to-end download benchmarks against the fake Drive server.
+
+Each benchmark also stores the time of every stage of its last round
+(network, decompress, parse, cast, join, sort, ...) in extra_info. Save a
+run with --benchmark-autosave and compare later runs with
+--benchmark-compare --benchmark-compare-fail=mean:10%.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import openassetpricing as oap
+from openassetpricing.openap_download import OpenAP
+from .helpers import PORT_FILES, RELEASE, stage_times
+
+
+def _run(benchmark, openap, fn):
+    def round_():
+        openap.instrument.reset()
+        return fn()
+
+    res = benchmark(round_)
+    stage_times(benchmark, openap.instrument)
+    return res
+
+
+def test_startup(benchmark, drive, registry, openap):
+    res = _run(
+        benchmark, openap,
+        lambda: OpenAP(RELEASE, registry=registry,
+                       instrument=openap.instrument))
+    assert res.release == RELEASE
+    assert len(res.signal_sign) == len(res.individual_signal_id_map)
+
+
+@pytest.mark.parametrize('data_name', ['op', 'quintiles_ew', 'deciles_ew'])
+def test_dl_port(benchmark, data, openap, data_name):
+    res = _run(benchmark, openap, lambda: openap.dl_port(data_name, 'polars'))
+    assert res.height == data['rows'][PORT_FILES[data_name]]
+
+
+def test_dl_port_predictor(benchmark, data, openap):
+    signals = data['signals'][:2]
+    res = _run(
+        benchmark, openap, lambda: openap.dl_port('op', 'pandas', signals))
+    assert sorted(res['signalname'].unique()) == signals
+
+
+def test_dl_all_signals(benchmark, data, openap):
+    res = _run(benchmark, openap, lambda: openap.dl_all_signals('polars'))
+    assert res.height == data['rows']['signed_predictors_dl_wide.zip']
+    assert res.width == len(data['signals']) + 5
+
+
+def test_dl_all_signals_predictor(benchmark, data, openap):
+    signals = data['signals'][:3]
+    res = _run(
+        benchmark, openap, lambda: openap.dl_all_signals('polars', signals))
+    assert res.columns == ['permno', 'yyyymm', *signals]
+
+
+def test_dl_all_signals_cached(benchmark, data, openap, tmp_path,
+                               monkeypatch):
+    crsp3 = OpenAP._dl_signal_crsp3
+
+    def _no_wrds(self):
+        raise AssertionError('WRDS is only needed for the CRSP signals')
+
+    # The cache holds the Drive panel only
+    monkeypatch.setattr(OpenAP, '_dl_signal_crsp3', _no_wrds)
+    openap.cache_dir = str(tmp_path / 'cache')
+    signals = data['signals'][:3]
+    openap.dl_all_signals('polars', signals[:1])
+    res = _run(
+        benchmark, openap, lambda: openap.dl_all_signals('polars', signals))
+    assert res.columns == ['permno', 'yyyymm', *signals]
+    assert 'network_s' not in benchmark.extra_info
+
+    monkeypatch.setattr(OpenAP, '_dl_signal_crsp3', crsp3)
+    res = openap.dl_all_signals('polars')
+    assert res.width == len(data['signals']) + 5
+    assert res.columns[-3:] == ['Price', 'Size', 'STreversal']
+
+
+def test_dl_signal(benchmark, data, openap):
+    signals = data['signals'][:3]
+    res = _run(
+        benchmark, openap, lambda: openap.dl_signal('polars', signals))
+    assert res.columns == ['permno', 'yyyymm', *signals]
+
+
+def test_plan(benchmark, data, openap):
+    n = data['rows']['signed_predictors_dl_wide.zip']
+    res = _run(benchmark, openap, lambda: openap.plan('firm_char'))
+    assert abs(res.get_column('rows')[0] - n) / n < 0.05
+
+
+def _threads(fn, n):
+    # Starts n calls of fn at once
+    barrier = threading.Barrier(n)
+
+    def _call():
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(n) as ex:
+        return list(ex.map(lambda _: _call(), range(n)))
+
+
+@pytest.mark.parametrize('cached', [False, True])
+def test_dl_port_coalesced(benchmark, data, openap, monkeypatch, tmp_path,
+                           cached):
+    # Eight threads ask for one file while its download is still running
+    zip_source = OpenAP._zip_source
+
+    def _slow(self, url):
+        time.sleep(0.2)
+        return zip_source(self, url)
+
+    def _network():
+        return sum(
+            i['stage'] == 'network' for i in openap.instrument.events)
+
+    def _many():
+        return _threads(
+            lambda: openap.dl_port('deciles_ew', 'polars', signals), 8)
+
+    monkeypatch.setattr(OpenAP, '_zip_source', _slow)
+    signals = data['signals'][:2]
+    if cached:
+        # The cache is filled by one download, then read by every thread
+        openap.cache_dir = str(tmp_path / 'cache')
+        _many()
+        assert _network() == 1
+    res = _run(benchmark, openap, _many)
+    assert _network() == (0 if cached else 1)
+    assert all(i.equals(res[0]) for i in res)
+    assert sorted(res[0]['signalname'].unique()) == signals
+
+
+def test_adl_port_concurrent(benchmark, data, openap):
+    # Four downloads sharing one event loop
+    names = ['op', 'quintiles_ew', 'deciles_ew', 'op']
+
+    async def _many():
+        return await asyncio.gather(
+            *(openap.adl_port(i, 'polars') for i in names))
+
+    res = _run(benchmark, openap, lambda: asyncio.run(_many()))
+    assert [i.height for i in res] == [
+        data['rows'][PORT_FILES[i]] for i in names]
+
+
+def test_adl_all_signals(benchmark, data, openap):
+    res = _run(
+        benchmark, openap,
+        lambda: asyncio.run(openap.adl_all_signals('polars')))
+    assert res.height == data['rows']['signed_predictors_dl_wide.zip']
+
+
+def test_adl_all_signals_crsp(benchmark, data, openap):
+    # The CRSP signals come from WRDS: no Drive download
+    res = _run(
+        benchmark, openap,
+        lambda: asyncio.run(openap.adl_all_signals('polars', ['Price'])))
+    assert res.equals(openap.dl_all_signals('polars', ['Price']))
+    assert 'network_s' not in benchmark.extra_info
+
+
+def test_adl_signal(benchmark, data, openap):
+    signals = data['signals'][:3]
+    res = _run(
+        benchmark, openap,
+        lambda: asyncio.run(openap.adl_signal('polars', signals)))
+    assert res.equals(openap.dl_signal('polars', signals))
+
+
+def test_acreate(benchmark, registry, openap):
+    res = _run(
+        benchmark, openap,
+        lambda: asyncio.run(OpenAP.acreate(RELEASE, registry=registry)))
+    assert res.release == RELEASE
+
+
+def test_composite_from_openap(benchmark, openap):
+    # The synthetic signal doc and portfolios have the columns it reads
+    res = _run(
+        benchmark, openap,
+        lambda: oap.CompositeSignal.from_openap(
+            openap, 'deciles_ew', min_tstat=2))
+    assert res.signals
+    assert res.composite.height > 0
@@ -0,0 +1,84 @@
+"""
+Fixtures of the unit tests: small synthetic panels built in memory.
+
+Run with `pytest tests/unit`. Reference implementations (statsmodels,
+scipy) are optional; tests that need one are skipped without it.
+"""
+from datetime import date
+import numpy as np
+import polars as pl
+import pytest
+
+
+def month_dates(n, start=2000):
+    return [date(start + i // 12, i % 12 + 1, 1) for i in range(n)]
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def factor_port(rng):
+    """Returns of two LS portfolios and the two factors they load on."""
+
+    n = 120
+    factors = pl.DataFrame({
+        'date': month_dates(n), 'mkt': rng.normal(size=n),
+        'smb': rng.normal(size=n)})
+    port = pl.concat(
+        pl.DataFrame({
+            'signalname': name, 'port': 'LS', 'date': month_dates(n),
+            'ret': alpha + factors['mkt'] * beta + rng.normal(size=n)})
+        for name, alpha, beta in [('a', 0.5, 1.0), ('b', -0.2, 0.3)])
+    return port, factors
+
+
+@pytest.fixture
+def ls_port(rng):
+    """Builds long LS returns of `k` signals over `n` months, with gaps."""
+
+    def make(n, k):
+        ret = rng.normal(size=(n, k))
+        ret[rng.random((n, k)) < 0.1] = np.nan
+        return pl.DataFrame({
+            'signalname': np.repeat([f's{i}' for i in range(k)], n),
+            'port': 'LS',
+            'date': month_dates(n) * k,
+            'ret': ret.T.ravel()}).drop_nans('ret')
+
+    return make
+
+
+@pytest.fixture
+def crsp(rng):
+    """Int64 CRSP-like returns of 20 permnos over 2001, with a crash."""
+
+    months = [200100 + i for i in range(1, 13)]
+    df = pl.DataFrame({
+        'permno': np.repeat(np.arange(1, 21), 12),
+        'yyyymm': months * 20,
+        'ret': rng.normal(0.01, 0.05, 240)},
+        schema_overrides={'permno': pl.Int64, 'yyyymm': pl.Int64})
+    return df.with_columns(
+        ret=pl.when((pl.col('permno') == 1) & (pl.col('yyyymm') == 200106))
+        .then(-0.6).otherwise('ret'))
+
+
+@pytest.fixture
+def signal_panel(rng):
+    """Int32 panel of 50 permnos over 2001-2002 with ret and s0-s2."""
+
+    n = 50 * 24
+    df = pl.DataFrame({
+        'permno': np.repeat(np.arange(1, 51), 24),
+        'yyyymm': [y * 100 + m for y in [2001, 2002]
+                   for m in range(1, 13)] * 50,
+        'ret': rng.normal(0.01, 0.1, n)},
+        schema_overrides={'permno': pl.Int32, 'yyyymm': pl.Int32})
+    for i in range(3):
+        s = rng.normal(size=n)
+        s[rng.random(n) < 0.1] = np.nan
+        df = df.with_columns(pl.Series(f's{i}', s).fill_nan(None))
+    return df
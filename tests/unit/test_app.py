@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import polars as pl
+import pytest
+import openassetpricing as oap
+from .conftest import month_dates
+
+pytest.importorskip('plotly')
+testing = pytest.importorskip('streamlit.testing.v1')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def _app(monkeypatch, store_dir, analysis=None):
+    # Relative paths of app.py (dashboard_ref) are from the repo root
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv('OAP_ARTIFACT_DIR', str(store_dir))
+    # No Parquet cache: the dataset browser only lists the stored panel
+    monkeypatch.setattr(oap, 'DEFAULT_CACHE_DIR', str(store_dir / 'cache'))
+    at = testing.AppTest.from_file('app.py', default_timeout=120)
+    at.run()
+    assert not at.exception
+    if analysis is not None:
+        box = next(i for i in at.selectbox if i.label == 'Choose Analysis')
+        box.select(analysis).run()
+        assert not at.exception
+    return at
+
+
+def _labels(widgets):
+    return [i.label for i in widgets]
+
+
+@pytest.fixture
+def store_dir(tmp_path, signal_panel, rng):
+    store = oap.ArtifactStore(str(tmp_path))
+    n = 24
+    store.write('predictions', pl.DataFrame({
+        'permno': np.repeat([1, 2], n), 'date': month_dates(n) * 2,
+        'ret': rng.normal(size=2 * n),
+        'LinearRegression': rng.normal(size=2 * n)}), '202410')
+    store.write(
+        'panel', signal_panel.select('permno', 'yyyymm', 'ret', 's0', 's1'),
+        '202410')
+    store.write('regime_importance', pl.DataFrame({
+        'Feature': ['s0', 's1'], '1990s': [0.7, 0.3],
+        '2000s': [0.4, 0.6]}), '202410')
+    return tmp_path
+
+
+def test_live_charts(monkeypatch, store_dir):
+    at = _app(monkeypatch, store_dir)
+    # A range slider for the one model with stored predictions
+    assert _labels(at.select_slider) == ['Date range']
+
+    at = _app(monkeypatch, store_dir, 'Signal Decay')
+    # After the Signals and Columns of the dataset browser
+    assert _labels(at.multiselect) == [
+        'Signals', 'Columns', 'Signals', 'Horizons (months)']
+    assert at.multiselect[2].value == ['s0', 's1']
+    at.multiselect[3].set_value([1, 2]).run()
+    assert not at.exception
+
+    at = _app(monkeypatch, store_dir, 'Regime-Aware Models')
+    assert _labels(at.slider) == ['Top features']
+    at.slider[0].set_value(5).run()
+    assert not at.exception
+
+
+def test_static_fallback(monkeypatch, tmp_path):
+    # An empty store shows the pictures of dashboard_ref
+    for analysis in [None, 'Signal Decay', 'Regime-Aware Models']:
+        at = _app(monkeypatch, tmp_path / 'empty', analysis)
+        assert not at.select_slider and not at.slider
+        assert not at.multiselect
@@ -0,0 +1,75 @@
+import json
+import os
+from types import SimpleNamespace
+import pandas as pd
+import polars as pl
+import pytest
+import openassetpricing as oap
+
+
+def test_store(tmp_path):
+    store = oap.ArtifactStore(str(tmp_path / 'artifacts'))
+    assert store.releases() == [] and store.latest() is None
+    assert store.manifest() == {
+        'release': None, 'version': None, 'artifacts': {}}
+
+    df = pl.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+    store.write('t', df, '202410', signals=['a'])
+    version = store.version('202410')
+    entry = store.manifest('202410')['artifacts']['t']
+    assert entry['rows'] == 3 and entry['columns'] == ['a', 'b']
+    assert entry['signals'] == ['a'] and len(version) == 16
+    assert store.read('t').equals(df)
+    assert isinstance(store.read('t', df_backend='pandas'), pd.DataFrame)
+
+    # The same table again keeps the version, a new one changes it
+    store.write('t', df.lazy(), '202410')
+    assert store.version('202410') == version
+    store.write('u', df.head(1), '202410')
+    assert store.version('202410') != version
+    assert sorted(os.listdir(tmp_path / 'artifacts' / '202410')) == [
+        'manifest.json', 't.parquet', 'u.parquet']
+
+    # Year-only releases sort before the months of that year
+    store.write('t', df, '2024')
+    store.write('t', df, '202308')
+    assert store.releases() == ['202308', '2024', '202410']
+    assert store.latest() == '202410'
+    assert store.path('u', '2024') is None
+    with pytest.raises(ValueError, match='not available for release 2024'):
+        store.read('u', '2024')
+    with open(tmp_path / 'artifacts' / '2024' / 'manifest.json') as f:
+        assert json.load(f)['release'] == '2024'
+
+
+def test_build_artifacts(tmp_path, ls_port, signal_panel):
+    port = ls_port(36, 3)
+    doc = pl.DataFrame({
+        'Acronym': ['s0', 's1', 's2', 's3'],
+        'Signal Rep Quality': ['1_good', '1_good', '1_good', '2_fair'],
+        'T-Stat': ['4.0', '2.0', '6.0', '5.0']})
+    requested = []
+
+    def dl_port(data_name, df_backend, predictor):
+        requested.append(predictor)
+        return port.filter(pl.col('signalname').is_in(predictor))
+
+    openap = SimpleNamespace(
+        release='202410', dl_signal_doc=lambda df_backend: doc,
+        dl_port=dl_port)
+    store = oap.ArtifactStore(str(tmp_path))
+    manifest = oap.build_artifacts(store, openap)
+    assert sorted(manifest['artifacts']) == ['composite', 'signaldoc']
+    # T-Stat above 3 among the good signals
+    assert requested == [['s0', 's2']]
+    assert manifest['artifacts']['composite']['signals'] == ['s0', 's2']
+
+    panel = signal_panel.with_columns(
+        date=pl.col('yyyymm').cast(pl.String).str.to_date('%Y%m'))
+    manifest = oap.build_artifacts(
+        store, openap, panel, ['s0', 's1'])
+    assert sorted(manifest['artifacts']) == [
+        'composite', 'decay', 'merged_head', 'panel', 'signaldoc']
+    assert store.read('panel').columns == [
+        'permno', 'yyyymm', 'ret', 's0', 's1']
+    assert store.read('decay')['Signal'].to_list() == ['s0', 's1']
@@ -0,0 +1,88 @@
+import numpy as np
+import polars as pl
+import pytest
+import openassetpricing as oap
+from openassetpricing import matrix
+from openassetpricing.backtest import _folds
+
+linear_model = pytest.importorskip('sklearn.linear_model')
+
+X = ['s0', 's1', 's2']
+
+
+@pytest.fixture
+def panel(signal_panel):
+    # Shuffled, so the sort by date matters
+    return (
+        signal_panel.with_columns(pl.col(X).fill_null(0.0))
+        .sample(fraction=1.0, shuffle=True, seed=1))
+
+
+def _reference(panel, min_train, step, window=None):
+    # Refit month by month with numpy least squares
+    data = panel.sort('yyyymm', maintain_order=True)
+    months = data['yyyymm'].unique().sort().to_list()
+    pred = []
+    for i in range(min_train, len(months), step):
+        train = months[0 if window is None else max(0, i - window):i]
+        test = months[i:i + step]
+        tr = data.filter(pl.col('yyyymm').is_in(train))
+        te = data.filter(pl.col('yyyymm').is_in(test))
+        a = np.column_stack([np.ones(len(tr)), tr.select(X).to_numpy()])
+        beta = np.linalg.lstsq(
+            a.astype(np.float32).astype(np.float64), tr['ret'].to_numpy(),
+            rcond=None)[0]
+        xx = te.select(X).to_numpy().astype(np.float32).astype(np.float64)
+        pred.append(beta[0] + xx @ beta[1:])
+    return np.concatenate(pred)
+
+
+@pytest.mark.parametrize('window', [None, 6])
+def test_walk_forward(panel, window):
+    summary, pred = oap.walk_forward(
+        panel, [linear_model.LinearRegression()], X, date='yyyymm',
+        min_train=12, step=5, window=window, n_jobs=1)
+    np.testing.assert_allclose(
+        pred['LinearRegression'], _reference(panel, 12, 5, window),
+        rtol=1e-5, atol=1e-6)
+    assert pred['yyyymm'].min() == 200201 and pred.height == 50 * 12
+    row = summary.row(0, named=True)
+    assert row['Model'] == 'LinearRegression'
+    assert row['Start Date'] == 200201 and row['End Date'] == 200212
+
+
+def test_folds():
+    dates = np.repeat([1, 2, 3, 4, 5], 2)
+    assert _folds(dates, 2, 2, None) == [((0, 4), (4, 8)), ((0, 8), (8, 10))]
+    assert _folds(dates, 2, 2, 1) == [((2, 4), (4, 8)), ((6, 8), (8, 10))]
+    assert _folds(dates, 5, 1, None) == []
+
+
+def test_models_of_one_class(panel):
+    models = [linear_model.LinearRegression(), linear_model.Ridge(alpha=1e3),
+              linear_model.Ridge(alpha=1e-6)]
+    summary, pred = oap.walk_forward(
+        panel, models, X, date='yyyymm', min_train=12, n_jobs=1)
+    assert summary['Model'].to_list() == [
+        'LinearRegression', 'Ridge_1', 'Ridge_2']
+    np.testing.assert_allclose(
+        pred['Ridge_2'], pred['LinearRegression'], rtol=1e-4, atol=1e-7)
+    assert not np.allclose(pred['Ridge_1'], pred['Ridge_2'])
+
+    with pytest.raises(ValueError, match='Not enough periods'):
+        oap.walk_forward(panel, models, X, date='yyyymm', min_train=24)
+
+
+def test_matrix_reused(panel, tmp_path, monkeypatch):
+    models = {'ols': linear_model.LinearRegression()}
+    path = str(tmp_path / 'x.npy')
+    kwargs = dict(date='yyyymm', min_train=12, step=6)
+    ref = oap.walk_forward(panel, models, X, n_jobs=1, **kwargs)
+    res = oap.walk_forward(panel, models, X, path=path, n_jobs=1, **kwargs)
+    assert res[1].equals(ref[1])
+
+    # The second call maps the same file in the worker processes
+    monkeypatch.setattr(matrix, '_write_matrix', None)
+    res = oap.walk_forward(panel, models, X, path=path, n_jobs=2, **kwargs)
+    np.testing.assert_allclose(res[1]['ols'], ref[1]['ols'])
+    assert res[1].drop('ols').equals(ref[1].drop('ols'))
@@ -0,0 +1,34 @@
+from datetime import date
+import polars as pl
+import openassetpricing as oap
+from openassetpricing.cache import write_cache
+
+
+def test_cached_port_filtered_in_scan(tmp_path, monkeypatch, capsys):
+    port = pl.DataFrame({
+        'signalname': ['a', 'a', 'b', 'c'], 'port': ['LS', '01', 'LS', 'LS'],
+        'date': [date(2000, 1, 1)] * 4, 'ret': [1.0, 2.0, 3.0, 4.0]})
+    write_cache(port, tmp_path, '202410', 'op')
+    openap = object.__new__(oap.OpenAP)
+    openap.cache_dir, openap.release, openap.instrument = (
+        tmp_path, '202410', None)
+    openap._ensure_cached = lambda data_name, source=None: None
+
+    plans = []
+    collect = pl.LazyFrame.collect
+
+    def _collect(self, *args, **kwargs):
+        plans.append(self.explain())
+        return collect(self, *args, **kwargs)
+
+    monkeypatch.setattr(pl.LazyFrame, 'collect', _collect)
+    res = openap._dl_cached('op', 'polars', ['a', 'c'])
+    assert res.equals(port.filter(pl.col('signalname') != 'b')
+                      .sort('signalname', 'port', 'date'))
+    # The predicate is pushed into the Parquet scan
+    assert 'SELECTION: col("signalname").is_in' in plans[-1]
+    assert capsys.readouterr().out == ''
+
+    res = openap._dl_cached('op', 'pandas', ['a', 'x'])
+    assert list(res['signalname'].unique()) == ['a']
+    assert 'not available' in capsys.readouterr().out
@@ -0,0 +1,73 @@
+import numpy as np
+import polars as pl
+import pytest
+from openassetpricing import CompositeSignal
+
+
+def _expanding_z(wide, min_periods):
+    # Expanding z-score of each column up to and including each month
+    res = np.full(wide.shape, np.nan)
+    for t in range(len(wide)):
+        for j in range(wide.shape[1]):
+            x = wide[:t + 1, j]
+            x = x[~np.isnan(x)]
+            if len(x) >= min_periods and not np.isnan(wide[t, j]):
+                res[t, j] = (wide[t, j] - x.mean()) / x.std(ddof=1)
+    return res
+
+
+def test_update_matches_fit(ls_port):
+    port = ls_port(60, 4)
+    full = CompositeSignal('equal', min_periods=6).fit(port)
+    cut = full.composite.get_column('date')[40]
+    inc = CompositeSignal('equal', min_periods=6).fit(
+        port.filter(pl.col('date') <= cut))
+    inc.update(port)
+    np.testing.assert_allclose(
+        inc.zscore.drop('date').to_numpy(),
+        full.zscore.drop('date').to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(
+        inc.composite.get_column('composite'),
+        full.composite.get_column('composite'), equal_nan=True)
+
+
+def test_square_zscore(ls_port):
+    # As many months as signals: the zscore must not come out transposed
+    port = ls_port(5, 5)
+    comp = CompositeSignal('equal', min_periods=2).fit(port)
+    wide = (
+        port.pivot(on='signalname', index='date', values='ret')
+        .sort('date').select(comp.signals).to_numpy())
+    np.testing.assert_allclose(
+        comp.zscore.select(comp.signals).to_numpy(),
+        _expanding_z(wide, 2), equal_nan=True)
+
+
+def test_source_required():
+    for weighting, table in [('ic', 'signal_decay'), ('hazard', 'cox_screen'),
+                             ('tstat', 'dl_signal_doc')]:
+        with pytest.raises(ValueError, match=table):
+            CompositeSignal(weighting)
+    CompositeSignal('equal')
+    CompositeSignal(lambda signals, source: {})
+
+
+def test_weights(ls_port):
+    port = ls_port(24, 3)
+    ic = pl.DataFrame(
+        {'Signal': ['s0', 's1', 's2'], 'IC_avg': [0.02, 0.06, None]})
+    comp = CompositeSignal('ic', ic).fit(port)
+    assert comp.weights == pytest.approx({'s0': 0.25, 's1': 0.75, 's2': 0.0})
+
+    # Log hazard ratios: s1 raises the hazard and gets negative weight
+    cox = pl.DataFrame({'covariate': ['s0', 's1', 's2'],
+                        'coef': [-0.3, 0.2, -0.5]})
+    comp = CompositeSignal('hazard', cox).fit(port)
+    assert comp.weights == pytest.approx({'s0': 0.3, 's1': -0.2, 's2': 0.5})
+
+    # Signed weights summing to zero are only a problem without abs
+    cox = cox.with_columns(coef=pl.Series([-0.3, 0.3, 0.0]))
+    comp = CompositeSignal('hazard', cox).fit(port)
+    assert comp.weights == pytest.approx({'s0': 0.5, 's1': -0.5, 's2': 0.0})
+    with pytest.raises(ValueError, match='sum to zero'):
+        CompositeSignal(lambda signals, source: {'s0': 1, 's1': -1}).fit(port)
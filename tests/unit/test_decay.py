@@ -0,0 +1,56 @@
+import numpy as np
+import polars as pl
+import pytest
+import openassetpricing as oap
+
+
+def _panel(crsp, rng, common):
+    # Tied signal values; missing for the same stocks as the forward
+    # returns when `common`, for other stocks otherwise
+    s = rng.integers(0, 5, len(crsp)).astype(np.float64)
+    if not common:
+        s[rng.random(len(crsp)) < 0.3] = np.nan
+    panel = crsp.with_columns(
+        s=pl.Series(s).fill_nan(None),
+        ret=pl.when(pl.col('permno') % 4 == 0).then(None)
+        .otherwise('ret'))
+    if common:
+        fwd = oap.forward_returns(panel, (1,))
+        panel = fwd.with_columns(
+            s=pl.when(pl.col('ret_1m_fwd').is_not_null()).then('s')
+        ).drop('ret_1m_fwd')
+    return panel
+
+
+@pytest.mark.parametrize('exact,common', [
+    (True, False), (False, True)])
+def test_ic_is_spearman_on_common_stocks(crsp, rng, exact, common):
+    stats = pytest.importorskip('scipy.stats')
+    panel = _panel(crsp, rng, common)
+    ic = oap.ic_series(panel, ['s'], horizons=(1,), min_obs=5, exact=exact)
+    fwd = oap.forward_returns(panel, (1,)).drop_nulls(['s', 'ret_1m_fwd'])
+    for month, ref in fwd.group_by('yyyymm'):
+        got = ic.filter(pl.col('yyyymm') == month[0])
+        assert got.get_column('nobs')[0] == len(ref)
+        if len(ref) >= 5:
+            expected = stats.spearmanr(ref['s'], ref['ret_1m_fwd'])[0]
+            np.testing.assert_allclose(got.get_column('ic')[0], expected)
+
+
+def test_forward_returns(crsp, rng):
+    # Gaps in the panel and missing returns never bridge months
+    panel = (
+        crsp.filter(rng.random(len(crsp)) > 0.1)
+        .with_columns(ret=pl.when(pl.col('ret') > 0.08).then(None)
+                      .otherwise('ret')))
+    res = oap.forward_returns(panel, (1, 3))
+    ret = {(p, m): r for p, m, r in
+           panel.select('permno', 'yyyymm', 'ret').iter_rows()}
+    for p, m, r1, r3 in res.select(
+            'permno', 'yyyymm', 'ret_1m_fwd', 'ret_3m_fwd').iter_rows():
+        for h, got in [(1, r1), (3, r3)]:
+            ahead = [ret.get((p, m + i)) for i in range(1, h + 1)]
+            if m % 100 + h > 12 or None in ahead:
+                assert got is None
+            else:
+                assert got == pytest.approx(sum(ahead))
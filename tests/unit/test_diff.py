@@ -0,0 +1,47 @@
+import os
+from types import SimpleNamespace
+import polars as pl
+from polars.testing import assert_frame_equal
+import openassetpricing as oap
+from openassetpricing.cache import cache_path, write_cache
+
+
+def _releases(signal_panel, cache_dir, drop=('s2',)):
+    old = signal_panel.filter(pl.col('yyyymm') < 200212).drop(*drop)
+    new = signal_panel.with_columns(
+        s0=pl.when(pl.col('yyyymm') == 200106).then(0.0).otherwise('s0'))
+    write_cache(old, cache_dir, '202408', 'firm_char')
+    write_cache(new, cache_dir, '202410', 'firm_char')
+    return old, new
+
+
+def test_diff_releases(signal_panel, tmp_path):
+    old, new = _releases(signal_panel, tmp_path)
+    res = oap.diff_releases(tmp_path, '202408', '202410', 'firm_char')
+    status = dict(res['groups'].select('yyyymm', 'status').iter_rows())
+    # s2 is new in every month, so only a month-level change shows
+    assert res['signals_added'] == ['s2']
+    assert set(status.values()) == {'changed', 'added'}
+    assert status[200212] == 'added'
+    assert res['date_range']['202408'] == (200101, 200211)
+    assert res['rows_changed'] == len(new)
+
+
+def test_upgrade_cache_twice(signal_panel, tmp_path):
+    old, new = _releases(signal_panel, tmp_path, drop=())
+    # Filling the cache is the download's job; the data is there already
+    openap = SimpleNamespace(
+        cache_dir=tmp_path, release='202410',
+        _ensure_cached=lambda data_name: None)
+    res = oap.upgrade_cache(openap, '202408', 'firm_char')
+    status = dict(res['groups'].select('yyyymm', 'status').iter_rows())
+    assert status[200106] == 'changed' and status[200212] == 'added'
+    assert sum(i == 'same' for i in status.values()) == 22
+    assert not os.path.exists(cache_path(tmp_path, '202410', 'firm_char'))
+
+    # Stored as a delta already: nothing to do
+    again = oap.upgrade_cache(openap, '202408', 'firm_char')
+    assert_frame_equal(again['groups'], res['groups'])
+    assert_frame_equal(
+        oap.scan_cache(tmp_path, '202410', 'firm_char').collect(),
+        new.sort('permno', 'yyyymm'))
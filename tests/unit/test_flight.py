@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from openassetpricing import flight as flight_module
+from openassetpricing.flight import SingleFlight
+
+
+class _Event(threading.Event):
+    # Counts the callers waiting for another caller's call
+    def __init__(self):
+        super().__init__()
+        self.waiting = threading.Semaphore(0)
+
+    def wait(self, timeout=None):
+        self.waiting.release()
+        return super().wait(timeout)
+
+
+@pytest.fixture(autouse=True)
+def counted(monkeypatch):
+    class _Call(flight_module._Call):
+        def __init__(self):
+            super().__init__()
+            self.done = _Event()
+
+    monkeypatch.setattr(flight_module, '_Call', _Call)
+
+
+def _started(flight, key, n):
+    # Waits until n callers wait for the call of `key`
+    while True:
+        with flight._lock:
+            call = flight._calls.get(key)
+        if call is not None:
+            break
+    for _ in range(n):
+        assert call.done.waiting.acquire(timeout=10)
+
+
+def test_concurrent_callers_share_one_call():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def fn(x):
+        calls.append(x)
+        release.wait()
+        return [x]
+
+    with ThreadPoolExecutor(6) as pool:
+        futures = [pool.submit(flight.do, 'k', fn, i) for i in range(5)]
+        _started(flight, 'k', 4)
+        # Another key runs meanwhile
+        other = pool.submit(flight.do, 'j', lambda: 'j')
+        assert other.result(timeout=10) == ('j', False)
+        release.set()
+        res = [i.result() for i in futures]
+
+    assert len(calls) == 1
+    # The same object for all, one of them ran it
+    assert all(r[0] is res[0][0] for r in res)
+    assert sorted(r[1] for r in res) == [False] + [True] * 4
+    # Forgotten once returned: a later call runs again
+    assert flight.do('k', fn, 9) == ([9], False)
+    assert flight._calls == {}
+
+
+def test_errors_reach_every_caller():
+    flight, release = SingleFlight(), threading.Event()
+
+    def fn():
+        release.wait()
+        raise KeyError('missing')
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(flight.do, 'k', fn) for _ in range(3)]
+        _started(flight, 'k', 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(KeyError, match='missing'):
+                future.result()
+    assert flight._calls == {}
+    assert flight.do('k', lambda: 1) == (1, False)
@@ -0,0 +1,23 @@
+import os
+import numpy as np
+import pytest
+import openassetpricing as oap
+
+
+def test_array_input_is_cached(rng, tmp_path):
+    linear_model = pytest.importorskip('sklearn.linear_model')
+    xx = rng.normal(size=(400, 2)).astype(np.float32)
+    y = 2 * xx[:, 0] + rng.normal(scale=0.1, size=400)
+    model = linear_model.LinearRegression().fit(xx, y)
+    kw = dict(n_folds=2, n_jobs=1, cache_dir=tmp_path)
+
+    res = oap.permutation_importance(model, xx, y, ['a', 'b'], **kw)
+    assert res.get_column('Feature').to_list() == ['a', 'b']
+    assert res.get_column('Importance')[0] > 1
+    assert abs(res.get_column('Importance')[1]) < 0.01
+    # The same array again is read back; another target is not
+    again = oap.permutation_importance(model, xx.copy(), y, ['a', 'b'], **kw)
+    assert again.equals(res)
+    assert len(os.listdir(tmp_path)) == 1
+    oap.permutation_importance(model, xx, -y, ['a', 'b'], **kw)
+    assert len(os.listdir(tmp_path)) == 2
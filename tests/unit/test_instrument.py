@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import pickle
+import numpy as np
+import pandas as pd
+import openassetpricing as oap
+from openassetpricing.instrument import _span
+
+
+class _Tracer:
+    """Records spans like an OpenTelemetry tracer."""
+
+    def __init__(self):
+        self.spans = []
+
+    def start_as_current_span(self, name):
+        tracer = self
+
+        class _Span:
+            def __enter__(self):
+                self.name, self.attributes = name, {}
+                tracer.spans.append(self)
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def set_attribute(self, key, value):
+                self.attributes[key] = value
+
+        return _Span()
+
+
+def test_nested_stages(caplog):
+    seen = []
+    tracer = _Tracer()
+    inst = oap.Instrument(callbacks=[seen.append], logger=True, tracer=tracer)
+    with caplog.at_level(logging.INFO, logger='openassetpricing'):
+        with inst.span('total', data_name='op'):
+            with inst.span('parse') as event:
+                event['bytes'] = 10 ** 6
+            with inst.span('sort', data_name='other'):
+                pass
+
+    assert [i['stage'] for i in inst.events] == ['parse', 'sort', 'total']
+    parse, sort, total = inst.events
+    assert parse['data_name'] == 'op' and parse['parent'] == 'total'
+    assert sort['data_name'] == 'other' and 'parent' not in total
+    assert parse['mb_per_s'] == 1 / parse['seconds']
+    assert total['seconds'] >= parse['seconds'] + sort['seconds']
+    assert seen == inst.events
+    assert [i.getMessage().split(':')[0] for i in caplog.records] == [
+        'parse op', 'sort other', 'total op']
+    assert tracer.spans[1].attributes['oap.bytes'] == 10 ** 6
+    assert inst._sampler is None
+
+    summary = inst.summary('pandas')
+    assert isinstance(summary, pd.DataFrame)
+    assert summary['stage'].tolist() == ['parse', 'sort', 'total']
+    inst.reset()
+    assert inst.events == []
+
+
+def test_peak_memory():
+    inst = oap.Instrument(interval=0.001)
+    with inst.span('parse'):
+        # Held until the stage ends, so the peak sees it
+        x = np.ones(50_000_000)
+    event = inst.events[0]
+    assert event['peak_rss'] - event['rss_start'] >= 0.9 * x.nbytes
+    assert oap.Instrument(sample_memory=False).sample_memory is False
+
+
+def test_concurrent_tasks():
+    inst = oap.Instrument()
+
+    async def download(name):
+        with inst.span('total', data_name=name):
+            await asyncio.sleep(0.01)
+            with inst.span('parse'):
+                await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(download(i) for i in ['a', 'b', 'c']))
+
+    asyncio.run(main())
+    # Each task sees its own open stages
+    parse = [i for i in inst.events if i['stage'] == 'parse']
+    assert sorted(i['data_name'] for i in parse) == ['a', 'b', 'c']
+    assert all(i['parent'] == 'total' for i in parse)
+    assert inst._sampler is None
+
+
+def test_pickle_and_no_instrument():
+    inst = oap.Instrument(callbacks=[print], tracer=_Tracer())
+    with inst.span('parse'):
+        pass
+    copy = pickle.loads(pickle.dumps(inst))
+    assert copy.events == [] and copy.callbacks == [] and copy.tracer is None
+    with copy.span('cast'):
+        pass
+    assert [i['stage'] for i in copy.events] == ['cast']
+
+    with _span(None, 'parse', data_name='op') as event:
+        event['bytes'] = 1
+    assert event == {'data_name': 'op', 'bytes': 1}
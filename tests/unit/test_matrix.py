@@ -0,0 +1,117 @@
+import json
+import os
+import numpy as np
+import polars as pl
+import openassetpricing as oap
+from openassetpricing import matrix
+from openassetpricing.cache import write_cache
+
+
+def test_feature_matrix_reused(signal_panel, tmp_path, monkeypatch):
+    x = ['s0', 's1', 's2']
+    path = str(tmp_path / 'x.npy')
+    mm = oap.feature_matrix(signal_panel, x, path, batch_size=100)
+    np.testing.assert_array_equal(
+        mm, signal_panel.select(x).to_numpy().astype(np.float32))
+
+    # The hash taken batch by batch is the one of the whole frame
+    n, fingerprint = matrix._fingerprint(
+        signal_panel.lazy(), ['permno', 'yyyymm', *x])
+    with open(matrix._meta_path(path)) as f:
+        assert json.load(f) == {
+            'columns': x, 'n_rows': n, 'fingerprint': fingerprint}
+
+    with monkeypatch.context() as m:
+        m.setattr(matrix, '_write_matrix', None)
+        again = oap.feature_matrix(signal_panel.lazy(), x, path)
+    np.testing.assert_array_equal(again, mm)
+
+    # A changed key or row order is a different matrix
+    calls = []
+    write = matrix._write_matrix
+    monkeypatch.setattr(
+        matrix, '_write_matrix', lambda *a: calls.append(1) or write(*a))
+    oap.feature_matrix(signal_panel.reverse(), x, path)
+    oap.feature_matrix(
+        signal_panel.with_columns(pl.col('permno') + 1), x, path)
+    assert len(calls) == 2
+    with open(matrix._meta_path(path)) as f:
+        assert fingerprint not in f.read()
+
+
+def test_export_matrix_one_pass(signal_panel, tmp_path, monkeypatch):
+    path = str(tmp_path / 'x.npy')
+    df = signal_panel.drop('ret')
+    fingerprints = []
+    monkeypatch.setattr(
+        matrix, '_fingerprint',
+        lambda *a: fingerprints.append(1) or (0, ''))
+    xx, index = oap.export_matrix(df, path, fill_null=0.0, batch_size=100)
+    # No hash pass before writing
+    assert not fingerprints
+    np.testing.assert_array_equal(
+        xx, df.select('s0', 's1', 's2').fill_null(0.0).to_numpy()
+        .astype(np.float32))
+    np.testing.assert_array_equal(
+        index, df.select('permno', 'yyyymm').to_numpy())
+    assert index.dtype == np.int32
+
+    # The exported matrix is reused by feature_matrix on the same rows
+    monkeypatch.undo()
+    monkeypatch.setattr(matrix, '_write_matrix', None)
+    same = df.with_columns(pl.col('s0', 's1', 's2').fill_null(0.0)
+                           .cast(pl.Float32))
+    reused = oap.feature_matrix(same, ['s0', 's1', 's2'], path)
+    np.testing.assert_array_equal(reused, xx)
+
+
+def test_export_signals_from_cache(signal_panel, tmp_path):
+    df = signal_panel.drop('ret')
+    write_cache(df, tmp_path, '202410', 'firm_char')
+    openap = object.__new__(oap.OpenAP)
+    openap.cache_dir, openap.release, openap.instrument = (
+        tmp_path, '202410', None)
+    openap._dl_signal_crsp3 = lambda: df.select(
+        'permno', 'yyyymm', Price=pl.col('s0') * 2)
+
+    path = str(tmp_path / 'x.npy')
+    xx, index = openap.export_signals(path, ['s1', 'Price'])
+    expected = (
+        df.filter(pl.any_horizontal('s1', 's0').is_not_null())
+        .sort('permno', 'yyyymm'))
+    got = pl.DataFrame(
+        {'permno': index[:, 0], 'yyyymm': index[:, 1],
+         's1': xx[:, 0], 'Price': xx[:, 1]}).sort('permno', 'yyyymm')
+    np.testing.assert_array_equal(
+        got.select('permno', 'yyyymm').to_numpy(),
+        expected.select('permno', 'yyyymm').to_numpy())
+    np.testing.assert_allclose(
+        got.select('s1', 'Price').fill_nan(None).to_numpy().astype(float),
+        expected.select('s1', pl.col('s0') * 2).to_numpy().astype(float),
+        rtol=1e-6)
+
+
+def test_export_signals_without_cache(signal_panel, tmp_path):
+    df = signal_panel.drop('ret')
+    openap = object.__new__(oap.OpenAP)
+    openap.cache_dir, openap.instrument = None, None
+    openap._dl_signal_crsp3 = lambda: df.select(
+        'permno', 'yyyymm', Price=pl.col('s0') * 2)
+    # The panel as streamed from the unzipped Drive csv
+    openap._sink_signal_panel = lambda source, path: df.write_parquet(path)
+
+    path = str(tmp_path / 'x.npy')
+    xx, index = openap.export_signals(path, ['s1', 's2'])
+    expected = df.filter(pl.any_horizontal('s1', 's2').is_not_null())
+    np.testing.assert_array_equal(
+        index, expected.select('permno', 'yyyymm').to_numpy())
+    np.testing.assert_array_equal(
+        xx, expected.select('s1', 's2').to_numpy().astype(np.float32))
+    # The temporary panel is removed
+    assert sorted(os.listdir(tmp_path)) == ['x.json', 'x.npy', 'x_index.npy']
+
+    # CRSP signals only: nothing is downloaded from Drive
+    openap._sink_signal_panel = None
+    xx, index = openap.export_signals(path, ['Price'])
+    np.testing.assert_allclose(
+        xx[:, 0], df['s0'].drop_nulls().to_numpy() * 2, rtol=1e-6)
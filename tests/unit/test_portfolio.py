@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+import openassetpricing as oap
+
+X = ['s0', 's1', 's2']
+
+
+@pytest.fixture
+def panel(signal_panel, rng):
+    me = rng.lognormal(size=len(signal_panel))
+    me[:40] = 0.0
+    return signal_panel.rename({'yyyymm': 'date'}).with_columns(
+        me=pl.Series(me), ret=pl.col('ret').fill_null(0.0))
+
+
+def _reference(panel, nport):
+    # The loop of port_sort in examples/ML_portfolio_example.ipynb
+    pdf = panel.to_pandas()
+    rows = []
+    for signal in X:
+        for date, g in pdf.dropna(subset=[signal]).groupby('date'):
+            rank = g[signal].rank(method='min')
+            port = np.ceil(rank * nport / (len(g) + 1)).astype(int)
+            for p, h in g.groupby(port):
+                vw = h[h['me'] > 0]
+                rows.append({
+                    'signalname': signal, 'port': str(p).zfill(2),
+                    'date': date, 'ew': h['ret'].mean(),
+                    'vw': np.average(vw['ret'], weights=vw['me'])
+                    if len(vw) else np.nan,
+                    'Nlong': len(h)})
+    return pd.DataFrame(rows).sort_values(['signalname', 'port', 'date'])
+
+
+@pytest.mark.parametrize('nport', [5, 10])
+def test_port_returns(panel, nport):
+    res = oap.port_returns(panel, X, nport, ['ew', 'vw'])
+    ref = _reference(panel, nport)
+    for weight in ['ew', 'vw']:
+        got = res[weight].filter(pl.col('port') != 'LS')
+        assert got.select('signalname', 'port', 'date').rows() == \
+            list(ref[['signalname', 'port', 'date']].itertuples(index=False))
+        np.testing.assert_allclose(got['ret'], ref[weight])
+        assert got['Nlong'].to_list() == ref['Nlong'].tolist()
+        assert got.columns == [
+            'signalname', 'port', 'date', 'ret', 'signallag', 'Nlong',
+            'Nshort']
+
+    # Long-short: top minus bottom portfolio
+    vw = res['vw']
+    top = str(nport).zfill(2)
+    ls = vw.filter(pl.col('port') == 'LS')
+    wide = vw.filter(pl.col('port').is_in(['01', top])).pivot(
+        on='port', index=['signalname', 'date'], values='ret')
+    expected = wide.select(
+        'signalname', 'date', ret=pl.col(top) - pl.col('01'))
+    assert_frame_equal(
+        ls.select('signalname', 'date', 'ret'),
+        expected.sort('signalname', 'date'))
+
+
+def test_port_returns_options(panel):
+    ref = oap.port_returns(panel, X, 5, 'ew')
+    # Signals default to the non-id columns; threads give the same result
+    assert_frame_equal(oap.port_returns(panel, nport=5, weight='ew'), ref)
+    assert_frame_equal(
+        oap.port_returns(panel.lazy(), X, 5, 'ew', n_jobs=2), ref)
+    pdf = oap.port_returns(panel, X, 5, 'ew', df_backend='pandas')
+    assert isinstance(pdf, pd.DataFrame) and len(pdf) == len(ref)
+    # The one stock of a month goes to the middle portfolio
+    one = oap.port_returns(
+        panel.filter(pl.col('permno') == 2), ['s0'], 5, 'ew')
+    assert set(one['port']) == {'03'}
+
+    with pytest.raises(ValueError, match='Unsupported weight'):
+        oap.port_returns(panel, X, weight='mixed')
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+import openassetpricing as oap
+
+
+X = ['s0', 's1', 's2']
+
+
+def _expected(signal_panel, beta, intercept):
+    xx = signal_panel.select(X).to_numpy()
+    return xx @ beta + intercept
+
+
+def test_coefficients(signal_panel):
+    beta = np.array([0.5, -1.0, 2.0])
+    expected = _expected(signal_panel, beta, 0.1)
+    params = pd.Series({'Intercept': 0.1, 's0': 0.5, 's1': -1.0, 's2': 2.0})
+    for model in [np.r_[0.1, beta], params, params.to_dict()]:
+        # Streamed in batches smaller than the panel
+        res = oap.predict_panel(signal_panel.lazy(), model, X, batch_size=100)
+        np.testing.assert_allclose(res, expected)
+
+
+def test_statsmodels_and_sklearn(signal_panel):
+    smf = pytest.importorskip('statsmodels.formula.api')
+    linear_model = pytest.importorskip('sklearn.linear_model')
+    df = signal_panel.drop_nulls().to_pandas()
+    fit = smf.ols('ret ~ s0 + s1 + s2', df).fit()
+    np.testing.assert_allclose(
+        oap.predict_panel(signal_panel, fit, X),
+        _expected(signal_panel, fit.params[X].to_numpy(),
+                  fit.params['Intercept']))
+    sk = linear_model.LinearRegression().fit(
+        df[X].to_numpy(), df['ret'].to_numpy())
+    full = signal_panel.drop_nulls()
+    np.testing.assert_allclose(
+        oap.predict_panel(full, sk, X), sk.predict(full.select(X).to_numpy()))
+
+
+def test_missing_coefficient(signal_panel):
+    params = pd.Series({'Intercept': 0.1, 's0': 0.5, 's1': -1.0})
+    with pytest.raises(ValueError, match='s2'):
+        oap.predict_panel(signal_panel, params, X)
@@ -0,0 +1,95 @@
+import json
+import pytest
+import openassetpricing as oap
+from openassetpricing import registry
+from openassetpricing.gdrive_parse import _GoogleDriveFile
+
+
+FOLDER = _GoogleDriveFile.TYPE_FOLDER
+ROOT = 'https://drive.google.com/drive/folders/root'
+# 2023.08 is the folder of the table's 2023; 2022.03 only shares the year
+CHILDREN = [
+    ('1EP6oEabyZRamveGNyzYU0u6qJ-N43Qfq', '2023.08', FOLDER),
+    ('other2022', 'Release 2022.03', FOLDER),
+    ('new2025', '2025.01', FOLDER),
+    ('readme', 'README 2025.01', 'text/plain')]
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    """Counts the listings of a root folder with the CHILDREN folders."""
+
+    calls = []
+
+    def _list_folder(sess, url):
+        calls.append(url)
+        return CHILDREN
+
+    monkeypatch.setattr(registry, '_get_session', lambda: None)
+    monkeypatch.setattr(registry, '_list_folder', _list_folder)
+    return calls
+
+
+def test_table_only(drive):
+    reg = oap.ReleaseRegistry(root_url=None)
+    df = reg.releases()
+    assert df.get_column('release').to_list() == [
+        '2022', '2023', '202408', '202410']
+    assert set(df.get_column('source')) == {'urls'}
+    assert reg.latest() == '202410' and reg.cache_dir is None
+    assert drive == []
+
+
+def test_discovery_merges_table_names(drive):
+    reg = oap.ReleaseRegistry(root_url=ROOT)
+    df = reg.releases()
+    assert dict(df.select('release', 'source').iter_rows()) == {
+        '202203': 'drive', '202308': 'drive', '202408': 'urls',
+        '202410': 'urls', '202501': 'drive'}
+    assert reg.resolve('2023') == '202308'
+    assert reg.resolve(2022) == '202203'
+    assert reg.resolve('latest') == '202501'
+    with pytest.raises(ValueError, match='Unknown release'):
+        reg.resolve('1999')
+
+
+def test_cache_and_refresh(drive, tmp_path):
+    oap.ReleaseRegistry(root_url=ROOT, cache_dir=tmp_path).latest()
+    assert len(drive) == 1
+    # Read back from registry.json while fresh, listed again once stale
+    assert oap.ReleaseRegistry(
+        root_url=ROOT, cache_dir=tmp_path).latest() == '202501'
+    assert len(drive) == 1
+    oap.ReleaseRegistry(root_url=ROOT, cache_dir=tmp_path, ttl=0).latest()
+    assert len(drive) == 2
+    # A release missing from the cached list triggers one refresh
+    CHILDREN.append(('new2026', '2026.01', FOLDER))
+    try:
+        reg = oap.ReleaseRegistry(root_url=ROOT, cache_dir=tmp_path)
+        assert reg.resolve('202601') == '202601'
+        assert len(drive) == 3
+    finally:
+        CHILDREN.pop()
+
+
+@pytest.mark.parametrize('content', [
+    '{"releases": {', '{"releases": {"releases": []}, "datasets": {}}',
+    '[]', '{"datasets": {"202410": {"fetched": 0}}}'])
+def test_bad_registry_file(drive, tmp_path, content, capsys):
+    (tmp_path / 'registry.json').write_text(content)
+    reg = oap.ReleaseRegistry(root_url=ROOT, cache_dir=tmp_path)
+    assert reg.latest() == '202501'
+    assert 'listing the releases again' in capsys.readouterr().out
+    state = json.loads((tmp_path / 'registry.json').read_text())
+    assert registry._valid_state(state)
+
+
+def test_unreadable_root_falls_back(monkeypatch):
+    def _list_folder(sess, url):
+        raise OSError('offline')
+
+    monkeypatch.setattr(registry, '_get_session', lambda: None)
+    monkeypatch.setattr(registry, '_list_folder', _list_folder)
+    reg = oap.ReleaseRegistry(root_url=ROOT)
+    assert reg.latest() == '202410'
+    assert reg.resolve('2023') == '2023'
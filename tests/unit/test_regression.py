@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+import openassetpricing as oap
+
+
+def _reference(port, factors, signal, **fit):
+    sm = pytest.importorskip('statsmodels.api')
+    df = port.filter(pl.col('signalname') == signal).join(factors, on='date')
+    x = sm.add_constant(df.select('mkt', 'smb').to_numpy())
+    return sm.OLS(df.get_column('ret').to_numpy(), x).fit(**fit)
+
+
+@pytest.mark.parametrize('nw_lags', [None, 3])
+def test_ts_regress_matches_ols(factor_port, nw_lags):
+    port, factors = factor_port
+    res = oap.ts_regress(port, factors, nw_lags=nw_lags)
+    fit = {}
+    if nw_lags:
+        fit = {'cov_type': 'HAC',
+               'cov_kwds': {'maxlags': nw_lags, 'use_correction': False}}
+    for signal in ['a', 'b']:
+        ref = _reference(port, factors, signal, **fit)
+        got = res.filter(pl.col('signalname') == signal)
+        assert got.get_column('term').to_list() == ['alpha', 'mkt', 'smb']
+        np.testing.assert_allclose(got.get_column('coef'), ref.params)
+        np.testing.assert_allclose(got.get_column('se'), ref.bse)
+
+
+def test_ts_regress_singular_group(factor_port):
+    port, factors = factor_port
+    # smb equals mkt in the months of group b only
+    late = pl.col('date') >= factors.get_column('date')[100]
+    factors = factors.with_columns(
+        smb=pl.when(late).then(pl.col('mkt')).otherwise(pl.col('smb')))
+    port = port.filter((pl.col('signalname') == 'a') | late)
+    res = oap.ts_regress(port, factors)
+    assert res.filter(pl.col('signalname') == 'b')['coef'].is_nan().all()
+    ref = _reference(port, factors, 'a')
+    np.testing.assert_allclose(
+        res.filter(pl.col('signalname') == 'a').get_column('coef'),
+        ref.params)
+
+
+def _fm_reference(panel, x, nw_lags=None):
+    sm = pytest.importorskip('statsmodels.api')
+    beta = []
+    for _, g in panel.to_pandas().groupby('yyyymm'):
+        cols = [i for i in x if g[i].notna().any()]
+        g = g.dropna(subset=['ret', *cols])
+        b = pd.Series(np.nan, index=['const', *x])
+        z = sm.add_constant(g[cols], has_constant='add')
+        b[['const', *cols]] = sm.OLS(g['ret'], z).fit().params
+        beta.append(b)
+    beta = pd.DataFrame(beta)
+    fit = {}
+    if nw_lags:
+        fit = {'cov_type': 'HAC',
+               'cov_kwds': {'maxlags': nw_lags, 'use_correction': False}}
+    se = [sm.OLS(beta[i].dropna().to_numpy(),
+                 np.ones(beta[i].notna().sum())).fit(**fit).bse[0]
+          for i in beta.columns]
+    return beta, np.array(se)
+
+
+@pytest.mark.parametrize('nw_lags', [None, 2])
+def test_fama_macbeth_matches_ols(signal_panel, nw_lags):
+    x = ['s0', 's1', 's2']
+    # s2 is missing in one month, so it is left out of that regression
+    panel = signal_panel.with_columns(
+        s2=pl.when(pl.col('yyyymm') == 200105).then(None).otherwise('s2'))
+    summary, monthly = oap.fama_macbeth(
+        panel, x, date='yyyymm', nw_lags=nw_lags, monthly=True, n_jobs=2)
+    beta, se = _fm_reference(panel, x, nw_lags)
+
+    assert summary['term'].to_list() == ['Intercept', *x]
+    np.testing.assert_allclose(summary['coef'], beta.mean())
+    np.testing.assert_allclose(summary['se'], se)
+    assert summary['nmonth'].to_list() == [24, 24, 24, 23]
+    np.testing.assert_allclose(
+        monthly.select('Intercept', *x).to_numpy(), beta.to_numpy())
+    assert monthly['yyyymm'].dtype == pl.Int32
+    assert monthly['nobs'].to_list() == [
+        len(g.dropna(subset=['ret', *[i for i in x if g[i].notna().any()]]))
+        for _, g in panel.to_pandas().groupby('yyyymm')]
+
+
+def test_fama_macbeth_small_months(signal_panel):
+    # Months with fewer than min_obs complete rows are left out
+    panel = signal_panel.filter(
+        (pl.col('yyyymm') > 200101) | (pl.col('permno') <= 2))
+    summary = oap.fama_macbeth(panel, ['s0'], date='yyyymm', n_jobs=1)
+    assert summary['nmonth'].to_list() == [23, 23]
+    with pytest.warns(RuntimeWarning, match='empty slice'):
+        res = oap.fama_macbeth(
+            panel, ['s0'], date='yyyymm', min_obs=100, df_backend='pandas')
+    assert res['coef'].isna().all() and (res['nmonth'] == 0).all()
@@ -0,0 +1,64 @@
+import warnings
+import numpy as np
+import polars as pl
+import pytest
+import openassetpricing as oap
+
+
+def test_spells_join_int32_signals(crsp):
+    # dl_all_signals output is Int32; the signal of permno 2 is stale
+    signals = pl.DataFrame(
+        {'permno': [1, 2, 3], 'yyyymm': [200012, 199901, 200011],
+         'x': [1.0, 2.0, 3.0]},
+        schema_overrides={'permno': pl.Int32, 'yyyymm': pl.Int32})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        spells = oap.survival_spells(crsp, signals)
+    x = dict(spells.select('permno', 'x').iter_rows())
+    assert (x[1], x[2], x[3], x[4]) == (1.0, None, 3.0, None)
+    assert spells.filter(pl.col('permno') == 1).row(0, named=True)[
+        'event_type'] == 'crash'
+
+    spells = oap.survival_spells(crsp, signals, max_stale=None)
+    assert spells.filter(pl.col('permno') == 2).get_column('x')[0] == 2.0
+
+
+def test_spells_start_with_the_first_signal(crsp):
+    # Permno 1 crashes in 200106, before its first signal
+    signals = pl.DataFrame(
+        {'permno': [1, 5, 5], 'yyyymm': [200108, 200103, 200104],
+         'x': [1.0, None, 2.0]},
+        schema_overrides={'permno': pl.Int32, 'yyyymm': pl.Int32})
+    spells = oap.survival_spells(crsp, signals, signal_lag=1)
+    rows = {i['permno']: i for i in spells.iter_rows(named=True)}
+    assert (rows[1]['yyyymm'], rows[1]['x']) == (200109, 1.0)
+    assert rows[1]['event_type'] == 'censored'
+    assert (rows[5]['yyyymm'], rows[5]['duration'], rows[5]['x']) == (
+        200105, 8, 2.0)
+    # Never a signal: from the first month, without covariates
+    assert (rows[2]['yyyymm'], rows[2]['duration'], rows[2]['x']) == (
+        200101, 12, None)
+    assert spells.get_column('x').null_count() == 18
+
+
+def test_cox_screen_matches_phreg(rng):
+    sm = pytest.importorskip('statsmodels.api')
+    n = 400
+    x = rng.normal(size=(n, 2))
+    x[rng.random(n) < 0.2, 1] = np.nan
+    hazard = np.exp(0.5 * x[:, 0])
+    # Whole months give tied durations, as in survival_spells output
+    duration = np.ceil(rng.exponential(12 / hazard)).clip(max=36)
+    df = pl.DataFrame({
+        'duration': duration, 'event': (duration < 36).astype(np.int8),
+        'x1': x[:, 0], 'x2': x[:, 1]}).fill_nan(None)
+    res = oap.cox_screen(df, ['x1', 'x2'])
+    for i, name in enumerate(['x1', 'x2']):
+        ok = ~np.isnan(x[:, i])
+        ref = sm.PHReg(
+            duration[ok], x[ok, i:i + 1], status=df['event'].to_numpy()[ok],
+            ties='efron').fit()
+        row = res.filter(pl.col('covariate') == name).row(0, named=True)
+        np.testing.assert_allclose(row['coef'], ref.params[0], rtol=1e-6)
+        np.testing.assert_allclose(row['se(coef)'], ref.bse[0], rtol=1e-6)
+        np.testing.assert_allclose(row['p'], ref.pvalues[0], rtol=1e-6)
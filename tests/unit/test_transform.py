@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+import openassetpricing as oap
+
+X = ['s0', 's1', 's2']
+
+
+def _reference(signal_panel, func):
+    pdf = signal_panel.to_pandas()
+    return pdf.groupby('yyyymm')[X].transform(func)
+
+
+def _check(res, expected):
+    np.testing.assert_allclose(
+        res.select(X).to_numpy().astype(float), expected.to_numpy(),
+        rtol=1e-10, atol=1e-12)
+
+
+def test_zscore(signal_panel):
+    res = oap.cross_section(signal_panel, X, 'zscore')
+    _check(res, _reference(signal_panel, lambda s: (s - s.mean()) / s.std()))
+    # Other columns are untouched, nulls stay null
+    assert res['ret'].equals(signal_panel['ret'])
+    assert res.select(pl.col(X).null_count()).row(0) == \
+        signal_panel.select(pl.col(X).null_count()).row(0)
+
+
+def test_rank(signal_panel):
+    stats = pytest.importorskip('scipy.stats')
+    # Ties get the average rank
+    df = signal_panel.with_columns(pl.col('s0').round(0))
+    res = oap.cross_section(df, X, 'rank')
+
+    def rank(s):
+        r = pd.Series(np.nan, index=s.index)
+        ok = s.notna()
+        r[ok] = stats.rankdata(s[ok]) * 2 / (ok.sum() + 1) - 1
+        return r
+
+    _check(res, _reference(df, rank))
+    assert res.select(pl.col(X).abs().max() < 1).row(0) == (True,) * 3
+
+
+def test_winsorize(signal_panel):
+    limits = (0.1, 0.9)
+    res = oap.cross_section(signal_panel, X, 'winsorize', limits=limits)
+
+    def clip(s):
+        # Nearest rank, halves rounded up as in polars
+        v = np.sort(s.dropna().to_numpy())
+        lo, hi = v[np.floor(np.multiply(limits, len(v) - 1) + 0.5).astype(int)]
+        return s.clip(lo, hi)
+
+    _check(res, _reference(signal_panel, clip))
+
+
+def test_lazy_and_fill_null(signal_panel):
+    res = oap.cross_section(
+        signal_panel.lazy(), X, 'zscore', fill_null=0.0)
+    assert isinstance(res, pl.LazyFrame)
+    res = res.collect()
+    assert res.select(pl.sum_horizontal(pl.col(X).null_count())).item() == 0
+
+    # A month with a single stock has no standard deviation
+    one = signal_panel.filter(pl.col('permno') == 1)
+    res = oap.cross_section(one, X, 'zscore', df_backend='pandas')
+    assert isinstance(res, pd.DataFrame) and res[X].isna().all().all()
+
+    with pytest.raises(ValueError, match='Unsupported method'):
+        oap.cross_section(signal_panel, X, 'minmax')